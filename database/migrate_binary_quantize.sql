@@ -0,0 +1,14 @@
+-- Migration: Binary-quantized HNSW index on knowledge_base embeddings
+-- Vector search first ranks candidates by Hamming distance between 1-bit
+-- quantized embeddings (XOR + popcount instead of 1536 FP multiplies),
+-- then reranks that short list by exact halfvec cosine similarity.
+-- Requires pgvector >= 0.7.0.
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_embedding_bit
+    ON knowledge_base USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+    WITH (m = 16, ef_construction = 64);
+
+ANALYZE knowledge_base;
+
+-- Done!
+SELECT 'Binary quantization migration completed successfully!' AS status;
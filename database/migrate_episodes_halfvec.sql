@@ -0,0 +1,22 @@
+-- Migration: Store episode embeddings as halfvec (FP16)
+-- Same change as migrate_halfvec.sql for the 384-d episodes.vector column:
+-- half the heap and HNSW index size, cosine ranking unaffected at FP16.
+-- Requires pgvector >= 0.7.0. Run after migrate_episodes_hnsw.sql.
+
+-- Step 1: Drop the FP32 vector index (it cannot be converted in place)
+DROP INDEX IF EXISTS idx_episodes_vector;
+
+-- Step 2: Convert the column; existing values are cast to half precision
+ALTER TABLE episodes
+    ALTER COLUMN vector TYPE halfvec(384)
+    USING vector::halfvec(384);
+
+-- Step 3: Rebuild the HNSW index with the halfvec operator class
+CREATE INDEX IF NOT EXISTS idx_episodes_vector
+    ON episodes USING hnsw (vector halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+ANALYZE episodes;
+
+-- Done!
+SELECT 'Episodes halfvec migration completed successfully!' AS status;
@@ -0,0 +1,18 @@
+-- Migration: Rebuild the episodes vector index as HNSW
+-- IVFFlat needs training data (lists are fixed at build time, so an index
+-- built on an empty table degrades badly) and has a worse speed/recall
+-- trade-off than HNSW; search-time recall is tuned with hnsw.ef_search.
+
+-- Step 1: Drop the IVFFlat index
+DROP INDEX IF EXISTS idx_episodes_vector;
+
+-- Step 2: Build the HNSW index
+-- HNSW parameters: m=16 (good balance), ef_construction=64 (build quality)
+CREATE INDEX IF NOT EXISTS idx_episodes_vector
+    ON episodes USING hnsw (vector vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+ANALYZE episodes;
+
+-- Done!
+SELECT 'Episodes HNSW migration completed successfully!' AS status;
@@ -0,0 +1,31 @@
+-- Migration: Store 1536-d embeddings as halfvec (FP16)
+-- Halves heap and HNSW index size for knowledge_base and user_persona
+-- embeddings; cosine ranking is unaffected at FP16 precision.
+-- Requires pgvector >= 0.7.0.
+
+-- Step 1: Drop the FP32 vector indexes (they cannot be converted in place)
+DROP INDEX IF EXISTS idx_knowledge_base_embedding;
+DROP INDEX IF EXISTS idx_knowledge_base_embedding_hnsw;
+DROP INDEX IF EXISTS idx_user_persona_embedding;
+
+-- Step 2: Convert the columns; existing values are cast to half precision
+ALTER TABLE knowledge_base
+    ALTER COLUMN embedding TYPE halfvec(1536)
+    USING embedding::halfvec(1536);
+
+ALTER TABLE user_persona
+    ALTER COLUMN embedding TYPE halfvec(1536)
+    USING embedding::halfvec(1536);
+
+-- Step 3: Rebuild the HNSW indexes with the halfvec operator class
+-- HNSW parameters: m=16 (good balance), ef_construction=64 (build quality)
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_embedding
+    ON knowledge_base USING hnsw (embedding halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_user_persona_embedding
+    ON user_persona USING hnsw (embedding halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+ANALYZE knowledge_base;
+ANALYZE user_persona;
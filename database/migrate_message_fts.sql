@@ -0,0 +1,28 @@
+-- Migration: Precomputed full-text vectors for super_chat_messages
+-- Message BM25 search used to call to_tsvector('english', content) on every
+-- row at query time, which re-tokenizes all messages and can't use an index.
+-- A stored generated column plus a GIN index turns it into an index probe.
+
+-- Step 1: Add the generated content_tsv column
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'super_chat_messages' AND column_name = 'content_tsv'
+    ) THEN
+        ALTER TABLE super_chat_messages ADD COLUMN content_tsv tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector('english', coalesce(content, ''))
+            ) STORED;
+        RAISE NOTICE 'Added content_tsv column to super_chat_messages';
+    END IF;
+END $$;
+
+-- Step 2: GIN index for content_tsv @@ tsquery
+CREATE INDEX IF NOT EXISTS idx_super_chat_messages_content_tsv
+    ON super_chat_messages USING GIN (content_tsv);
+
+ANALYZE super_chat_messages;
+
+-- Done!
+SELECT 'Message full-text index migration completed successfully!' AS status;
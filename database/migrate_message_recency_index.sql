@@ -0,0 +1,12 @@
+-- Migration: Recency index for super_chat_messages
+-- "Latest N messages" lookups (temp memory load, conversation history,
+-- episodization) filter on super_chat_id and order by created_at. Without
+-- a composite index Postgres reads and sorts every message in the chat.
+
+CREATE INDEX IF NOT EXISTS idx_super_chat_messages_chat_created
+    ON super_chat_messages (super_chat_id, created_at DESC);
+
+ANALYZE super_chat_messages;
+
+-- Done!
+SELECT 'Message recency index migration completed successfully!' AS status;
@@ -0,0 +1,134 @@
+-- Migration: Hash-partition knowledge_base by user_id
+-- Every hot query filters on user_id = ..., so with 16 hash partitions the
+-- planner prunes to a single partition before the HNSW scan and each
+-- partition's vector index stays small enough to remain cached.
+-- user_id stays VARCHAR: the application uses readable ids, and hash
+-- partitioning works on text keys.
+-- Requires PostgreSQL >= 13 (row triggers on partitioned tables).
+
+BEGIN;
+
+-- Step 1: Create the partitioned table from the live table's full column
+-- set (including columns added by later migrations: title, source, ...)
+CREATE TABLE knowledge_base_partitioned (
+    LIKE knowledge_base INCLUDING DEFAULTS INCLUDING GENERATED,
+    PRIMARY KEY (user_id, id)
+) PARTITION BY HASH (user_id);
+
+-- Columns the application relies on, for tables created before they existed
+ALTER TABLE knowledge_base_partitioned ADD COLUMN IF NOT EXISTS ts_vector tsvector;
+ALTER TABLE knowledge_base_partitioned ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE knowledge_base_p%s PARTITION OF knowledge_base_partitioned
+             FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+    END LOOP;
+END $$;
+
+-- Step 2: Copy every stored column, keeping ids so semantic_memory_index
+-- stays valid (generated columns are recomputed on insert)
+DO $$
+DECLARE
+    column_list TEXT;
+BEGIN
+    SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+    INTO column_list
+    FROM information_schema.columns
+    WHERE table_schema = current_schema()
+      AND table_name = 'knowledge_base'
+      AND is_generated = 'NEVER';
+
+    EXECUTE format(
+        'INSERT INTO knowledge_base_partitioned (%s) SELECT %s FROM knowledge_base',
+        column_list, column_list
+    );
+END $$;
+
+-- Remember the old non-unique indexes (e.g. the metadata/importance indexes
+-- from add_metadata_support.sql) so they can be rebuilt on the new table
+CREATE TEMP TABLE knowledge_base_index_defs ON COMMIT DROP AS
+SELECT pg_get_indexdef(i.indexrelid) AS indexdef
+FROM pg_index i
+WHERE i.indrelid = 'knowledge_base'::regclass
+  AND NOT i.indisunique;
+
+-- Step 3: Swap tables (drops the old indexes, triggers and FK with it).
+-- The id sequence moves to the new table first, so the DROP keeps it and
+-- the copied id default keeps numbering where the old table left off.
+DO $$
+BEGIN
+    EXECUTE format(
+        'ALTER SEQUENCE %s OWNED BY knowledge_base_partitioned.id',
+        pg_get_serial_sequence('knowledge_base', 'id')
+    );
+END $$;
+DROP TABLE knowledge_base CASCADE;
+ALTER TABLE knowledge_base_partitioned RENAME TO knowledge_base;
+ALTER TABLE knowledge_base RENAME CONSTRAINT knowledge_base_partitioned_pkey TO knowledge_base_pkey;
+
+-- Step 4: Rebuild indexes on the parent; each partition gets its own copy
+DO $$
+DECLARE
+    def TEXT;
+BEGIN
+    FOR def IN SELECT indexdef FROM knowledge_base_index_defs LOOP
+        EXECUTE def;
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_embedding
+    ON knowledge_base USING hnsw (embedding halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_embedding_bit
+    ON knowledge_base USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+    WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_ts_vector ON knowledge_base USING GIN (ts_vector);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_user_content_tsv ON knowledge_base USING GIN (user_id, content_tsv);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_category ON knowledge_base (category);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_tags ON knowledge_base USING GIN (tags);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_user_id ON knowledge_base (user_id);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_id ON knowledge_base (id);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_content_trgm ON knowledge_base USING GIN (content gin_trgm_ops);
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'knowledge_base' AND column_name = 'title'
+    ) THEN
+        CREATE INDEX IF NOT EXISTS idx_knowledge_base_title_trgm
+            ON knowledge_base USING GIN (title gin_trgm_ops);
+    END IF;
+END $$;
+
+-- Step 5: Restore triggers
+CREATE TRIGGER trigger_update_knowledge_ts_vector
+BEFORE INSERT OR UPDATE ON knowledge_base
+FOR EACH ROW
+EXECUTE FUNCTION update_knowledge_ts_vector();
+
+CREATE TRIGGER trigger_update_knowledge_base_updated_at
+BEFORE UPDATE ON knowledge_base
+FOR EACH ROW
+EXECUTE FUNCTION update_updated_at_column();
+
+-- Step 6: semantic_memory_index references the composite key
+ALTER TABLE semantic_memory_index
+    ADD CONSTRAINT semantic_memory_index_knowledge_fkey
+    FOREIGN KEY (user_id, knowledge_id)
+    REFERENCES knowledge_base (user_id, id) ON DELETE CASCADE;
+
+COMMIT;
+
+ANALYZE knowledge_base;
+
+-- Done!
+SELECT 'knowledge_base partitioning migration completed successfully!' AS status;
@@ -0,0 +1,50 @@
+-- Migration: Trigram indexes for ILIKE keyword search
+-- The keyword side of hybrid search filters with ILIKE '%term%', which a
+-- B-tree cannot serve; pg_trgm GIN indexes make those predicates (and
+-- similarity()) index lookups instead of sequential scans.
+
+-- Step 1: Enable trigram extension
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Step 2: Semantic layer (knowledge_base.content / title)
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_content_trgm
+    ON knowledge_base USING GIN (content gin_trgm_ops);
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'knowledge_base' AND column_name = 'title'
+    ) THEN
+        CREATE INDEX IF NOT EXISTS idx_knowledge_base_title_trgm
+            ON knowledge_base USING GIN (title gin_trgm_ops);
+        RAISE NOTICE 'Created trigram index on knowledge_base.title';
+    END IF;
+END $$;
+
+-- Step 3: Episodic layer (message content and episode transcripts)
+CREATE INDEX IF NOT EXISTS idx_super_chat_messages_content_trgm
+    ON super_chat_messages USING GIN (content gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_episodes_messages_trgm
+    ON episodes USING GIN ((messages::text) gin_trgm_ops);
+
+-- Step 4: Full-text search index for the content_tsv @@ predicate
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'knowledge_base' AND column_name = 'content_tsv'
+    ) THEN
+        CREATE INDEX IF NOT EXISTS idx_knowledge_base_content_tsv
+            ON knowledge_base USING GIN (content_tsv);
+    END IF;
+END $$;
+
+-- Step 5: Update planner statistics
+ANALYZE knowledge_base;
+ANALYZE super_chat_messages;
+ANALYZE episodes;
+
+-- Done!
+SELECT 'Trigram migration completed successfully!' AS status;
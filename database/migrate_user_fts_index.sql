@@ -0,0 +1,36 @@
+-- Migration: Per-user full-text search index on knowledge_base
+-- BM25 queries filter on user_id AND content_tsv @@ tsquery. A plain GIN
+-- index on content_tsv returns matches for every user, which are then
+-- filtered; a composite (user_id, content_tsv) GIN index answers both
+-- predicates from the index.
+
+-- Step 1: B-tree operator classes for GIN (needed for the user_id key)
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Step 2: Ensure the precomputed content_tsv column exists
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'knowledge_base' AND column_name = 'content_tsv'
+    ) THEN
+        ALTER TABLE knowledge_base ADD COLUMN content_tsv tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector('english', coalesce(content, ''))
+            ) STORED;
+        RAISE NOTICE 'Added content_tsv column to knowledge_base';
+    END IF;
+END $$;
+
+-- Step 3: Composite GIN index for per-user full-text search
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_user_content_tsv
+    ON knowledge_base USING GIN (user_id, content_tsv);
+
+-- Step 4: B-tree on user_id for the vector/filter paths
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_user_id
+    ON knowledge_base (user_id);
+
+ANALYZE knowledge_base;
+
+-- Done!
+SELECT 'Per-user full-text index migration completed successfully!' AS status;
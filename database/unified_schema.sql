@@ -4,6 +4,12 @@
 -- Enable pgvector extension
 CREATE EXTENSION IF NOT EXISTS vector;
 
+-- Enable trigram matching (indexable ILIKE '%term%' search)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Enable B-tree operator classes in GIN (per-user full-text index)
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
 -- ============================================================================
 -- SEMANTIC MEMORY TABLES
 -- ============================================================================
@@ -17,34 +23,54 @@ CREATE TABLE IF NOT EXISTS user_persona (
     interests TEXT[],
     expertise TEXT[],
     preferences JSONB DEFAULT '{}',
-    embedding vector(1536),
+    embedding halfvec(1536),
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
 -- Knowledge Base: Multi-purpose knowledge storage
+-- Hash-partitioned on user_id: every hot query filters on user_id, so the
+-- planner prunes to one partition and searches that partition's HNSW index
 CREATE TABLE IF NOT EXISTS knowledge_base (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id VARCHAR(100) NOT NULL,
     content TEXT NOT NULL,
     category VARCHAR(50) DEFAULT 'knowledge', -- knowledge, skill, process
     tags TEXT[] DEFAULT '{}',
     importance_score FLOAT DEFAULT 0.5,
-    embedding vector(1536),
+    embedding halfvec(1536),  -- FP16: half the storage/index memory of vector(1536)
     metadata JSONB DEFAULT '{}',
     ts_vector tsvector,
+    -- Precomputed once per write; BM25 queries match against this column
+    content_tsv tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED,
     created_at TIMESTAMP DEFAULT NOW(),
-    updated_at TIMESTAMP DEFAULT NOW()
-);
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (user_id, id)  -- partition key must be part of the primary key
+) PARTITION BY HASH (user_id);
+
+-- 16 hash partitions; indexes created on knowledge_base cascade to each one
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS knowledge_base_p%s PARTITION OF knowledge_base
+             FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+    END LOOP;
+END $$;
 
 -- Semantic Memory Index: User-knowledge relationships
 CREATE TABLE IF NOT EXISTS semantic_memory_index (
     id SERIAL PRIMARY KEY,
     user_id VARCHAR(100) NOT NULL,
-    knowledge_id INTEGER REFERENCES knowledge_base(id) ON DELETE CASCADE,
+    knowledge_id INTEGER,
     access_count INTEGER DEFAULT 0,
     last_accessed_at TIMESTAMP DEFAULT NOW(),
-    created_at TIMESTAMP DEFAULT NOW()
+    created_at TIMESTAMP DEFAULT NOW(),
+    FOREIGN KEY (user_id, knowledge_id)
+        REFERENCES knowledge_base(user_id, id) ON DELETE CASCADE
 );
 
 -- ============================================================================
@@ -65,7 +91,11 @@ CREATE TABLE IF NOT EXISTS super_chat_messages (
     content TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT NOW(),
     episodized BOOLEAN DEFAULT FALSE,
-    episodized_at TIMESTAMP
+    episodized_at TIMESTAMP,
+    -- Precomputed once per write; message BM25 queries match against this column
+    content_tsv tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED
 );
 
 -- Deep Dive Conversations: Focused discussion threads
@@ -96,7 +126,7 @@ CREATE TABLE IF NOT EXISTS episodes (
     message_count INTEGER NOT NULL,
     date_from TIMESTAMP NOT NULL,
     date_to TIMESTAMP NOT NULL,
-    vector vector(384),  -- for sentence-transformers
+    vector halfvec(384),  -- for sentence-transformers; FP16 halves index memory
     created_at TIMESTAMP DEFAULT NOW()
 );
 
@@ -120,18 +150,31 @@ CREATE TABLE IF NOT EXISTS instances (
 -- ============================================================================
 
 -- Vector similarity indexes for semantic search
+-- HNSW parameters: m=16 (good balance), ef_construction=64 (build quality);
+-- search-time recall is tuned per query with hnsw.ef_search
 CREATE INDEX IF NOT EXISTS idx_user_persona_embedding 
-ON user_persona USING ivfflat (embedding vector_cosine_ops) 
-WITH (lists = 100);
+ON user_persona USING hnsw (embedding halfvec_cosine_ops) 
+WITH (m = 16, ef_construction = 64);
 
 CREATE INDEX IF NOT EXISTS idx_knowledge_base_embedding 
-ON knowledge_base USING ivfflat (embedding vector_cosine_ops) 
-WITH (lists = 100);
+ON knowledge_base USING hnsw (embedding halfvec_cosine_ops) 
+WITH (m = 16, ef_construction = 64);
+
+-- Binary-quantized (1 bit per dimension) HNSW index: cheap Hamming-distance
+-- candidate scan, reranked by exact cosine in KnowledgeRepository.search_by_vector
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_embedding_bit 
+ON knowledge_base USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops) 
+WITH (m = 16, ef_construction = 64);
 
 -- Full-text search index
 CREATE INDEX IF NOT EXISTS idx_knowledge_base_ts_vector 
 ON knowledge_base USING GIN (ts_vector);
 
+-- Per-user full-text index: user_id = ... AND content_tsv @@ ... is answered
+-- from one GIN index instead of scanning every user's postings
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_user_content_tsv 
+ON knowledge_base USING GIN (user_id, content_tsv);
+
 -- Category and tags indexes
 CREATE INDEX IF NOT EXISTS idx_knowledge_base_category 
 ON knowledge_base(category);
@@ -143,17 +186,25 @@ ON knowledge_base USING GIN (tags);
 CREATE INDEX IF NOT EXISTS idx_knowledge_base_user_id 
 ON knowledge_base(user_id);
 
+-- Lookups by id alone (get_by_id/update/delete) can't use the (user_id, id) key
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_id 
+ON knowledge_base(id);
+
 CREATE INDEX IF NOT EXISTS idx_semantic_memory_index_user_id 
 ON semantic_memory_index(user_id);
 
+-- Trigram index so content ILIKE '%term%' uses an index instead of a seq scan
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_content_trgm 
+ON knowledge_base USING GIN (content gin_trgm_ops);
+
 -- ============================================================================
 -- INDEXES FOR EPISODIC MEMORY
 -- ============================================================================
 
--- Vector similarity index for episodes
+-- Vector similarity index for episodes (HNSW, same parameters as above)
 CREATE INDEX IF NOT EXISTS idx_episodes_vector 
-ON episodes USING ivfflat (vector vector_cosine_ops) 
-WITH (lists = 100);
+ON episodes USING hnsw (vector halfvec_cosine_ops) 
+WITH (m = 16, ef_construction = 64);
 
 -- User and source lookup indexes
 CREATE INDEX IF NOT EXISTS idx_super_chat_user_id 
@@ -168,10 +219,25 @@ ON episodes(source_type, source_id);
 CREATE INDEX IF NOT EXISTS idx_deepdive_conversations_user_id 
 ON deepdive_conversations(user_id);
 
+-- Latest-messages-per-chat lookups: index range scan, no sort
+CREATE INDEX IF NOT EXISTS idx_super_chat_messages_chat_created 
+ON super_chat_messages(super_chat_id, created_at DESC);
+
 -- Episodization tracking
 CREATE INDEX IF NOT EXISTS idx_super_chat_messages_episodized 
 ON super_chat_messages(episodized, created_at);
 
+-- Full-text index for message BM25 search
+CREATE INDEX IF NOT EXISTS idx_super_chat_messages_content_tsv 
+ON super_chat_messages USING GIN (content_tsv);
+
+-- Trigram indexes for ILIKE keyword search over episodic content
+CREATE INDEX IF NOT EXISTS idx_super_chat_messages_content_trgm 
+ON super_chat_messages USING GIN (content gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_episodes_messages_trgm 
+ON episodes USING GIN ((messages::text) gin_trgm_ops);
+
 -- ============================================================================
 -- TRIGGERS FOR SEMANTIC MEMORY
 -- ============================================================================
@@ -10,9 +10,13 @@ This demo demonstrates:
 4. Comparison with original ranking
 5. Batch processing
 """
+import asyncio
+import contextlib
+import io
 import sys
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -20,6 +24,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 try:
     from services.biencoder_reranker import (
         BiEncoderReranker,
+        DiskEmbeddingCache,
         get_recommended_config,
         SENTENCE_TRANSFORMERS_AVAILABLE,
         FAISS_AVAILABLE
@@ -56,34 +61,88 @@ SAMPLE_DOCUMENTS = [
 ]
 
 
-def demo_basic_reranking():
+# Loaded, indexed rerankers by (model, batch_size, dtype, backend, nprobe):
+# demos asking for the same settings share one instance per run
+_RERANKERS: Dict[tuple, BiEncoderReranker] = {}
+
+
+def get_reranker(
+    profile: Optional[str] = None,
+    model_name: Optional[str] = None,
+    embedding_cache: Optional[DiskEmbeddingCache] = None
+) -> BiEncoderReranker:
+    """
+    Shared reranker indexed over SAMPLE_DOCUMENTS
+    
+    Settings come from the profile config, or the library defaults when
+    profile is None; only identical settings share an instance.
+    """
+    config = get_recommended_config(profile) if profile else {}
+    settings = (
+        model_name or config.get('model_name', "sentence-transformers/all-MiniLM-L6-v2"),
+        config.get('batch_size', 32),
+        config.get('dtype'),
+        config.get('backend', 'torch'),
+        config.get('nprobe', 32)
+    )
+    
+    reranker = _RERANKERS.get(settings)
+    if reranker is None:
+        model_name, batch_size, dtype, backend, nprobe = settings
+        reranker = BiEncoderReranker(
+            model_name=model_name,
+            batch_size=batch_size,
+            dtype=dtype,
+            backend=backend,
+            nprobe=nprobe,
+            embedding_cache=embedding_cache
+        )
+        print(f"\n📦 Indexing {len(SAMPLE_DOCUMENTS)} documents...")
+        reranker.build_index(SAMPLE_DOCUMENTS)
+        _RERANKERS[settings] = reranker
+    return reranker
+
+
+# DEMO_VERBOSE=0 silences the demo sections (e.g. when timing them)
+DEMO_VERBOSE = os.environ.get("DEMO_VERBOSE", "1") == "1"
+
+
+def run_section(demo, *args):
+    """Run one demo with its output buffered and written in a single call"""
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            return demo(*args)
+    finally:
+        if DEMO_VERBOSE:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+
+async def gather_reranks(reranker, requests):
+    """Run rerank requests concurrently so their queries share one encode batch"""
+    return await asyncio.gather(*(reranker.arerank(**request) for request in requests))
+
+
+def demo_basic_reranking(reranker: BiEncoderReranker):
     """Demo 1: Basic re-ranking with ranking visualization"""
     print("\n" + "="*80)
     print("🎯 DEMO 1: Basic Bi-Encoder Re-Ranking")
     print("="*80)
 
-    # Initialize reranker with recommended config
+    # Thresholds from the recommended config the shared reranker was built with
     config = get_recommended_config("fast")
     print(f"\nUsing configuration: {config['description']}")
 
-    reranker = BiEncoderReranker(
-        model_name=config['model_name'],
-        batch_size=config['batch_size']
-    )
-
-    # Build index
-    print(f"\n📦 Indexing {len(SAMPLE_DOCUMENTS)} documents...")
-    reranker.build_index(SAMPLE_DOCUMENTS)
-
-    # Query 1: Machine Learning
+    # Query 1: Machine Learning, Query 2: Databases (encoded in one batch)
     query1 = "How does machine learning work?"
-    print(f"\n🔍 Query: \"{query1}\"")
+    query2 = "What are the best databases for caching?"
+    results1, results2 = asyncio.run(gather_reranks(reranker, [
+        {'query': query1, 'top_k': config['top_k'], 'score_threshold': config['score_threshold']},
+        {'query': query2, 'top_k': 10, 'score_threshold': 0.65}
+    ]))
 
-    results1 = reranker.rerank(
-        query=query1,
-        top_k=config['top_k'],
-        score_threshold=config['score_threshold']
-    )
+    print(f"\n🔍 Query: \"{query1}\"")
 
     # Print detailed ranking
     reranker.print_ranking(
@@ -93,16 +152,7 @@ def demo_basic_reranking():
         max_doc_length=80
     )
 
-    # Query 2: Databases
-    query2 = "What are the best databases for caching?"
     print(f"\n🔍 Query: \"{query2}\"")
-
-    results2 = reranker.rerank(
-        query=query2,
-        top_k=10,
-        score_threshold=0.65
-    )
-
     reranker.print_ranking(
         query=query2,
         results=results2,
@@ -110,35 +160,32 @@ def demo_basic_reranking():
     )
 
 
-def demo_ranking_comparison():
+def demo_ranking_comparison(reranker: BiEncoderReranker):
     """Demo 2: Compare original vs reranked results"""
     print("\n" + "="*80)
     print("🔄 DEMO 2: Ranking Comparison (Original vs Reranked)")
     print("="*80)
 
-    reranker = BiEncoderReranker()
-    reranker.build_index(SAMPLE_DOCUMENTS)
-
     query = "vector similarity search"
-
-    # Simulate original ranking (simple keyword match)
-    original_ranking = []
-    query_words = set(query.lower().split())
-    for i, doc in enumerate(SAMPLE_DOCUMENTS):
-        doc_words = set(doc.lower().split())
-        score = len(query_words & doc_words) / len(query_words)  # Simple overlap
-        original_ranking.append({
-            'index': i,
-            'document': doc,
-            'score': score
-        })
-
-    original_ranking.sort(key=lambda x: x['score'], reverse=True)
+    show_top_n = 10
+
+    # Simulate original ranking (simple keyword overlap, one matrix product).
+    # Scores stay a flat array; dicts are built only for the displayed rows
+    keyword_scores = reranker.keyword_scores(query)
+    order = np.argsort(-keyword_scores, kind='stable')[:show_top_n]
+    original_ranking = [
+        {
+            'index': int(i),
+            'document': SAMPLE_DOCUMENTS[i],
+            'score': float(keyword_scores[i])
+        }
+        for i in order
+    ]
 
     # Bi-encoder reranking
     reranked_results = reranker.rerank(
         query=query,
-        top_k=10,
+        top_k=show_top_n,
         score_threshold=0.60
     )
 
@@ -147,24 +194,16 @@ def demo_ranking_comparison():
         query=query,
         original_ranking=original_ranking,
         reranked_results=reranked_results,
-        show_top_n=10
+        show_top_n=show_top_n
     )
 
 
-def demo_batch_processing():
+def demo_batch_processing(reranker: BiEncoderReranker):
     """Demo 3: Batch processing multiple queries"""
     print("\n" + "="*80)
     print("📊 DEMO 3: Batch Processing Multiple Queries")
     print("="*80)
 
-    config = get_recommended_config("balanced")
-    reranker = BiEncoderReranker(
-        model_name=config['model_name'],
-        batch_size=config['batch_size']
-    )
-
-    reranker.build_index(SAMPLE_DOCUMENTS)
-
     # Multiple queries
     queries = [
         "machine learning algorithms",
@@ -190,34 +229,33 @@ def demo_batch_processing():
             print(f"   {r['rank']}. [Score: {r['score']:.4f}] {r['document'][:70]}...")
 
 
-def demo_threshold_filtering():
+def demo_threshold_filtering(reranker: BiEncoderReranker):
     """Demo 4: Score threshold filtering"""
     print("\n" + "="*80)
     print("🎚️ DEMO 4: Score Threshold Filtering")
     print("="*80)
 
-    reranker = BiEncoderReranker()
-    reranker.build_index(SAMPLE_DOCUMENTS)
-
     query = "semantic search with embeddings"
+    # The threshold is a post-filter, so one encode + one search serve every
+    # threshold (scores are cosine: unit vectors, inner-product index)
+    candidates = reranker.rerank_embedding(
+        reranker.encode_query(query),
+        top_k=50
+    )
 
     # Try different thresholds
     thresholds = [0.60, 0.70, 0.80]
 
     for threshold in thresholds:
         print(f"\n📊 Threshold: {threshold}")
-        results = reranker.rerank(
-            query=query,
-            top_k=50,
-            score_threshold=threshold
-        )
+        results = [r for r in candidates if r['score'] >= threshold]
         print(f"   Results above threshold: {len(results)}")
         if results:
             print(f"   Highest score: {results[0]['score']:.4f}")
             print(f"   Lowest score: {results[-1]['score']:.4f}")
 
 
-def demo_model_comparison():
+def demo_model_comparison(embedding_cache: Optional[DiskEmbeddingCache] = None):
     """Demo 5: Compare different models"""
     print("\n" + "="*80)
     print("⚖️ DEMO 5: Model Comparison")
@@ -234,8 +272,9 @@ def demo_model_comparison():
         print(f"\n🤖 Testing: {model_name} ({model_id})")
 
         try:
-            reranker = BiEncoderReranker(model_name=model_id, batch_size=32)
-            reranker.build_index(SAMPLE_DOCUMENTS[:10])  # Use subset for speed
+            # Same library-default settings for every model, so only the
+            # model differs (reuses instances loaded by earlier demos)
+            reranker = get_reranker(model_name=model_id, embedding_cache=embedding_cache)
 
             results = reranker.rerank(
                 query=query,
@@ -287,15 +326,20 @@ def main():
 
     try:
         # Run demos
-        demo_basic_reranking()
-        demo_ranking_comparison()
-        demo_batch_processing()
-        demo_threshold_filtering()
+        # Shared across demos: each (model, document) pair is embedded only once
+        embedding_cache = DiskEmbeddingCache()
+
+        # Load and index each configuration once; the demos share the instances
+        default = get_reranker(embedding_cache=embedding_cache)
+        run_section(demo_basic_reranking, get_reranker("fast", embedding_cache=embedding_cache))
+        run_section(demo_ranking_comparison, default)
+        run_section(demo_batch_processing, get_reranker("balanced", embedding_cache=embedding_cache))
+        run_section(demo_threshold_filtering, default)
 
         # Optional: Model comparison (slower)
         response = input("\n🤔 Run model comparison demo? (slower) [y/N]: ")
         if response.lower() == 'y':
-            demo_model_comparison()
+            run_section(demo_model_comparison, embedding_cache)
 
     except KeyboardInterrupt:
         print("\n\n👋 Demo interrupted by user")
@@ -7,10 +7,13 @@ Demonstrates all 10 metadata filtering techniques in action
 Run: python3 demo_metadata_filtering.py
 """
 
+import contextlib
+import io
 import sys
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -23,11 +26,28 @@ from src.services.metadata_filter import (
     FilterOperator,
     LogicalOperator
 )
+from src.services.statistical_filter import top_percentile_mask, above_mean_mask
 from src.services.unified_hybrid_search import UnifiedHybridSearch
 from src.repositories.knowledge_repository import KnowledgeRepository
 from src.services.embedding_service import EmbeddingService
 
 
+# DEMO_VERBOSE=0 silences the demo sections (e.g. when timing them)
+DEMO_VERBOSE = os.environ.get("DEMO_VERBOSE", "1") == "1"
+
+
+def run_section(demo, *args):
+    """Run one demo with its output buffered and written in a single call"""
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            return demo(*args)
+    finally:
+        if DEMO_VERBOSE:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+
 def print_section(title: str):
     """Print a formatted section header"""
     print(f"\n{'='*80}")
@@ -116,6 +136,14 @@ def demo_3_multi_value_filtering():
     filter_none = MetadataFilter("tags", FilterOperator.NONE_OF, ["deprecated"])
     print(f"\n  Filter NONE_OF: tags contains none of ['deprecated']")
     
+    # Long ANY_OF lists are split so each overlap stays a GIN probe
+    many_tags = [f"topic-{i}" for i in range(45)]
+    where, params = MetadataFilterEngine().to_sql_where(
+        MetadataFilter("tags", FilterOperator.ANY_OF, many_tags)
+    )
+    print(f"\n  Filter ANY_OF with {len(many_tags)} tags")
+    print(f"  SQL: {where}  ({len(params)} arrays of <= 20 tags)")
+    
     print("\n  ✓ Array operators use GIN indexes for fast membership tests")
 
 
@@ -187,8 +215,13 @@ def demo_6_pattern_matching():
     filter_regex = MetadataFilter("content", FilterOperator.REGEX, r"\b(python|java|rust)\b")
     print("  REGEX: content matches pattern for programming languages")
     
+    where, params = MetadataFilterEngine().to_sql_where(filter_regex)
+    print(f"    SQL: {where}  {params}")
+    
     print("\n  ✓ Pattern matching uses PostgreSQL's text search capabilities")
-    print("  ✓ REGEX uses ~ operator, LIKE for wildcards")
+    print("  ✓ REGEX uses ~ (~* case-insensitive), LIKE/ILIKE for wildcards")
+    print("  ✓ pg_trgm GIN indexes serve both, so no sequential scan")
+    print("  ✓ Python \\b word boundaries are sent as PostgreSQL \\y")
 
 
 def demo_7_geospatial_filtering():
@@ -250,9 +283,15 @@ def demo_9_statistical_filtering():
     print("    1. SELECT percentile_cont(0.9) WITHIN GROUP (ORDER BY importance_score)")
     print("    2. WHERE importance_score >= threshold")
     
+    # Same thing in memory, e.g. over a cached result set: one O(N) selection
+    scores = np.array([0.95, 0.42, 0.88, 0.61, 0.73, 0.30, 0.99, 0.55, 0.67, 0.81])
+    top_mask = top_percentile_mask(scores, 0.9)
+    print(f"    In memory: top_percentile_mask(scores, 0.9) -> {scores[top_mask].tolist()}")
+    
     # Standard deviation filtering
     print("\n  Filter: Items with above-average importance")
     print("  Implementation: importance_score > AVG(importance_score)")
+    print(f"    In memory: above_mean_mask(scores) -> {int(above_mean_mask(scores).sum())} of {len(scores)}")
     
     # Composite statistical
     print("\n  Combined: Top 20% importance AND above median recency")
@@ -348,6 +387,12 @@ def demo_real_world_examples():
     print("    - metadata.confidential != true")
     print("    - importance_score > 0.5")
     print("  Combined with semantic search for relevance ranking")
+    
+    print("\n\nRunning all four together")
+    print("-" * 60)
+    print("  Use: repo.find_by_metadata_many([filter1, filter2, filter3, filter4], user_id=...)")
+    print("  One UNION ALL query: one round-trip instead of four,")
+    print("  results come back as one list per filter")
 
 
 def demo_performance_tips():
@@ -371,7 +416,7 @@ def demo_performance_tips():
          "CREATE INDEX ON table(jsonb_field->>'key') for frequent queries"),
         
         ("6. Combine filters efficiently",
-         "Put most restrictive filters first in AND conditions"),
+         "MetadataFilterEngine.optimize() orders AND conditions most restrictive first"),
         
         ("7. Use metadata stats",
          "Monitor filter selectivity and adjust indexes"),
@@ -455,6 +500,14 @@ results = hybrid_search.hybrid_search_with_filters(
     limit=10
 )
 
+# Selective filters: score only the rows that pass them
+ranked = hybrid_search.prefilter_then_rerank(
+    query="urgent api changes",
+    user_id="user_001",
+    filters=main_filter,
+    top_k=10
+)
+
 # 6. Repository-level filtering (no semantic search)
 from src.repositories.knowledge_repository import KnowledgeRepository
 
@@ -465,6 +518,13 @@ items = repo.find_by_metadata(
     limit=50
 )
 
+# Several filters in one round-trip (one result list per filter)
+recent_items, engineering_items = repo.find_by_metadata_many(
+    [FilterBuilder.recent("created_at", days=7),
+     FilterBuilder.equals("metadata.department", "engineering")],
+    user_id="user_001"
+)
+
 # 7. Get statistics for filtered data
 stats = repo.get_filtered_stats(
     user_id="user_001",
@@ -486,25 +546,25 @@ def main():
     print("  for the Interactive Memory System.\n")
     
     # Run all demos
-    demo_1_exact_match_filtering()
-    demo_2_range_filtering()
-    demo_3_multi_value_filtering()
-    demo_4_hierarchical_filtering()
-    demo_5_composite_filtering()
-    demo_6_pattern_matching()
-    demo_7_geospatial_filtering()
-    demo_8_time_based_filtering()
-    demo_9_statistical_filtering()
-    demo_10_tag_hierarchy_filtering()
+    run_section(demo_1_exact_match_filtering)
+    run_section(demo_2_range_filtering)
+    run_section(demo_3_multi_value_filtering)
+    run_section(demo_4_hierarchical_filtering)
+    run_section(demo_5_composite_filtering)
+    run_section(demo_6_pattern_matching)
+    run_section(demo_7_geospatial_filtering)
+    run_section(demo_8_time_based_filtering)
+    run_section(demo_9_statistical_filtering)
+    run_section(demo_10_tag_hierarchy_filtering)
     
     # Real-world examples
-    demo_real_world_examples()
+    run_section(demo_real_world_examples)
     
     # Performance tips
-    demo_performance_tips()
+    run_section(demo_performance_tips)
     
     # API usage
-    demo_api_usage()
+    run_section(demo_api_usage)
     
     # Summary
     print_section("SUMMARY")
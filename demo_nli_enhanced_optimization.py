@@ -2,6 +2,8 @@
 Enhanced Context Optimization with NLI and Unified SLM
 Demonstration script showing advanced features
 """
+import os
+
 from src.services.nli_contradiction_detector import (
     NLIContradictionDetector,
     UnifiedSemanticProcessor,
@@ -9,21 +11,19 @@ from src.services.nli_contradiction_detector import (
     print_model_comparison,
     SENTENCE_BERT_ALTERNATIVES
 )
+from src.services.redis_common_client import get_redis
+
+# Embedding runtime for the unified processor: torch, onnx or openvino
+# (non-torch backends load their INT8 export when the model ships one)
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "torch")
 
 
-def demo_nli_contradiction_detection():
+def demo_nli_contradiction_detection(detector: NLIContradictionDetector):
     """Demonstrate NLI-based contradiction detection"""
     print("\n" + "="*90)
     print("DEMO: NLI-BASED CONTRADICTION DETECTION")
     print("="*90 + "\n")
     
-    # Initialize NLI detector
-    detector = NLIContradictionDetector(
-        nli_model="cross-encoder/nli-deberta-v3-small",
-        contradiction_threshold=0.5,
-        use_bidirectional=True
-    )
-    
     # Test cases
     test_cases = [
         {
@@ -70,18 +70,12 @@ def demo_nli_contradiction_detection():
         print()
 
 
-def demo_unified_slm():
+def demo_unified_slm(processor: UnifiedSemanticProcessor):
     """Demonstrate unified SLM for dedup and ranking"""
     print("\n" + "="*90)
     print("DEMO: UNIFIED SEMANTIC PROCESSOR")
     print("="*90 + "\n")
     
-    # Initialize unified processor
-    processor = UnifiedSemanticProcessor(
-        model_name="sentence-transformers/all-mpnet-base-v2",
-        batch_size=32
-    )
-    
     # Sample contexts
     contexts = [
         {"content": "Machine learning is a subset of artificial intelligence.", "source": "doc1"},
@@ -116,18 +110,15 @@ def demo_unified_slm():
     print()
 
 
-def demo_batch_contradiction_detection():
+def demo_batch_contradiction_detection(
+    detector: NLIContradictionDetector,
+    processor: UnifiedSemanticProcessor
+):
     """Demonstrate batch contradiction detection across multiple contexts"""
     print("\n" + "="*90)
     print("DEMO: BATCH CONTRADICTION DETECTION")
     print("="*90 + "\n")
     
-    # Initialize detector
-    detector = NLIContradictionDetector(
-        nli_model="cross-encoder/nli-deberta-v3-small",
-        contradiction_threshold=0.5
-    )
-    
     # Sample contexts with contradictions
     contexts = [
         {"content": "The database server is running normally."},
@@ -137,8 +128,13 @@ def demo_batch_contradiction_detection():
         {"content": "Users cannot log in due to authentication failure."}  # Contradicts #4
     ]
     
-    # Detect contradictions
-    contexts_with_flags = detector.detect_contradictions_batch(contexts)
+    # Detect contradictions; the bi-encoder gate skips unrelated pairs
+    embeddings = processor.compute_embeddings([ctx['content'] for ctx in contexts])
+    contexts_with_flags = detector.detect_contradictions_batch(
+        contexts,
+        candidate_embeddings=embeddings,
+        gate_threshold=0.35
+    )
     
     # Display results
     print("Results:")
@@ -286,10 +282,28 @@ if __name__ == "__main__":
     print("="*90)
     
     try:
+        # One reduced-precision NLI model, loaded once, serves both contradiction demos
+        detector = NLIContradictionDetector(
+            nli_model="cross-encoder/nli-deberta-v3-small",
+            contradiction_threshold=0.5,
+            use_bidirectional=True,
+            quantize=True,  # CPU: INT8 weights
+            dtype="auto",   # GPU: BF16 (FP16 before Ampere)
+            redis_client=get_redis()  # NLI scores survive demo reruns
+        )
+        
+        # Unified bi-encoder: dedup + ranking, and the NLI candidate-pair gate
+        processor = UnifiedSemanticProcessor(
+            model_name="sentence-transformers/all-mpnet-base-v2",
+            batch_size=32,
+            backend=EMBED_BACKEND,
+            quantize=EMBED_BACKEND != "torch"
+        )
+        
         # Run all demos
-        demo_nli_contradiction_detection()
-        demo_unified_slm()
-        demo_batch_contradiction_detection()
+        demo_nli_contradiction_detection(detector)
+        demo_unified_slm(processor)
+        demo_batch_contradiction_detection(detector, processor)
         demo_model_comparison()
         demo_integration_with_context_optimizer()
         demo_performance_comparison()
@@ -62,9 +62,10 @@ def demo():
         ("explain transformers", "chat")
     ]
     
-    for query, input_type in inputs:
-        search.cache_user_input(user_id=user_id, query=query, input_type=input_type)
-        print(f"   ✅ Cached: {query} (type: {input_type})")
+    # One batched embedding call and one Redis round-trip for all inputs
+    if search.cache_user_inputs_bulk(user_id=user_id, items=inputs):
+        for query, input_type in inputs:
+            print(f"   ✅ Cached: {query} (type: {input_type})")
     
     # Step 3: Hybrid search on Redis cache
     print("\n🔍 Step 3: Hybrid Search on Redis Cache (No DB queries!)")
@@ -76,7 +77,10 @@ def demo():
         ("neural networks", "context")
     ]
     
-    for query, search_type in queries:
+    # Embed every search query in one batched pass up front
+    query_embeddings = search.embed_queries([query for query, _ in queries])
+    
+    for (query, search_type), query_embedding in zip(queries, query_embeddings):
         print(f"\n{'─'*70}")
         print(f"Query: '{query}' | Type: {search_type}")
         print(f"{'─'*70}")
@@ -85,7 +89,8 @@ def demo():
             query=query,
             user_id=user_id,
             search_type=search_type,
-            limit=3
+            limit=3,
+            query_embedding=query_embedding
         )
         
         if results['results']:
@@ -121,9 +126,15 @@ def demo():
     print("\n🔑 Redis Keys Structure:")
     if search.redis_client:
         print(f"   user_context:{user_id}        → Unified context (1 key)")
-        input_keys = search.redis_client.keys(f"user_input:{user_id}:*")
+        # One incremental SCAN for both key families (KEYS blocks the server)
+        input_keys, queries_key = [], []
+        for key in search.redis_client.scan_iter(match=f"user_*:{user_id}*", count=500):
+            key = key.decode() if isinstance(key, bytes) else key
+            if key.startswith(f"user_input:{user_id}:"):
+                input_keys.append(key)
+            elif key == f"user_queries:{user_id}":
+                queries_key.append(key)
         print(f"   user_input:{user_id}:*      → {len(input_keys)} input keys")
-        queries_key = search.redis_client.keys(f"user_queries:{user_id}")
         print(f"   user_queries:{user_id}        → Query list ({len(queries_key)} key)")
         
         total_keys = 1 + len(input_keys) + len(queries_key)
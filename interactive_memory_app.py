@@ -10,10 +10,13 @@ Enhanced Interactive Memory System
 - Multi-line input support (Shift+Enter for new line, Enter to submit)
 """
 import os
+import re
 import sys
+import time
 import hashlib
 import json
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 import numpy as np
 import redis
@@ -55,23 +58,237 @@ try:
 except (ImportError, ModuleNotFoundError):
     BIENCODER_AVAILABLE = False
 
+# pgvector adapter: embeddings are sent as vector literals instead of ARRAY[...]
+try:
+    from pgvector import HalfVector
+    from pgvector.psycopg2 import register_vector
+    PGVECTOR_AVAILABLE = True
+except ImportError:
+    PGVECTOR_AVAILABLE = False
+
+# Numba JIT for the hash-embedding arithmetic (optional; numpy fallback below)
+try:
+    from numba import njit, types as nb_types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# uint64 modulus: an int64 literal would promote the uint64 words to float64
+# and drop their low bits before the modulo
+_HASH_MODULUS = np.uint64(2000000)
+
+
+def _hash_embedding_numpy(words):
+    """Map SHAKE-128 words to a unit vector in [-1, 1) (numpy reference)"""
+    out = (words % _HASH_MODULUS) / 1000000.0 - 1.0
+    out /= np.linalg.norm(out) or 1.0
+    return out
+
+
+if NUMBA_AVAILABLE:
+    @njit(nb_types.float64[::1](nb_types.Array(nb_types.uint64, 1, 'C', readonly=True)), cache=True)
+    def _hash_embedding_kernel(words):
+        """Map SHAKE-128 words to a unit vector in [-1, 1) without Python objects"""
+        out = np.empty(words.shape[0], dtype=np.float64)
+        norm = 0.0
+        for i in range(words.shape[0]):
+            value = (words[i] % _HASH_MODULUS) / 1000000.0 - 1.0
+            out[i] = value
+            norm += value * value
+        norm = np.sqrt(norm)
+        if norm > 0.0:
+            for i in range(out.shape[0]):
+                out[i] /= norm
+        return out
+else:
+    _hash_embedding_kernel = _hash_embedding_numpy
+
 load_dotenv()
 
+# Shared TCP keep-alive settings (read after load_dotenv for .env overrides)
+from config.database import KEEPALIVE_KWARGS  # type: ignore
+
+# Hash-embedding dimensionality; must match the embedding column size
+# (vector/halfvec(1536) in unified_schema.sql)
+EMBED_DIM = int(os.getenv('EMBED_DIM', '1536'))
+
 try:
-    from groq import Groq
+    import httpx
+    from groq import Groq, DefaultHttpxClient
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
 
 
+# Keyword classifiers, compiled once. Plain substring alternations keep the
+# previous `any(kw in text.lower() ...)` semantics in a single C-level scan.
+PERSONA_KEYWORDS_RE = re.compile(
+    r"my name is|i am|i work as|i like|my interest|i'm a|call me|i specialize",
+    re.IGNORECASE
+)
+HR_KEYWORDS_RE = re.compile(r"policy|rule|procedure|hr", re.IGNORECASE)
+MANAGEMENT_KEYWORDS_RE = re.compile(r"manage|team|lead", re.IGNORECASE)
+
+# is_question: the first whitespace-delimited word must be one of these
+QUESTION_START_RE = re.compile(
+    r"\s*(?:what|who|where|when|why|how|which|whose|whom|can|could|would|should|"
+    r"is|are|do|does|did|will|shall|has|have|had)(?:\s|$)",
+    re.IGNORECASE
+)
+REQUEST_START_RE = re.compile(
+    r"\s*(?:give|tell|explain|describe|show|list|find|search|get|fetch|provide|"
+    r"summarize|outline|detail|elaborate|clarify|define)(?:\s|$)",
+    re.IGNORECASE
+)
+QUIT_COMMANDS = frozenset({'quit'})
+
+# All database layers of hybrid_search in one UNION ALL round trip. Every
+# branch projects the same column set (NULL-padded); HYBRID_SEARCH_FIELDS
+# says which columns belong to each layer. Episodes ship only a short preview
+# of the first message, never the full messages JSONB.
+# Messages layer on its own: a new chat message only invalidates this layer
+# of the search cache, which hybrid_search then refills with this query
+HYBRID_SEARCH_MESSAGES_SQL = """
+    (SELECT 'EPISODIC-MESSAGES' AS source_layer, 'super_chat_messages' AS table_name,
+            scm.id, scm.content, NULL AS category, scm.created_at,
+            NULL::varchar AS name, NULL::text[] AS interests, NULL::text[] AS expertise_areas,
+            scm.role, NULL::text AS messages_preview,
+            NULL::integer AS message_count, NULL::varchar AS source_type
+     FROM super_chat_messages scm
+     JOIN super_chat sc ON scm.super_chat_id = sc.id
+     WHERE sc.user_id = $1 AND scm.content ILIKE $2
+     ORDER BY scm.created_at DESC
+     LIMIT $3)
+"""
+
+HYBRID_SEARCH_SQL = """
+    (SELECT 'SEMANTIC-KNOWLEDGE' AS source_layer, 'knowledge_base' AS table_name,
+            id, content, category, created_at,
+            NULL::varchar AS name, NULL::text[] AS interests, NULL::text[] AS expertise_areas,
+            NULL::varchar AS role, NULL::text AS messages_preview,
+            NULL::integer AS message_count, NULL::varchar AS source_type
+     FROM knowledge_base
+     WHERE user_id = $1 AND content ILIKE $2
+     ORDER BY created_at DESC
+     LIMIT $3)
+    UNION ALL
+    (SELECT 'SEMANTIC-PERSONA', 'user_persona',
+            id, NULL, NULL, NULL,
+            name, interests, expertise_areas,
+            NULL, NULL, NULL, NULL
+     FROM user_persona
+     WHERE user_id = $1)
+    UNION ALL
+    (SELECT 'EPISODIC-MESSAGES', 'super_chat_messages',
+            scm.id, scm.content, NULL, scm.created_at,
+            NULL, NULL, NULL,
+            scm.role, NULL, NULL, NULL
+     FROM super_chat_messages scm
+     JOIN super_chat sc ON scm.super_chat_id = sc.id
+     WHERE sc.user_id = $1 AND scm.content ILIKE $2
+     ORDER BY scm.created_at DESC
+     LIMIT $3)
+    UNION ALL
+    (SELECT 'EPISODIC-EPISODES', 'episodes',
+            id, NULL, NULL, created_at,
+            NULL, NULL, NULL,
+            NULL, left(messages->0->>'content', 100), message_count, source_type
+     FROM episodes
+     WHERE user_id = $1 AND messages::text ILIKE $2
+     ORDER BY created_at DESC
+     LIMIT $3)
+"""
+
+# Hot queries prepared server-side once per connection (see prepare_statements)
+# so each call only binds parameters instead of re-parsing and re-planning
+PREPARED_STATEMENTS = {
+    'hybrid_search_layers': ('text, text, integer', HYBRID_SEARCH_SQL),
+    'hybrid_search_messages': ('text, text, integer', HYBRID_SEARCH_MESSAGES_SQL),
+    'user_persona_context': ('text', """
+        SELECT name, raw_content, interests, expertise_areas 
+        FROM user_persona 
+        WHERE user_id = $1
+    """),
+    # Persona + latest stored knowledge for chat context in one round trip
+    # (persona columns are NULL when the user has no persona row)
+    'user_chat_context': ('text', """
+        SELECT p.user_id IS NOT NULL AS has_persona,
+               p.name, p.raw_content, p.interests, p.expertise_areas,
+               COALESCE((SELECT json_agg(k.content ORDER BY k.created_at DESC)
+                         FROM (SELECT content, created_at
+                               FROM knowledge_base
+                               WHERE user_id = $1
+                               ORDER BY created_at DESC
+                               LIMIT 20) k), '[]') AS recent_knowledge
+        FROM (SELECT $1::text AS user_id) u
+        LEFT JOIN user_persona p ON p.user_id = u.user_id
+    """),
+    # Write path: every chat turn stores two messages, every fact one row
+    'store_chat_message': ('integer, text, text', """
+        INSERT INTO super_chat_messages (super_chat_id, role, content)
+        VALUES ($1, $2, $3)
+        RETURNING created_at
+    """),
+    # knowledge_base row and its semantic_memory_index entry in one statement
+    'store_knowledge': ('text, text, text, halfvec', """
+        WITH kb AS (
+            INSERT INTO knowledge_base (user_id, content, category, tags, embedding)
+            VALUES ($1, $2, $3, '{}', $4)
+            RETURNING id, user_id
+        )
+        INSERT INTO semantic_memory_index (user_id, knowledge_id)
+        SELECT user_id, id FROM kb
+        RETURNING knowledge_id AS id
+    """),
+}
+
+
+
+@lru_cache(maxsize=None)
+def _unprepared_sql(name: str) -> str:
+    """A PREPARED_STATEMENTS entry as plain SQL with typed %(pN)s placeholders"""
+    arg_types, sql = PREPARED_STATEMENTS[name]
+    types = [t.strip() for t in arg_types.split(',')]
+    return re.sub(
+        r'\$(\d+)',
+        lambda m: f"%(p{m.group(1)})s::{types[int(m.group(1)) - 1]}",
+        sql.replace('%', '%%')
+    )
+
+
+HYBRID_SEARCH_FIELDS = {
+    'SEMANTIC-KNOWLEDGE': ('source_layer', 'table_name', 'id', 'content', 'category', 'created_at'),
+    'SEMANTIC-PERSONA': ('source_layer', 'table_name', 'id', 'name', 'interests', 'expertise_areas'),
+    'EPISODIC-MESSAGES': ('source_layer', 'table_name', 'id', 'role', 'content', 'created_at'),
+    'EPISODIC-EPISODES': ('source_layer', 'table_name', 'id', 'messages_preview', 'message_count', 'source_type', 'created_at'),
+}
+
+
 class InteractiveMemorySystem:
     """Enhanced memory system with layer visibility, Redis cache, and context optimization"""
     
+    # Semantic response cache: cosine threshold and max cached replies
+    RESPONSE_CACHE_THRESHOLD = 0.95
+    RESPONSE_CACHE_SIZE = 512
+    
+    # Semantic search cache: DB layer results of recent hybrid searches
+    SEARCH_CACHE_THRESHOLD = 0.95
+    SEARCH_CACHE_SIZE = 256
+    
     def __init__(self, optimization_profile="balanced", enable_optimization=True):
         self.conn = None
+        self.vector_adapter = False
+        # Statements PREPAREd on this connection; the rest run unprepared
+        self.prepared_statements = set()
         self.user_id = "default_user"
         self.groq_client = None
         self.current_chat_id = None
+        # In-memory semantic cache of LLM replies (query embeddings + responses)
+        self._response_cache_embs = np.empty((0, EMBED_DIM), dtype=np.float32)
+        self._response_cache_vals: List[str] = []
+        # In-memory semantic cache of DB search results ((limit, layers) per query)
+        self._search_cache_embs = np.empty((0, EMBED_DIM), dtype=np.float32)
+        self._search_cache_vals: List[tuple] = []
         # Redis connection for temporary memory cache
         self.redis_client = None
         # Context optimization - enabled if available
@@ -91,11 +308,11 @@ class InteractiveMemorySystem:
                     self.embedding_func = embedding_func
                 
                 def get_embedding(self, text: str):
-                    return np.array(self.embedding_func(text))
+                    return self.embedding_func(text)
             
             self.context_optimizer = ContextOptimizer(
                 **opt_config,
-                embedding_service=EmbeddingServiceWrapper(self.generate_embedding)
+                embedding_service=EmbeddingServiceWrapper(self.embedding_array)
             )
             self.summarization_optimizer = SummarizationOptimizer(
                 compression_ratio=summarization_ratio
@@ -110,7 +327,10 @@ class InteractiveMemorySystem:
                 biencoder_config = get_recommended_config("fast")
                 self.biencoder = BiEncoderReranker(
                     model_name=biencoder_config['model_name'],
-                    batch_size=biencoder_config['batch_size']
+                    batch_size=biencoder_config['batch_size'],
+                    dtype=biencoder_config.get('dtype'),
+                    backend=biencoder_config.get('backend', 'torch'),
+                    nprobe=biencoder_config.get('nprobe', 32)
                 )
                 self.biencoder_enabled = True
             except Exception as e:
@@ -152,13 +372,54 @@ class InteractiveMemorySystem:
                 database=os.getenv('DB_NAME', 'semantic_memory'),
                 user=os.getenv('DB_USER', 'postgres'),
                 password=os.getenv('DB_PASSWORD', '2191'),
-                cursor_factory=RealDictCursor
+                cursor_factory=RealDictCursor,
+                # Keep the long-lived interactive session's socket alive
+                **KEEPALIVE_KWARGS
             )
             print("✓ Connected to database")
+            self.prepare_statements()
+            self.register_vector_types()
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
             sys.exit(1)
     
+    def prepare_statements(self):
+        """PREPARE the hot search and write queries once for this connection"""
+        cur = self.conn.cursor()
+        for name, (arg_types, sql) in PREPARED_STATEMENTS.items():
+            try:
+                cur.execute(f"PREPARE {name} ({arg_types}) AS {sql}")
+                self.conn.commit()
+                self.prepared_statements.add(name)
+            except psycopg2.Error as e:
+                # Schema/extension mismatch: only this query is affected, and
+                # it runs unprepared (surfacing the error when it is used)
+                self.conn.rollback()
+                print(f"⚠️  Statement {name} not prepared ({str(e).strip()})")
+        cur.close()
+    
+    def execute_prepared(self, cur, name: str, params: tuple):
+        """EXECUTE a prepared statement, or run its SQL directly if PREPARE failed"""
+        if name in self.prepared_statements:
+            placeholders = ", ".join(["%s"] * len(params))
+            cur.execute(f"EXECUTE {name} ({placeholders})", params)
+        else:
+            cur.execute(
+                _unprepared_sql(name),
+                {f"p{i}": value for i, value in enumerate(params, 1)}
+            )
+    
+    def register_vector_types(self):
+        """Let psycopg2 bind numpy embeddings as pgvector values"""
+        if not PGVECTOR_AVAILABLE:
+            return
+        try:
+            register_vector(self.conn)
+            self.vector_adapter = True
+        except psycopg2.ProgrammingError as e:
+            print(f"⚠️  pgvector adapter not registered ({e})")
+        self.conn.commit()
+    
     def connect_redis(self):
         """Connect to Redis for temporary memory cache (Unified Redis Cloud)"""
         try:
@@ -194,7 +455,14 @@ class InteractiveMemorySystem:
         
         api_key = os.getenv('GROQ_API_KEY')
         if api_key:
-            self.groq_client = Groq(api_key=api_key)
+            # Keep the TLS connection warm between chat turns; httpx's default
+            # 5s keep-alive expiry forces a new handshake on almost every turn
+            self.groq_client = Groq(
+                api_key=api_key,
+                http_client=DefaultHttpxClient(
+                    limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=300)
+                )
+            )
             print("✓ Groq API connected")
             if BIENCODER_AVAILABLE and self.biencoder_enabled:
                 print("   📊 Bi-Encoder Re-Ranking: Enabled (Fast semantic search)")
@@ -234,35 +502,38 @@ class InteractiveMemorySystem:
             return
         
         cur = self.conn.cursor()
+        # Postgres renders each cache entry as JSON text (timestamps in ISO
+        # format), oldest first, so rows go straight into Redis unconverted
         cur.execute("""
-            SELECT scm.role, scm.content, scm.created_at
-            FROM super_chat_messages scm
-            JOIN super_chat sc ON scm.super_chat_id = sc.id
-            WHERE sc.user_id = %s
-              AND scm.role = 'user'
-            ORDER BY scm.created_at DESC
-            LIMIT 15
+            SELECT json_build_object(
+                       'role', m.role,
+                       'content', m.content,
+                       'content_lower', lower(m.content),
+                       'created_at', m.created_at,
+                       'source', 'TEMP_MEMORY'
+                   )::text AS msg_data
+            FROM (SELECT scm.role, scm.content, scm.created_at
+                  FROM super_chat_messages scm
+                  JOIN super_chat sc ON scm.super_chat_id = sc.id
+                  WHERE sc.user_id = %s
+                    AND scm.role = 'user'
+                  ORDER BY scm.created_at DESC
+                  LIMIT 15) m
+            ORDER BY m.created_at
         """, (self.user_id,))
         
-        messages = cur.fetchall()
+        messages = [row['msg_data'] for row in cur.fetchall()]
         cur.close()
         
-        # Clear existing cache for this user
+        # Replace this user's cache in one Redis round trip
         cache_key = self.get_redis_key("messages")
-        self.redis_client.delete(cache_key)
-        
-        # Add to Redis list (LPUSH for most recent first, then reverse)
-        for msg in reversed(messages):
-            msg_data = json.dumps({
-                'role': msg['role'],
-                'content': msg['content'],
-                'created_at': msg['created_at'].isoformat(),
-                'source': 'TEMP_MEMORY'
-            })
-            self.redis_client.rpush(cache_key, msg_data)
-        
+        pipe = self.redis_client.pipeline()
+        pipe.delete(cache_key)
+        if messages:
+            pipe.rpush(cache_key, *messages)
         # Set TTL to 24 hours (optional)
-        self.redis_client.expire(cache_key, 86400)
+        pipe.expire(cache_key, 86400)
+        pipe.execute()
     
     def get_temp_memory(self) -> List[Dict]:
         """Retrieve temporary memory from Redis"""
@@ -289,80 +560,140 @@ class InteractiveMemorySystem:
         return result['name'] if result and result['name'] else self.user_id
     
     def get_entry_counts(self):
-        """Get total entry counts for current user"""
+        """Get total entry counts (and persona name) for current user in one query"""
         cur = self.conn.cursor()
-        
-        # Knowledge count
-        cur.execute("SELECT COUNT(*) as count FROM knowledge_base WHERE user_id = %s", (self.user_id,))
-        kb_count = cur.fetchone()['count']
-        
-        # Persona count
-        cur.execute("SELECT COUNT(*) as count FROM user_persona WHERE user_id = %s", (self.user_id,))
-        persona_count = cur.fetchone()['count']
-        
-        # Messages count
         cur.execute("""
-            SELECT COUNT(*) as count 
-            FROM super_chat_messages scm
-            JOIN super_chat sc ON scm.super_chat_id = sc.id
-            WHERE sc.user_id = %s
-        """, (self.user_id,))
-        msg_count = cur.fetchone()['count']
-        
-        # Episodes count
-        cur.execute("SELECT COUNT(*) as count FROM episodes WHERE user_id = %s", (self.user_id,))
-        ep_count = cur.fetchone()['count']
-        
+            SELECT
+                (SELECT name FROM user_persona WHERE user_id = %(user_id)s LIMIT 1) AS name,
+                (SELECT COUNT(*) FROM knowledge_base WHERE user_id = %(user_id)s) AS knowledge,
+                (SELECT COUNT(*) FROM user_persona WHERE user_id = %(user_id)s) AS persona,
+                (SELECT COUNT(*)
+                 FROM super_chat_messages scm
+                 JOIN super_chat sc ON scm.super_chat_id = sc.id
+                 WHERE sc.user_id = %(user_id)s) AS messages,
+                (SELECT COUNT(*) FROM episodes WHERE user_id = %(user_id)s) AS episodes,
+                (SELECT COUNT(*) FROM instances WHERE user_id = %(user_id)s) AS instances
+        """, {'user_id': self.user_id})
+        counts = dict(cur.fetchone())
         cur.close()
         
-        return {
-            'knowledge': kb_count,
-            'persona': persona_count,
-            'messages': msg_count,
-            'episodes': ep_count,
-            'total': kb_count + persona_count + msg_count + ep_count
-        }
+        counts['total'] = counts['knowledge'] + counts['persona'] + counts['messages'] + counts['episodes']
+        return counts
+    
+    def generate_embedding(self, text: str, dimensions: int = EMBED_DIM) -> List[float]:
+        """Generate deterministic embedding as a list of floats"""
+        return self._cached_embedding(text, dimensions).tolist()
+    
+    def embedding_param(self, text: str, dimensions: int = EMBED_DIM):
+        """Embedding as a halfvec parameter: FP16 HalfVector when the pgvector adapter is registered"""
+        if self.vector_adapter:
+            return HalfVector(self._cached_embedding(text, dimensions))
+        return self.generate_embedding(text, dimensions)
+    
+    def embedding_array(self, text: str, dimensions: int = EMBED_DIM) -> np.ndarray:
+        """Generate deterministic embedding as a read-only numpy array"""
+        return self._cached_embedding(text, dimensions)
+    
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _cached_embedding(text: str, dimensions: int) -> np.ndarray:
+        """Hash-based embedding; the cached array is frozen so callers can't mutate it"""
+        # One SHAKE-128 expansion yields 8 bytes per dimension (same scheme
+        # as GroqEmbeddingProvider and the populate scripts)
+        raw = hashlib.shake_128(text.encode('utf-8')).digest(dimensions * 8)
+        words = np.frombuffer(raw, dtype='>u8').astype(np.uint64)
+        words.flags.writeable = False
+        embedding = _hash_embedding_kernel(words)
+        embedding.flags.writeable = False
+        return embedding
+    
+    def get_cached_response(self, query: str) -> Optional[str]:
+        """Return a cached LLM reply for a near-duplicate query, if any"""
+        if not self._response_cache_vals:
+            return None
+        
+        query_vec = self.embedding_array(query).astype(np.float32)
+        sims = self._response_cache_embs @ query_vec
+        best = int(np.argmax(sims))
+        if sims[best] >= self.RESPONSE_CACHE_THRESHOLD:
+            print(f"   ⚡ Response cache HIT: similarity={sims[best]:.3f}")
+            return self._response_cache_vals[best]
+        return None
+    
+    def cache_response(self, query: str, reply: str):
+        """Remember an LLM reply keyed by the query embedding"""
+        query_vec = self.embedding_array(query).astype(np.float32)
+        self._response_cache_embs = np.vstack([self._response_cache_embs, query_vec])[-self.RESPONSE_CACHE_SIZE:]
+        self._response_cache_vals = (self._response_cache_vals + [reply])[-self.RESPONSE_CACHE_SIZE:]
+    
+    def clear_response_cache(self):
+        """Drop cached replies and search results (memory changed or user switched)"""
+        self.clear_reply_cache()
+        self.clear_search_cache()
+    
+    def clear_reply_cache(self):
+        """Drop cached LLM replies (the chat history they were built from changed)"""
+        self._response_cache_embs = np.empty((0, EMBED_DIM), dtype=np.float32)
+        self._response_cache_vals = []
     
-    def generate_embedding(self, text: str, dimensions: int = 1536) -> List[float]:
-        """Generate deterministic embedding"""
-        import numpy as np
-        embedding = []
-        for i in range(dimensions):
-            seed = text.encode('utf-8') + i.to_bytes(4, 'big')
-            hash_val = hashlib.sha256(seed).digest()
-            value = int.from_bytes(hash_val[:4], 'big') / (2**32)
-            value = (value * 2) - 1
-            embedding.append(value)
-        
-        norm = np.linalg.norm(embedding)
-        return [float(v / norm) for v in embedding]
+    def get_cached_search(self, query: str, limit: int) -> Optional[Dict[str, List]]:
+        """
+        Return cached DB layer results for a near-duplicate query, if any
+        
+        Layers invalidated since the entry was cached are missing from the
+        result; rows are copies, so callers can't mutate the cache.
+        """
+        if not self._search_cache_vals:
+            return None
+        
+        query_vec = self.embedding_array(query).astype(np.float32)
+        sims = self._search_cache_embs @ query_vec
+        best = int(np.argmax(sims))
+        cached_limit, layers = self._search_cache_vals[best]
+        if sims[best] >= self.SEARCH_CACHE_THRESHOLD and cached_limit == limit:
+            print(f"   ⚡ Search cache HIT: similarity={sims[best]:.3f}")
+            return {layer: [dict(row) for row in rows] for layer, rows in layers.items()}
+        return None
+    
+    def cache_search(self, query: str, limit: int, layers: Dict[str, List]):
+        """Remember DB layer results keyed by the query embedding"""
+        query_vec = self.embedding_array(query).astype(np.float32)
+        layers = {layer: [dict(row) for row in rows] for layer, rows in layers.items()}
+        if self._search_cache_vals:
+            sims = self._search_cache_embs @ query_vec
+            best = int(np.argmax(sims))
+            if sims[best] >= self.SEARCH_CACHE_THRESHOLD and self._search_cache_vals[best][0] == limit:
+                # Near-duplicate query (e.g. a refilled layer): replace in place
+                self._search_cache_vals[best] = (limit, layers)
+                return
+        self._search_cache_embs = np.vstack([self._search_cache_embs, query_vec])[-self.SEARCH_CACHE_SIZE:]
+        self._search_cache_vals = (self._search_cache_vals + [(limit, layers)])[-self.SEARCH_CACHE_SIZE:]
+    
+    def clear_search_cache(self):
+        """Drop cached search results (a searched table changed)"""
+        self._search_cache_embs = np.empty((0, EMBED_DIM), dtype=np.float32)
+        self._search_cache_vals = []
+    
+    def invalidate_search_layer(self, layer: str):
+        """Drop one layer from every cached search (only its table changed)"""
+        self._search_cache_vals = [
+            (limit, {name: rows for name, rows in layers.items() if name != layer})
+            for limit, layers in self._search_cache_vals
+        ]
     
     def is_question(self, text: str) -> bool:
         """Detect if input is a question or query (not a long text paragraph)"""
-        text_lower = text.lower().strip()
-        
         # If text is very long (>100 words), it's likely informational content, not a question
-        word_count = len(text_lower.split())
+        word_count = len(text.split())
         if word_count > 100:
             return False  # Long text = storage, not query
         
-        # Question words
-        question_words = ['what', 'who', 'where', 'when', 'why', 'how', 'which', 'whose', 
-                         'whom', 'can', 'could', 'would', 'should', 'is', 'are', 'do', 
-                         'does', 'did', 'will', 'shall', 'has', 'have', 'had']
-        
-        # Imperative request words (commands that expect answers)
-        request_words = ['give', 'tell', 'explain', 'describe', 'show', 'list', 'find',
-                        'search', 'get', 'fetch', 'provide', 'summarize', 'outline',
-                        'detail', 'elaborate', 'clarify', 'define']
-        
         # Check if starts with question word
-        first_word = text_lower.split()[0] if text_lower.split() else ""
-        if first_word in question_words:
+        if QUESTION_START_RE.match(text):
             return True
         
-        # Check if starts with request word (but only for short text)
-        if first_word in request_words and word_count <= 20:
+        # Check if starts with imperative request word (but only for short text)
+        if word_count <= 20 and REQUEST_START_RE.match(text):
             return True
         
         # Check if ends with question mark
@@ -377,14 +708,8 @@ class InteractiveMemorySystem:
     
     def classify_and_store(self, text: str) -> Dict[str, Any]:
         """Classify and store with clear layer indication"""
-        # Simple classification
-        text_lower = text.lower()
-        
-        # Check if it's persona information
-        persona_keywords = ['my name is', 'i am', 'i work as', 'i like', 'my interest', 
-                           'i\'m a', 'call me', 'i specialize']
-        
-        if any(kw in text_lower for kw in persona_keywords):
+        # Simple classification: one pass of a precompiled keyword alternation
+        if PERSONA_KEYWORDS_RE.search(text):
             return self.store_persona_info(text)
         else:
             return self.store_knowledge(text)
@@ -429,7 +754,7 @@ class InteractiveMemorySystem:
         elif 'i am' in text.lower() and len(text.split()) < 10:
             name = text.lower().split('i am')[1].strip().split()[0].title()
         
-        embedding = self.generate_embedding(optimized_text)
+        embedding = self.embedding_param(optimized_text)
         
         # 1. Store in user_persona table
         cur.execute("SELECT id FROM user_persona WHERE user_id = %s", (self.user_id,))
@@ -481,6 +806,7 @@ class InteractiveMemorySystem:
         
         self.conn.commit()
         cur.close()
+        self.clear_response_cache()
         
         # 3. Store in episodic memory (use OPTIMIZED text)
         self.add_chat_message("user", optimized_text)
@@ -529,11 +855,9 @@ class InteractiveMemorySystem:
         
         # Determine category
         print(f"\n🏷️  Step 2: CATEGORIZING CONTENT")
-        # Determine category
-        print(f"\n🏷️  Step 2: CATEGORIZING CONTENT")
-        if any(kw in content.lower() for kw in ['policy', 'rule', 'procedure', 'hr']):
+        if HR_KEYWORDS_RE.search(content):
             category = "HR Policies"
-        elif any(kw in content.lower() for kw in ['manage', 'team', 'lead']):
+        elif MANAGEMENT_KEYWORDS_RE.search(content):
             category = "Management"
         else:
             category = "Knowledge"
@@ -541,29 +865,22 @@ class InteractiveMemorySystem:
         print(f"   └─ Category: {category}")
         
         print(f"\n📊 Step 3: GENERATING EMBEDDING")
-        embedding = self.generate_embedding(optimized_content)
-        print(f"   └─ Embedding: {len(embedding)} dimensions")
+        embedding = self.embedding_param(optimized_content)
+        print(f"   └─ Embedding: {len(self.embedding_array(optimized_content))} dimensions")
         
         print(f"\n💾 Step 4: STORING TO DATABASE")
-        cur.execute("""
-            INSERT INTO knowledge_base 
-            (user_id, content, category, tags, embedding)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """, (self.user_id, optimized_content, category, [], embedding))
+        self.execute_prepared(
+            cur, 'store_knowledge',
+            (self.user_id, optimized_content, category, embedding)
+        )
         
         kb_id = cur.fetchone()['id']
         print(f"   ├─ Stored in knowledge_base (ID: {kb_id})")
         
-        # Create index
-        cur.execute("""
-            INSERT INTO semantic_memory_index (user_id, knowledge_id)
-            VALUES (%s, %s)
-        """, (self.user_id, kb_id))
-        
         self.conn.commit()
         print(f"   └─ Index created in semantic_memory_index")
         cur.close()
+        self.clear_response_cache()
         
         # Also store in episodic
         print(f"\n📅 Step 5: STORING TO EPISODIC LAYER")
@@ -588,16 +905,18 @@ class InteractiveMemorySystem:
     def add_chat_message(self, role: str, content: str):
         """Add message to episodic memory and Redis temporary cache (user messages only)"""
         cur = self.conn.cursor()
-        cur.execute("""
-            INSERT INTO super_chat_messages 
-            (super_chat_id, role, content)
-            VALUES (%s, %s, %s)
-            RETURNING created_at
-        """, (self.current_chat_id, role, content))
+        self.execute_prepared(
+            cur, 'store_chat_message',
+            (self.current_chat_id, role, content)
+        )
         
         created_at = cur.fetchone()['created_at']
         self.conn.commit()
         cur.close()
+        # New message is searchable in super_chat_messages and part of the
+        # history every later reply is built from
+        self.invalidate_search_layer('EPISODIC-MESSAGES')
+        self.clear_reply_cache()
         
         # Add to Redis temporary memory cache - USER MESSAGES ONLY (OPTIMIZED content)
         if self.redis_client and role == 'user':
@@ -614,6 +933,7 @@ class InteractiveMemorySystem:
             msg_data = json.dumps({
                 'role': role,
                 'content': content,  # This is now optimized content
+                'content_lower': content.lower(),  # Lowercased once for keyword search
                 'created_at': created_at.isoformat(),
                 'source': 'TEMP_MEMORY',
                 'optimized': True  # Flag to indicate this is optimized
@@ -778,7 +1098,7 @@ class InteractiveMemorySystem:
         print(f"{'='*70}\n")
         
         # 1. Search REDIS TEMPORARY MEMORY FIRST (fastest, most recent)
-        print("⚡ STEP 1/5: Searching TEMPORARY MEMORY (Redis Cache)...")
+        print("⚡ STEP 1/2: Searching TEMPORARY MEMORY (Redis Cache)...")
         print(f"   ├─ Storage: Redis Unified Cloud")
         print(f"   ├─ Key: temp_memory:{self.user_id}:messages")
         print(f"   └─ Strategy: Keyword matching (case-insensitive)\n")
@@ -793,7 +1113,8 @@ class InteractiveMemorySystem:
             
             temp_messages = self.get_temp_memory()
             for msg in temp_messages:
-                if query_lower in msg['content'].lower():
+                # content_lower is stored at insert time; older entries fall back
+                if query_lower in (msg.get('content_lower') or msg['content'].lower()):
                     temp_results.append({
                         'source_layer': 'TEMP_MEMORY',
                         'table_name': 'redis_cache',
@@ -806,101 +1127,38 @@ class InteractiveMemorySystem:
             print(f"   ⚠️  Redis not available - skipping temp memory\n")
         
         
-        # 2. Search Semantic Memory - Knowledge Base (text search)
-        print("📚 STEP 2/5: Searching SEMANTIC MEMORY → knowledge_base...")
-        print(f"   ├─ Table: knowledge_base")
-        print(f"   ├─ Strategy: ILIKE text search on content")
-        print(f"   ├─ Filter: user_id = {self.user_id}")
-        print(f"   └─ Query Pattern: %{query}%\n")
-        cur.execute("""
-            SELECT 
-                'SEMANTIC-KNOWLEDGE' as source_layer,
-                'knowledge_base' as table_name,
-                id,
-                content,
-                category,
-                created_at
-            FROM knowledge_base
-            WHERE user_id = %s 
-              AND content ILIKE %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (self.user_id, f'%{query}%', limit))
-        
-        semantic_knowledge = cur.fetchall()
-        print(f"   ✓ Found {len(semantic_knowledge)} results in knowledge_base\n")
-        
-        # 3. Search Semantic Memory - User Persona (text search)
-        print("📚 STEP 3/5: Searching SEMANTIC MEMORY → user_persona...")
-        print(f"   ├─ Table: user_persona")
-        print(f"   ├─ Strategy: Fetch all persona data for user")
-        print(f"   ├─ Filter: user_id = {self.user_id}")
-        print(f"   └─ Fields: name, interests, expertise_areas\n")
-        cur.execute("""
-            SELECT 
-                'SEMANTIC-PERSONA' as source_layer,
-                'user_persona' as table_name,
-                id,
-                name,
-                interests,
-                expertise_areas
-            FROM user_persona
-            WHERE user_id = %s
-        """, (self.user_id,))
-        
-        semantic_persona = cur.fetchall()
-        print(f"   ✓ Found {len(semantic_persona)} persona record(s)\n")
-        
-        # 4. Search Episodic Memory - Recent Messages (text search)
-        print("📅 STEP 4/5: Searching EPISODIC MEMORY → super_chat_messages...")
-        print(f"   ├─ Table: super_chat_messages (JOIN super_chat)")
-        print(f"   ├─ Strategy: ILIKE text search on content")
-        print(f"   ├─ Filter: user_id = {self.user_id}")
-        print(f"   ├─ Query Pattern: %{query}%")
-        print(f"   └─ Order: created_at DESC\n")
-        cur.execute("""
-            SELECT 
-                'EPISODIC-MESSAGES' as source_layer,
-                'super_chat_messages' as table_name,
-                scm.id,
-                scm.role,
-                scm.content,
-                scm.created_at
-            FROM super_chat_messages scm
-            JOIN super_chat sc ON scm.super_chat_id = sc.id
-            WHERE sc.user_id = %s
-              AND scm.content ILIKE %s
-            ORDER BY scm.created_at DESC
-            LIMIT %s
-        """, (self.user_id, f'%{query}%', limit))
-        
-        episodic_messages = cur.fetchall()
-        print(f"   ✓ Found {len(episodic_messages)} message(s) in episodic memory\n")
-        
-        # 5. Search Episodic Memory - Episodes (text search in messages JSON)
-        print("📅 STEP 5/5: Searching EPISODIC MEMORY → episodes...")
-        print(f"   ├─ Table: episodes")
-        print(f"   ├─ Strategy: ILIKE text search on messages JSON")
+        # 2-5. Search Semantic + Episodic layers in a single round trip
+        print("📚 STEP 2/2: Searching SEMANTIC + EPISODIC MEMORY (one UNION ALL query)...")
+        print(f"   ├─ knowledge_base: ILIKE text search on content")
+        print(f"   ├─ user_persona: all persona data for user")
+        print(f"   ├─ super_chat_messages (JOIN super_chat): ILIKE text search on content")
+        print(f"   ├─ episodes: ILIKE text search on messages::text")
         print(f"   ├─ Filter: user_id = {self.user_id}")
-        print(f"   ├─ Query Pattern: %{query}% (in messages::text)")
-        print(f"   └─ Order: created_at DESC\n")
-        cur.execute("""
-            SELECT 
-                'EPISODIC-EPISODES' as source_layer,
-                'episodes' as table_name,
-                id,
-                messages,
-                message_count,
-                source_type,
-                created_at
-            FROM episodes
-            WHERE user_id = %s
-              AND messages::text ILIKE %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """, (self.user_id, f'%{query}%', limit))
-        
-        episodic_episodes = cur.fetchall()
+        print(f"   └─ Query Pattern: %{query}%, Order: created_at DESC\n")
+        layers = self.get_cached_search(query, limit)
+        pattern = f'%{query}%'
+        if layers is None:
+            self.execute_prepared(cur, 'hybrid_search_layers', (self.user_id, pattern, limit))
+            
+            layers = {layer: [] for layer in HYBRID_SEARCH_FIELDS}
+            for row in cur.fetchall():
+                fields = HYBRID_SEARCH_FIELDS[row['source_layer']]
+                layers[row['source_layer']].append({f: row[f] for f in fields})
+            self.cache_search(query, limit, layers)
+        elif 'EPISODIC-MESSAGES' not in layers:
+            # Chat messages were added since this entry was cached
+            self.execute_prepared(cur, 'hybrid_search_messages', (self.user_id, pattern, limit))
+            fields = HYBRID_SEARCH_FIELDS['EPISODIC-MESSAGES']
+            layers['EPISODIC-MESSAGES'] = [{f: row[f] for f in fields} for row in cur.fetchall()]
+            self.cache_search(query, limit, layers)
+        
+        semantic_knowledge = layers['SEMANTIC-KNOWLEDGE']
+        semantic_persona = layers['SEMANTIC-PERSONA']
+        episodic_messages = layers['EPISODIC-MESSAGES']
+        episodic_episodes = layers['EPISODIC-EPISODES']
+        print(f"   ✓ Found {len(semantic_knowledge)} results in knowledge_base")
+        print(f"   ✓ Found {len(semantic_persona)} persona record(s)")
+        print(f"   ✓ Found {len(episodic_messages)} message(s) in episodic memory")
         print(f"   ✓ Found {len(episodic_episodes)} episode(s)\n")
         
         cur.close()
@@ -917,10 +1175,10 @@ class InteractiveMemorySystem:
         
         return {
             "temp_memory": temp_results,  # Most recent, fastest access
-            "semantic_knowledge": [dict(r) for r in semantic_knowledge],
-            "semantic_persona": [dict(r) for r in semantic_persona],
-            "episodic_messages": [dict(r) for r in episodic_messages],
-            "episodic_episodes": [dict(r) for r in episodic_episodes]
+            "semantic_knowledge": semantic_knowledge,
+            "semantic_persona": semantic_persona,
+            "episodic_messages": episodic_messages,
+            "episodic_episodes": episodic_episodes
         }
     
     def display_search_results(self, results: Dict[str, List]):
@@ -1005,8 +1263,7 @@ class InteractiveMemorySystem:
                 print(f"   [{i}] 📖 Episode ID: {item['id']}")
                 print(f"       ├─ Message Count: {item['message_count']}")
                 print(f"       ├─ Source Type: {item['source_type']}")
-                messages = json.loads(item['messages']) if isinstance(item['messages'], str) else item['messages']
-                first_msg = messages[0]['content'][:100] if messages else 'No messages'
+                first_msg = item['messages_preview'] or 'No messages'
                 print(f"       ├─ Messages Preview: {first_msg}...")
                 print(f"       ├─ User ID: {self.user_id}")
                 print(f"       ├─ Created: {item['created_at']}")
@@ -1087,7 +1344,7 @@ class InteractiveMemorySystem:
                 if not user_input:
                     continue
                 
-                if user_input.lower() == "quit":
+                if user_input.lower() in QUIT_COMMANDS:
                     print("\n👋 Goodbye!\n")
                     break
                 
@@ -1119,6 +1376,7 @@ class InteractiveMemorySystem:
                 elif user_input.startswith("user "):
                     self.user_id = user_input[5:].strip()
                     self.ensure_super_chat()
+                    self.clear_response_cache()
                     # Reload Redis temporary memory for new user
                     self.load_recent_to_temp_memory()
                     
@@ -1161,34 +1419,13 @@ class InteractiveMemorySystem:
     
     def show_compact_status(self):
         """Show compact user status with name"""
-        cur = self.conn.cursor()
-        
-        # Get user name
-        cur.execute("SELECT name FROM user_persona WHERE user_id = %s", (self.user_id,))
-        result = cur.fetchone()
-        user_name = result['name'] if result and result['name'] else self.user_id
-        
-        # Get all counts
-        cur.execute("SELECT COUNT(*) as count FROM knowledge_base WHERE user_id = %s", (self.user_id,))
-        kb_count = cur.fetchone()['count']
-        
-        cur.execute("SELECT COUNT(*) as count FROM user_persona WHERE user_id = %s", (self.user_id,))
-        persona_count = cur.fetchone()['count']
-        
-        cur.execute("""
-            SELECT COUNT(*) as count 
-            FROM super_chat_messages scm
-            JOIN super_chat sc ON scm.super_chat_id = sc.id
-            WHERE sc.user_id = %s
-        """, (self.user_id,))
-        msg_count = cur.fetchone()['count']
-        
-        cur.execute("SELECT COUNT(*) as count FROM episodes WHERE user_id = %s", (self.user_id,))
-        ep_count = cur.fetchone()['count']
-        
-        cur.close()
-        
-        total_entries = kb_count + persona_count + msg_count + ep_count
+        counts = self.get_entry_counts()
+        user_name = counts['name'] or self.user_id
+        kb_count = counts['knowledge']
+        persona_count = counts['persona']
+        msg_count = counts['messages']
+        ep_count = counts['episodes']
+        total_entries = counts['total']
         
         print(f"👤 CURRENT USER: {user_name} ({self.user_id}) | 💬 Chat: {self.current_chat_id}")
         print(f"📊 Entries: {total_entries} total (Knowledge: {kb_count} | Persona: {persona_count} | Messages: {msg_count} | Episodes: {ep_count})\n")
@@ -1233,18 +1470,22 @@ class InteractiveMemorySystem:
         
         temp_messages = self.get_temp_memory()
         
-        print(f"\n{'='*70}")
-        print(f"  REDIS TEMPORARY CACHE - {self.user_id}")
-        print(f"{'='*70}")
-        print(f"Storage: Redis Unified Cloud")
-        print(f"Cache Key: temp_memory:{self.user_id}:messages")
-        print(f"TTL: 24 hours")
-        print(f"Max Size: Last 15 user messages")
-        print(f"Current Count: {len(temp_messages)}")
-        print(f"{'='*70}\n")
+        # Build the whole report and write it once instead of one print per line
+        lines = [
+            f"\n{'='*70}",
+            f"  REDIS TEMPORARY CACHE - {self.user_id}",
+            f"{'='*70}",
+            f"Storage: Redis Unified Cloud",
+            f"Cache Key: temp_memory:{self.user_id}:messages",
+            f"TTL: 24 hours",
+            f"Max Size: Last 15 user messages",
+            f"Current Count: {len(temp_messages)}",
+            f"{'='*70}\n",
+        ]
         
         if not temp_messages:
-            print("📭 Cache is empty\n")
+            lines.append("📭 Cache is empty\n")
+            sys.stdout.write("\n".join(lines) + "\n")
             return
         
         for i, msg in enumerate(temp_messages, 1):
@@ -1252,60 +1493,45 @@ class InteractiveMemorySystem:
             is_optimized = msg.get('optimized', False)
             opt_flag = " [OPTIMIZED]" if is_optimized else ""
             
-            print(f"[{i}] 💾 {timestamp}{opt_flag}")
-            print(f"    Role: {msg['role']}")
-            print(f"    Content: {msg['content']}")
-            print(f"    Source: {msg.get('source', 'N/A')}")
-            print(f"    Length: {len(msg['content'])} chars (~{len(msg['content']) // 4} tokens)")
-            print()
-        
-        print(f"{'='*70}\n")
+            lines.extend([
+                f"[{i}] 💾 {timestamp}{opt_flag}",
+                f"    Role: {msg['role']}",
+                f"    Content: {msg['content']}",
+                f"    Source: {msg.get('source', 'N/A')}",
+                f"    Length: {len(msg['content'])} chars (~{len(msg['content']) // 4} tokens)",
+                "",
+            ])
+        
+        lines.append(f"{'='*70}\n")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def show_status(self):
         """Show detailed memory statistics"""
-        cur = self.conn.cursor()
-        
-        # Semantic layer
-        cur.execute("SELECT COUNT(*) as count FROM knowledge_base WHERE user_id = %s", (self.user_id,))
-        kb_count = cur.fetchone()['count']
-        
-        cur.execute("SELECT COUNT(*) as count FROM user_persona WHERE user_id = %s", (self.user_id,))
-        persona_count = cur.fetchone()['count']
-        
-        # Episodic layer
-        cur.execute("""
-            SELECT COUNT(*) as count 
-            FROM super_chat_messages scm
-            JOIN super_chat sc ON scm.super_chat_id = sc.id
-            WHERE sc.user_id = %s
-        """, (self.user_id,))
-        msg_count = cur.fetchone()['count']
-        
-        cur.execute("SELECT COUNT(*) as count FROM episodes WHERE user_id = %s", (self.user_id,))
-        ep_count = cur.fetchone()['count']
-        
-        # Instances
-        cur.execute("SELECT COUNT(*) as count FROM instances WHERE user_id = %s", (self.user_id,))
-        inst_count = cur.fetchone()['count']
-        
-        cur.close()
+        counts = self.get_entry_counts()
+        kb_count = counts['knowledge']
+        persona_count = counts['persona']
+        msg_count = counts['messages']
+        ep_count = counts['episodes']
+        inst_count = counts['instances']
         
         total_entries = kb_count + persona_count + msg_count + ep_count + inst_count
         
-        print(f"\n{'='*70}")
-        print(f"  MEMORY STATUS")
-        print(f"{'='*70}")
-        print(f"\n👤 USER ID: {self.user_id}")
-        print(f"💬 Chat Session: {self.current_chat_id}")
-        print(f"📊 TOTAL ENTRIES: {total_entries}")
-        print(f"\n📚 SEMANTIC LAYER:")
-        print(f"   knowledge_base:  {kb_count} entries")
-        print(f"   user_persona:    {persona_count} records")
-        print(f"\n📅 EPISODIC LAYER:")
-        print(f"   chat_messages:   {msg_count} messages")
-        print(f"   episodes:        {ep_count} episodes")
-        print(f"   instances:       {inst_count} instances")
-        print(f"\n{'='*70}\n")
+        sys.stdout.write("\n".join([
+            f"\n{'='*70}",
+            f"  MEMORY STATUS",
+            f"{'='*70}",
+            f"\n👤 USER ID: {self.user_id}",
+            f"💬 Chat Session: {self.current_chat_id}",
+            f"📊 TOTAL ENTRIES: {total_entries}",
+            f"\n📚 SEMANTIC LAYER:",
+            f"   knowledge_base:  {kb_count} entries",
+            f"   user_persona:    {persona_count} records",
+            f"\n📅 EPISODIC LAYER:",
+            f"   chat_messages:   {msg_count} messages",
+            f"   episodes:        {ep_count} episodes",
+            f"   instances:       {inst_count} instances",
+            f"\n{'='*70}\n",
+        ]) + "\n")
     
     def show_conversation_history(self, limit: int = 50):
         """Show recent conversation history with timestamps"""
@@ -1327,28 +1553,29 @@ class InteractiveMemorySystem:
             print("\n📭 No conversation history found.\n")
             return
         
-        print(f"\n{'='*70}")
-        print(f"  CONVERSATION HISTORY - Last {len(messages)} messages")
-        print(f"{'='*70}\n")
+        lines = [
+            f"\n{'='*70}",
+            f"  CONVERSATION HISTORY - Last {len(messages)} messages",
+            f"{'='*70}\n",
+        ]
         
         # Reverse to show oldest first
         for msg in reversed(messages):
             timestamp = msg['created_at'].strftime('%b %d, %Y %I:%M:%S %p')
             role_icon = "👤" if msg['role'] == "user" else "🤖"
-            print(f"{role_icon} [{timestamp}] {msg['role'].upper()}:")
-            print(f"   {msg['content']}")
-            print()
-        
-        print(f"{'='*70}\n")
+            lines.extend([
+                f"{role_icon} [{timestamp}] {msg['role'].upper()}:",
+                f"   {msg['content']}",
+                "",
+            ])
+        
+        lines.append(f"{'='*70}\n")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def chat_with_context(self, message: str):
         """Chat with full context retrieval and intelligent response"""
         print(f"\n💭 Processing your question...")
         
-        # Store user message in episodic
-        self.add_chat_message("user", message)
-        print(f"   ✓ Question stored in EPISODIC → super_chat_messages")
-        
         # Check if asking about specific time/conversation
         import re
         from datetime import datetime, timedelta
@@ -1410,6 +1637,24 @@ class InteractiveMemorySystem:
                         print(f"   ⚠️  Date parsing error for pattern {pattern_type}: {e}")
                         continue
         
+        # Time-scoped questions depend on the clock, so only cache the rest.
+        # Look up before storing the question: any new chat message clears
+        # the cached replies, so a hit means the history is unchanged
+        cacheable = not (time_match or target_date or 'today' in message.lower())
+        cached_reply = None
+        if cacheable and self.groq_client:
+            cached_reply = self.get_cached_response(message)
+        
+        # Store user message in episodic
+        self.add_chat_message("user", message)
+        print(f"   ✓ Question stored in EPISODIC → super_chat_messages")
+        
+        if cached_reply:
+            self.add_chat_message("assistant", cached_reply)
+            print(f"\n🤖 {cached_reply}")
+            print(f"\n   ✓ Response stored in EPISODIC → super_chat_messages\n")
+            return
+        
         # Get context via hybrid search
         print(f"\n{'='*70}")
         print(f"📊 STEP 1: HYBRID SEARCH & RETRIEVAL")
@@ -1436,12 +1681,10 @@ class InteractiveMemorySystem:
         # Get user persona
         print(f"👤 Adding USER PERSONA")
         cur = self.conn.cursor()
-        cur.execute("""
-            SELECT name, raw_content, interests, expertise_areas 
-            FROM user_persona 
-            WHERE user_id = %s
-        """, (self.user_id,))
-        persona = cur.fetchone()
+        # Persona and the latest stored knowledge arrive together
+        self.execute_prepared(cur, 'user_chat_context', (self.user_id,))
+        user_context = cur.fetchone()
+        persona = user_context if user_context['has_persona'] else None
         
         if persona:
             context_parts.append(f"\nUSER INFO: {persona['name']} - {persona['raw_content']}")
@@ -1460,19 +1703,12 @@ class InteractiveMemorySystem:
         # IMPORTANT: Also retrieve ALL knowledge base entries for this user (not just search results)
         # This ensures stored facts like "favorite color" are always available
         print(f"📚 Adding ALL STORED KNOWLEDGE (fallback for non-matched queries)")
-        cur.execute("""
-            SELECT content, category, created_at
-            FROM knowledge_base
-            WHERE user_id = %s
-            ORDER BY created_at DESC
-            LIMIT 20
-        """, (self.user_id,))
-        all_knowledge = cur.fetchall()
+        all_knowledge = user_context['recent_knowledge']
         
         if all_knowledge:
             context_parts.append("\nALL STORED USER KNOWLEDGE:")
-            for item in all_knowledge:
-                context_parts.append(f"- {item['content']}")
+            for content in all_knowledge:
+                context_parts.append(f"- {content}")
             print(f"   ✓ Added {len(all_knowledge)} knowledge entries")
         
         # Add relevant messages WITH TIMESTAMPS (only if not already in temp_memory)
@@ -1514,8 +1750,7 @@ class InteractiveMemorySystem:
         # Adprint(f"📖 Adding EPISODES: {len(results['episodic_episodes'][:2])} episode summaries")
             context_parts.append("\nRELATED EPISODES:")
             for item in results['episodic_episodes'][:2]:
-                messages = json.loads(item['messages']) if isinstance(item['messages'], str) else item['messages']
-                context_parts.append(f"- {len(messages)} messages about work topics")
+                context_parts.append(f"- {item['message_count']} messages about work topics")
         
         cur.close()
         
@@ -1585,8 +1820,9 @@ class InteractiveMemorySystem:
             print(f"   ℹ️  Using assembled context directly (already retrieved from DB/Redis)")
         
         # Generate response
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         response_success = True
+        streamed = False
         
         if self.groq_client:
             # Select best model for chat task
@@ -1607,13 +1843,28 @@ Answer the user's question based on this context. If the information is not avai
                         {"role": "user", "content": message}
                     ],
                     temperature=0.7,
-                    max_tokens=500
+                    max_tokens=500,
+                    stream=True
                 )
-                reply = response.choices[0].message.content
+                
+                # Print tokens as they arrive instead of waiting for the full completion
+                print(f"\n🤖 ", end="", flush=True)
+                reply_parts = []
+                token_count = 0
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        reply_parts.append(chunk.choices[0].delta.content)
+                        print(chunk.choices[0].delta.content, end="", flush=True)
+                    # Groq reports usage on the final chunk
+                    x_groq = getattr(chunk, 'x_groq', None)
+                    if x_groq is not None and getattr(x_groq, 'usage', None):
+                        token_count = x_groq.usage.total_tokens
+                print()
+                reply = "".join(reply_parts)
+                streamed = True
                 
                 # Calculate response metrics
-                latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-                token_count = response.usage.total_tokens if hasattr(response, 'usage') else 0
+                latency_ms = int((time.perf_counter() - start_time) * 1000)
                 
                 # Log performance for RAG-based learning
                 if self.model_selector:
@@ -1634,7 +1885,7 @@ Answer the user's question based on this context. If the information is not avai
                 
                 # Log failure
                 if self.model_selector:
-                    latency_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+                    latency_ms = int((time.perf_counter() - start_time) * 1000)
                     self.model_selector.log_performance(
                         user_id=self.user_id,
                         task_type="chat",
@@ -1651,8 +1902,12 @@ Answer the user's question based on this context. If the information is not avai
         
         # Store AI response in episodic
         self.add_chat_message("assistant", reply)
+        # Cached after the store, which clears replies built on older history
+        if cacheable and streamed and response_success:
+            self.cache_response(message, reply)
         
-        print(f"\n🤖 {reply}")
+        if not streamed:
+            print(f"\n🤖 {reply}")
         print(f"\n   ✓ Response stored in EPISODIC → super_chat_messages\n")
     
     def retrieve_and_respond(self, stored_text: str):
@@ -1676,11 +1931,7 @@ Answer the user's question based on this context. If the information is not avai
             knowledge_results = cur.fetchall()
             
             # Get user persona
-            cur.execute("""
-                SELECT name, raw_content, interests, expertise_areas 
-                FROM user_persona 
-                WHERE user_id = %s
-            """, (self.user_id,))
+            self.execute_prepared(cur, 'user_persona_context', (self.user_id,))
             persona = cur.fetchone()
             
             cur.close()
@@ -1706,24 +1957,22 @@ Answer the user's question based on this context. If the information is not avai
                 
                 # Generate AI response if available
                 if self.groq_client and context_parts:
-                    # Select model for context analysis
-                    model_name, model_reason = select_model_for_task("analysis")
+                    # A 1-2 sentence acknowledgment only needs the fast model
+                    model_name, model_reason = select_model_for_task("acknowledgment")
                     
                     try:
                         full_context = "\n".join(context_parts)
                         response = self.groq_client.chat.completions.create(
                             model=model_name,
                             messages=[
-                                {"role": "system", "content": f"""You are a helpful memory assistant. The user just stored: "{stored_text}"
-
-Based on their memory context, provide a brief, relevant acknowledgment or insight (1-2 sentences).
+                                {"role": "system", "content": f"""Briefly acknowledge what the user stored (1-2 sentences), using their memory context.
 
 MEMORY CONTEXT:
 {full_context}"""},
                                 {"role": "user", "content": f"I just stored: {stored_text}"}
                             ],
                             temperature=0.7,
-                            max_tokens=150
+                            max_tokens=100
                         )
                         reply = response.choices[0].message.content
                         print(f"\n   💡 {reply}")
@@ -14,27 +14,49 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import psycopg2
 import numpy as np
+from numpy.random import default_rng
 from dotenv import load_dotenv
 
+# pgvector adapter: numpy embeddings are sent as vector literals directly
+try:
+    from pgvector.psycopg2 import register_vector
+    PGVECTOR_AVAILABLE = True
+except ImportError:
+    PGVECTOR_AVAILABLE = False
+
 load_dotenv()
 
+# Shared generator for mock embeddings (C-level batched sampling)
+_RNG = default_rng()
+
 def get_conn():
     """Get database connection."""
-    return psycopg2.connect(
+    conn = psycopg2.connect(
         host=os.getenv('DB_HOST', 'localhost'),
         port=os.getenv('DB_PORT', '5435'),
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'postgres'),
         database=os.getenv('DB_NAME', 'bap_memory')
     )
+    if PGVECTOR_AVAILABLE:
+        register_vector(conn)
+    return conn
+
+def generate_embeddings(n, dim=384):
+    """Generate n random unit embedding vectors as one float32 (n, dim) matrix."""
+    vecs = _RNG.standard_normal((n, dim), dtype=np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+def vector_param(vec):
+    """Embedding as a query parameter: the ndarray itself when the pgvector adapter is registered."""
+    return vec if PGVECTOR_AVAILABLE else vec.tolist()
 
 def generate_episode_embedding(messages):
     """Generate a simple embedding for episode (384 dimensions for sentence-transformers)."""
     # In production, use actual embedding model
     # For now, generate random normalized vector
-    vec = np.random.randn(384)
-    vec = vec / np.linalg.norm(vec)
-    return vec.tolist()
+    return vector_param(generate_embeddings(1)[0])
 
 def episodize_super_chat(cur, conn):
     """Episodize super chat messages."""
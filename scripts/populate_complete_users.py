@@ -15,12 +15,16 @@ import hashlib
 import json
 from datetime import datetime, timedelta
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 import numpy as np
 
 load_dotenv()
 
+# Hash-embedding dimensionality; must match the embedding column size
+# (vector/halfvec(1536) in unified_schema.sql)
+EMBED_DIM = int(os.getenv('EMBED_DIM', '1536'))
+
 # Office Users with Names
 USERS = [
     {"user_id": "hr_manager_001", "name": "Sarah Mitchell", "role": "HR Manager", "expertise": ["recruitment", "employee_relations", "policy_development"]},
@@ -107,18 +111,24 @@ CONVERSATION_TEMPLATES = [
     ("Department Head", "Excellent progress on the Q4 initiatives. Keep up the momentum."),
 ]
 
-def generate_embedding(text: str, dimensions: int = 1536) -> list:
+def generate_embedding(text: str, dimensions: int = EMBED_DIM) -> list:
     """Generate deterministic embedding"""
-    embedding = []
-    for i in range(dimensions):
-        seed = text.encode('utf-8') + i.to_bytes(4, 'big')
-        hash_val = hashlib.sha256(seed).digest()
-        value = int.from_bytes(hash_val[:4], 'big') / (2**32)
-        value = (value * 2) - 1
-        embedding.append(value)
-    
-    norm = np.linalg.norm(embedding)
-    return [float(v / norm) for v in embedding]
+    return generate_embeddings([text], dimensions)[0]
+
+def generate_embeddings(texts: list, dimensions: int = EMBED_DIM) -> list:
+    """Generate deterministic embeddings for many texts as one (n, dimensions) matrix"""
+    if not texts:
+        return []
+    
+    # One SHAKE-128 expansion per text yields 8 bytes per dimension (same
+    # scheme as the interactive app, so stored and query embeddings line up);
+    # the arithmetic then runs once over the whole batch
+    raw = b''.join(hashlib.shake_128(text.encode('utf-8')).digest(dimensions * 8) for text in texts)
+    embeddings = (np.frombuffer(raw, dtype='>u8').reshape(len(texts), dimensions) % 2000000) / 1000000.0 - 1.0
+    
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (embeddings / norms).tolist()
 
 def clear_existing_data(conn):
     """Clear all existing data"""
@@ -141,7 +151,6 @@ def clear_existing_data(conn):
         cur.execute(f"DELETE FROM {table}")
         print(f"  ✓ Cleared {table}")
     
-    conn.commit()
     cur.close()
     print("✓ All data cleared\n")
 
@@ -193,7 +202,6 @@ def create_user_persona(conn, user_info):
         VALUES (%s, %s)
     """, (user_info['user_id'], kb_id))
     
-    conn.commit()
     cur.close()
     
     return persona_id, kb_id
@@ -201,7 +209,6 @@ def create_user_persona(conn, user_info):
 def populate_knowledge_for_user(conn, user_info, num_entries=50):
     """Populate knowledge base for a single user"""
     cur = conn.cursor()
-    entries = []
     
     # Distribute entries across categories
     all_topics = []
@@ -212,32 +219,33 @@ def populate_knowledge_for_user(conn, user_info, num_entries=50):
     # Sample topics
     selected_topics = random.sample(all_topics, min(num_entries, len(all_topics)))
     
-    for category, topic in selected_topics:
-        embedding = generate_embedding(topic)
-        
-        cur.execute("""
-            INSERT INTO knowledge_base 
-            (user_id, content, category, tags, embedding)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
+    embeddings = generate_embeddings([topic for _, topic in selected_topics])
+    rows = [
+        (
             user_info['user_id'],
             topic,
             category,
             [category.lower().replace(' ', '_')],
             embedding
-        ))
-        
-        kb_id = cur.fetchone()['id']
-        entries.append(kb_id)
-        
-        # Create semantic memory index
-        cur.execute("""
-            INSERT INTO semantic_memory_index (user_id, knowledge_id)
-            VALUES (%s, %s)
-        """, (user_info['user_id'], kb_id))
+        )
+        for (category, topic), embedding in zip(selected_topics, embeddings)
+    ]
+    
+    # Batch insert: one statement for all entries instead of one per row
+    returned = execute_values(cur, """
+        INSERT INTO knowledge_base 
+        (user_id, content, category, tags, embedding)
+        VALUES %s
+        RETURNING id
+    """, rows, page_size=len(rows) or 1, fetch=True)
+    entries = [row['id'] for row in returned]
+    
+    # Create semantic memory index
+    execute_values(cur, """
+        INSERT INTO semantic_memory_index (user_id, knowledge_id)
+        VALUES %s
+    """, [(user_info['user_id'], kb_id) for kb_id in entries])
     
-    conn.commit()
     cur.close()
     
     return entries
@@ -256,27 +264,26 @@ def populate_messages_for_user(conn, user_info, num_messages=150):
     chat_id = cur.fetchone()['id']
     
     # Add messages
-    message_count = 0
+    messages = []
     base_time = datetime.now() - timedelta(days=25)  # Start 25 days ago
     
-    while message_count < num_messages:
+    while len(messages) < num_messages:
         for role, content in CONVERSATION_TEMPLATES:
-            if message_count >= num_messages:
+            if len(messages) >= num_messages:
                 break
             
             # Personalize content with user name
             personalized = f"{content} - {user_info['name']}"
-            
-            cur.execute("""
-                INSERT INTO super_chat_messages 
-                (super_chat_id, role, content, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (chat_id, role, personalized, base_time))
-            
-            message_count += 1
+            messages.append((chat_id, role, personalized, base_time))
             base_time += timedelta(hours=random.randint(1, 6))
     
-    conn.commit()
+    execute_values(cur, """
+        INSERT INTO super_chat_messages 
+        (super_chat_id, role, content, created_at)
+        VALUES %s
+    """, messages)
+    message_count = len(messages)
+    
     cur.close()
     
     return message_count
@@ -302,7 +309,7 @@ def create_episodes_for_user(conn, user_info):
     chat_id = messages[0]['chat_id']
     
     # Group into episodes (every 3-5 messages)
-    episode_count = 0
+    episodes = []
     i = 0
     
     while i < len(messages):
@@ -317,12 +324,7 @@ def create_episodes_for_user(conn, user_info):
         summary_text = f"Discussion about work topics - {user_info['role']} activities"
         embedding = generate_embedding(summary_text, dimensions=384)
         
-        cur.execute("""
-            INSERT INTO episodes 
-            (user_id, source_type, source_id, messages, message_count, date_from, date_to, vector)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
+        episodes.append((
             user_info['user_id'],
             'super_chat',
             chat_id,
@@ -332,11 +334,15 @@ def create_episodes_for_user(conn, user_info):
             batch[-1]['created_at'],
             embedding
         ))
-        
-        episode_count += 1
         i += batch_size
     
-    conn.commit()
+    execute_values(cur, """
+        INSERT INTO episodes 
+        (user_id, source_type, source_id, messages, message_count, date_from, date_to, vector)
+        VALUES %s
+    """, episodes)
+    episode_count = len(episodes)
+    
     cur.close()
     
     return episode_count
@@ -356,7 +362,9 @@ def main():
             database=os.getenv('DB_NAME', 'semantic_memory'),
             user=os.getenv('DB_USER', 'postgres'),
             password=os.getenv('DB_PASSWORD', '2191'),
-            cursor_factory=RealDictCursor
+            cursor_factory=RealDictCursor,
+            # Sample data: don't wait for the WAL flush on commit
+            options='-c synchronous_commit=off'
         )
         print("✓ Connected to database\n")
     except Exception as e:
@@ -405,6 +413,9 @@ def main():
             total = 1 + len(kb_entries) + msg_count + ep_count
             print(f"\n  📊 Total for {user_info['name']}: {total} entries")
         
+        # All users are populated in one transaction: a single commit
+        conn.commit()
+        
         # Final summary
         print("\n" + "="*70)
         print("  POPULATION COMPLETE")
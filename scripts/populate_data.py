@@ -7,17 +7,41 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
+import io
 import random
 import json
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import psycopg2
+from psycopg2.extras import execute_values
 import numpy as np
+from numpy.random import default_rng
 from dotenv import load_dotenv
 
+# pgvector adapter: numpy embeddings are sent as vector literals directly
+try:
+    from pgvector.psycopg2 import register_vector
+    PGVECTOR_AVAILABLE = True
+except ImportError:
+    PGVECTOR_AVAILABLE = False
+
 load_dotenv()
 
+# Shared generator for mock embeddings (C-level batched sampling)
+_RNG = default_rng()
+
+# Rows per multi-row INSERT statement
+BATCH_PAGE_SIZE = 500
+
+# knowledge_base vector indexes, dropped for large bulk COPYs and rebuilt once
+# afterwards (a from-scratch HNSW build beats per-row index maintenance)
+KNOWLEDGE_VECTOR_INDEXES = ('idx_knowledge_base_embedding', 'idx_knowledge_base_embedding_bit')
+
+# Below this many rows, maintaining the indexes per row is cheaper than
+# rebuilding them over the whole table
+INDEX_REBUILD_MIN_ROWS = 10_000
+
 # Sample data templates
 USERS = ['user_001', 'user_002', 'user_003', 'user_004', 'user_005']
 
@@ -63,19 +87,50 @@ KNOWLEDGE_ITEMS = [
 
 def get_conn():
     """Get database connection."""
-    return psycopg2.connect(
+    conn = psycopg2.connect(
         host=os.getenv('DB_HOST', 'localhost'),
         port=os.getenv('DB_PORT', '5435'),
         user=os.getenv('DB_USER', 'postgres'),
         password=os.getenv('DB_PASSWORD', 'postgres'),
-        database=os.getenv('DB_NAME', 'bap_memory')
+        database=os.getenv('DB_NAME', 'bap_memory'),
+        # Sample data: don't wait for the WAL flush on commit
+        options='-c synchronous_commit=off'
     )
+    if PGVECTOR_AVAILABLE:
+        register_vector(conn)
+    return conn
+
+def generate_embeddings(n, dim=1536):
+    """Generate n random unit embedding vectors as one float32 (n, dim) matrix."""
+    vecs = _RNG.standard_normal((n, dim), dtype=np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+def vector_param(vec):
+    """Embedding as a query parameter: the ndarray itself when the pgvector adapter is registered."""
+    return vec if PGVECTOR_AVAILABLE else vec.tolist()
 
 def generate_embedding(dim=1536):
     """Generate a random embedding vector (normalized)."""
-    vec = np.random.randn(dim)
-    vec = vec / np.linalg.norm(vec)
-    return vec.tolist()
+    return vector_param(generate_embeddings(1, dim)[0])
+
+def copy_text(value):
+    """Escape one value for COPY text format."""
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+def copy_vector(vec):
+    """Embedding in pgvector's text form."""
+    return '[' + ','.join('%.6f' % x for x in vec) + ']'
+
+def copy_text_array(values):
+    """text[] literal for COPY."""
+    return '{' + ','.join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values) + '}'
 
 def populate_user_personas(cur, conn):
     """Create user persona entries."""
@@ -161,7 +216,6 @@ def populate_user_personas(cur, conn):
             embedding
         ))
     
-    conn.commit()
     print(f"✓ Created {len(personas)} user personas")
 
 def populate_knowledge_base(cur, conn, count=50):
@@ -169,6 +223,8 @@ def populate_knowledge_base(cur, conn, count=50):
     print(f"Creating {count} knowledge base entries...")
     
     categories = ['knowledge', 'skill', 'process']
+    embeddings = generate_embeddings(count)
+    buffer = io.StringIO()
     
     for i in range(count):
         user_id = random.choice(USERS)
@@ -179,7 +235,6 @@ def populate_knowledge_base(cur, conn, count=50):
         category = random.choice(categories)
         tags = random.sample(TOPICS, k=random.randint(2, 4))
         importance = round(random.uniform(0.3, 1.0), 2)
-        embedding = generate_embedding()
         
         metadata = json.dumps({
             'source': 'user_interaction',
@@ -187,13 +242,39 @@ def populate_knowledge_base(cur, conn, count=50):
             'confidence': round(random.uniform(0.7, 1.0), 2)
         })
         
+        buffer.write('\t'.join((
+            copy_text(user_id),
+            copy_text(content),
+            copy_text(category),
+            copy_text(copy_text_array(tags)),
+            str(importance),
+            copy_vector(embeddings[i]),
+            copy_text(metadata)
+        )))
+        buffer.write('\n')
+    buffer.seek(0)
+    
+    # Bulk load with COPY; large loads build the vector indexes once at the
+    # end, recreated from their live definitions so they match the schema
+    index_defs = []
+    if count >= INDEX_REBUILD_MIN_ROWS:
         cur.execute("""
-            INSERT INTO knowledge_base 
-            (user_id, content, category, tags, importance_score, embedding, metadata)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (user_id, content, category, tags, importance, embedding, metadata))
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE schemaname = current_schema()
+              AND tablename = 'knowledge_base'
+              AND indexname = ANY(%s)
+        """, (list(KNOWLEDGE_VECTOR_INDEXES),))
+        index_defs = cur.fetchall()
+        for name, _ in index_defs:
+            cur.execute(f"DROP INDEX IF EXISTS {name}")
+    cur.copy_expert("""
+        COPY knowledge_base 
+        (user_id, content, category, tags, importance_score, embedding, metadata)
+        FROM STDIN
+    """, buffer)
+    for _, create_sql in index_defs:
+        cur.execute(create_sql)
     
-    conn.commit()
     print(f"✓ Created {count} knowledge base entries")
 
 def populate_conversations(cur, conn, count=150):
@@ -210,12 +291,11 @@ def populate_conversations(cur, conn, count=150):
         """, (user_id,))
         super_chat_ids[user_id] = cur.fetchone()[0]
     
-    conn.commit()
     print(f"✓ Created {len(USERS)} super chats")
     
     # Create messages distributed over time
     base_date = datetime.now() - timedelta(days=45)  # Start 45 days ago
-    messages_created = 0
+    rows = []
     
     for i in range(count):
         user_id = random.choice(USERS)
@@ -231,28 +311,21 @@ def populate_conversations(cur, conn, count=150):
         detail = random.choice(TOPICS)
         user_content = random.choice(CONVERSATION_TEMPLATES).format(topic=topic, detail=detail)
         
-        cur.execute("""
-            INSERT INTO super_chat_messages 
-            (super_chat_id, role, content, created_at, episodized)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (super_chat_id, 'user', user_content, created_at, False))
-        
-        messages_created += 1
+        rows.append((super_chat_id, 'user', user_content, created_at, False))
         
         # Create assistant response
         response_content = random.choice(RESPONSE_TEMPLATES).format(topic=topic, detail=detail)
         response_time = created_at + timedelta(seconds=random.randint(2, 30))
         
-        cur.execute("""
-            INSERT INTO super_chat_messages 
-            (super_chat_id, role, content, created_at, episodized)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (super_chat_id, 'assistant', response_content, response_time, False))
-        
-        messages_created += 1
+        rows.append((super_chat_id, 'assistant', response_content, response_time, False))
     
-    conn.commit()
-    print(f"✓ Created {messages_created} messages")
+    execute_values(cur, """
+        INSERT INTO super_chat_messages 
+        (super_chat_id, role, content, created_at, episodized)
+        VALUES %s
+    """, rows, page_size=BATCH_PAGE_SIZE)
+    
+    print(f"✓ Created {len(rows)} messages")
 
 def populate_deepdive_conversations(cur, conn, count=20):
     """Create deep dive conversations with messages."""
@@ -271,7 +344,7 @@ def populate_deepdive_conversations(cur, conn, count=20):
         "Tech Stack Evaluation"
     ]
     
-    messages_created = 0
+    rows = []
     base_date = datetime.now() - timedelta(days=60)
     
     for i in range(count):
@@ -300,28 +373,21 @@ def populate_deepdive_conversations(cur, conn, count=20):
             user_content = random.choice(CONVERSATION_TEMPLATES).format(topic=topic, detail=detail)
             msg_time = conv_date + timedelta(minutes=j*10)
             
-            cur.execute("""
-                INSERT INTO deepdive_messages 
-                (deepdive_conversation_id, role, content, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (deepdive_id, 'user', user_content, msg_time))
-            
-            messages_created += 1
+            rows.append((deepdive_id, 'user', user_content, msg_time))
             
             # Assistant response
             response_content = random.choice(RESPONSE_TEMPLATES).format(topic=topic, detail=detail)
             response_time = msg_time + timedelta(seconds=random.randint(2, 20))
             
-            cur.execute("""
-                INSERT INTO deepdive_messages 
-                (deepdive_conversation_id, role, content, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (deepdive_id, 'assistant', response_content, response_time))
-            
-            messages_created += 1
+            rows.append((deepdive_id, 'assistant', response_content, response_time))
     
-    conn.commit()
-    print(f"✓ Created {count} deep dive conversations with {messages_created} messages")
+    execute_values(cur, """
+        INSERT INTO deepdive_messages 
+        (deepdive_conversation_id, role, content, created_at)
+        VALUES %s
+    """, rows, page_size=BATCH_PAGE_SIZE)
+    
+    print(f"✓ Created {count} deep dive conversations with {len(rows)} messages")
 
 def main():
     """Main data population function."""
@@ -340,6 +406,9 @@ def main():
         populate_conversations(cur, conn, count=150)
         populate_deepdive_conversations(cur, conn, count=20)
         
+        # Everything above is one transaction: a single commit (and WAL flush)
+        conn.commit()
+        
         # Get total counts
         cur.execute("SELECT COUNT(*) FROM user_persona")
         persona_count = cur.fetchone()[0]
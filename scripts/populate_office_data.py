@@ -9,12 +9,16 @@ import random
 import hashlib
 from datetime import datetime, timedelta
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
 import numpy as np
 
 load_dotenv()
 
+# Hash-embedding dimensionality; must match the embedding column size
+# (vector/halfvec(1536) in unified_schema.sql)
+EMBED_DIM = int(os.getenv('EMBED_DIM', '1536'))
+
 # Office Users
 OFFICE_USERS = [
     "hr_manager",
@@ -126,18 +130,24 @@ CONVERSATION_TEMPLATES = {
     ]
 }
 
-def generate_embedding(text: str, dimensions: int = 1536) -> list:
+def generate_embedding(text: str, dimensions: int = EMBED_DIM) -> list:
     """Generate deterministic embedding"""
-    embedding = []
-    for i in range(dimensions):
-        seed = text.encode('utf-8') + i.to_bytes(4, 'big')
-        hash_val = hashlib.sha256(seed).digest()
-        value = int.from_bytes(hash_val[:4], 'big') / (2**32)
-        value = (value * 2) - 1
-        embedding.append(value)
+    return generate_embeddings([text], dimensions)[0]
+
+def generate_embeddings(texts: list, dimensions: int = EMBED_DIM) -> list:
+    """Generate deterministic embeddings for many texts as one (n, dimensions) matrix"""
+    if not texts:
+        return []
     
-    norm = np.linalg.norm(embedding)
-    return [float(v / norm) for v in embedding]
+    # One SHAKE-128 expansion per text yields 8 bytes per dimension (same
+    # scheme as the interactive app, so stored and query embeddings line up);
+    # the arithmetic then runs once over the whole batch
+    raw = b''.join(hashlib.shake_128(text.encode('utf-8')).digest(dimensions * 8) for text in texts)
+    embeddings = (np.frombuffer(raw, dtype='>u8').reshape(len(texts), dimensions) % 2000000) / 1000000.0 - 1.0
+    
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (embeddings / norms).tolist()
 
 def clear_existing_data(conn):
     """Clear all existing data from tables"""
@@ -162,7 +172,6 @@ def clear_existing_data(conn):
         deleted = cur.rowcount
         print(f"  ✓ Cleared {table}: {deleted} rows")
     
-    conn.commit()
     cur.close()
     print("✓ All data cleared\n")
 
@@ -171,36 +180,40 @@ def populate_knowledge_base(conn, num_entries=50):
     print(f"📚 Populating knowledge base with {num_entries} office-related entries...")
     
     cur = conn.cursor()
-    entries = []
+    rows = []
     
-    for category, topics in KNOWLEDGE_TOPICS.items():
-        for topic in topics:
-            user = random.choice(OFFICE_USERS)
-            embedding = generate_embedding(topic)
-            
-            cur.execute("""
-                INSERT INTO knowledge_base 
-                (user_id, content, category, tags, embedding)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                user,
-                topic,
-                category,
-                [category.lower().replace(' ', '_')],
-                embedding
-            ))
-            
-            kb_id = cur.fetchone()['id']
-            entries.append(kb_id)
-            
-            # Create semantic memory index
-            cur.execute("""
-                INSERT INTO semantic_memory_index (user_id, knowledge_id)
-                VALUES (%s, %s)
-            """, (user, kb_id))
+    selected_topics = [
+        (category, topic)
+        for category, topics in KNOWLEDGE_TOPICS.items()
+        for topic in topics
+    ]
+    embeddings = generate_embeddings([topic for _, topic in selected_topics])
+    
+    for (category, topic), embedding in zip(selected_topics, embeddings):
+        user = random.choice(OFFICE_USERS)
+        rows.append((
+            user,
+            topic,
+            category,
+            [category.lower().replace(' ', '_')],
+            embedding
+        ))
+    
+    # Batch insert: one statement for all entries instead of one per row
+    returned = execute_values(cur, """
+        INSERT INTO knowledge_base 
+        (user_id, content, category, tags, embedding)
+        VALUES %s
+        RETURNING id
+    """, rows, page_size=len(rows) or 1, fetch=True)
+    entries = [row['id'] for row in returned]
+    
+    # Create semantic memory index
+    execute_values(cur, """
+        INSERT INTO semantic_memory_index (user_id, knowledge_id)
+        VALUES %s
+    """, [(row[0], kb_id) for row, kb_id in zip(rows, entries)])
     
-    conn.commit()
     cur.close()
     
     print(f"✓ Added {len(entries)} knowledge base entries")
@@ -225,6 +238,7 @@ def populate_conversations(conn, num_messages=200):
         chat_sessions.append((chat_id, user))
     
     # Add messages to conversations
+    messages = []
     message_count = 0
     conversation_types = list(CONVERSATION_TEMPLATES.keys())
     
@@ -241,16 +255,17 @@ def populate_conversations(conn, num_messages=200):
             if message_count >= num_messages:
                 break
                 
-            cur.execute("""
-                INSERT INTO super_chat_messages 
-                (super_chat_id, role, content, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (chat_id, role, content, timestamp))
+            messages.append((chat_id, role, content, timestamp))
             
             message_count += 1
             timestamp += timedelta(minutes=random.randint(1, 15))
     
-    conn.commit()
+    execute_values(cur, """
+        INSERT INTO super_chat_messages 
+        (super_chat_id, role, content, created_at)
+        VALUES %s
+    """, messages)
+    
     cur.close()
     
     print(f"✓ Created {len(chat_sessions)} chat sessions with {message_count} messages")
@@ -285,6 +300,7 @@ def populate_deepdive_conversations(conn, num_conversations=20):
         "Performance Metrics Review"
     ]
     
+    messages = []
     total_messages = 0
     
     for i in range(num_conversations):
@@ -311,16 +327,17 @@ def populate_deepdive_conversations(conn, num_conversations=20):
             else:
                 content = f"Analysis of {topic.lower()}: Recommendation {j+1} based on organizational best practices and data."
             
-            cur.execute("""
-                INSERT INTO deepdive_messages 
-                (deepdive_conversation_id, role, content, created_at)
-                VALUES (%s, %s, %s, %s)
-            """, (conv_id, role, content, timestamp))
+            messages.append((conv_id, role, content, timestamp))
             
             total_messages += 1
             timestamp += timedelta(minutes=random.randint(2, 10))
     
-    conn.commit()
+    execute_values(cur, """
+        INSERT INTO deepdive_messages 
+        (deepdive_conversation_id, role, content, created_at)
+        VALUES %s
+    """, messages)
+    
     cur.close()
     
     print(f"✓ Created {num_conversations} deepdive conversations with {total_messages} messages")
@@ -340,7 +357,9 @@ def main():
             database=os.getenv('DB_NAME', 'semantic_memory'),
             user=os.getenv('DB_USER', 'postgres'),
             password=os.getenv('DB_PASSWORD', '2191'),
-            cursor_factory=RealDictCursor
+            cursor_factory=RealDictCursor,
+            # Sample data: don't wait for the WAL flush on commit
+            options='-c synchronous_commit=off'
         )
         print("✓ Connected to database\n")
     except Exception as e:
@@ -356,6 +375,9 @@ def main():
         messages = populate_conversations(conn, 200)
         deepdive_msgs = populate_deepdive_conversations(conn, 20)
         
+        # Clear + populate is one transaction: a single commit
+        conn.commit()
+        
         # Summary
         print("\n" + "="*70)
         print("  POPULATION COMPLETE")
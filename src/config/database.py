@@ -2,12 +2,116 @@
 Database configuration and connection management for Semantic Memory System
 """
 import os
-from typing import Optional
+import re
+import threading
+import time
+import weakref
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 
+# pgvector adapters: embeddings bound as compact '[..]' vector literals
+# (float32/float16 precision) instead of psycopg2's ARRAY[...] of float64
+# reprs, which the server would also have to cast from numeric[]
+try:
+    from psycopg2.extensions import register_adapter
+    from pgvector import HalfVector, Vector
+    from pgvector.psycopg2.halfvec import HalfvecAdapter
+    from pgvector.psycopg2.vector import VectorAdapter
+    register_adapter(Vector, VectorAdapter)
+    register_adapter(HalfVector, HalfvecAdapter)
+    PGVECTOR_AVAILABLE = True
+except ImportError:
+    PGVECTOR_AVAILABLE = False
+
+
+# TCP keep-alive settings so pooled connections survive idle periods
+# instead of being silently dropped by NAT/firewalls and re-established
+KEEPALIVE_KWARGS = {
+    'keepalives': 1,
+    'keepalives_idle': int(os.getenv('DB_KEEPALIVES_IDLE', '30')),
+    'keepalives_interval': int(os.getenv('DB_KEEPALIVES_INTERVAL', '10')),
+    'keepalives_count': int(os.getenv('DB_KEEPALIVES_COUNT', '5')),
+}
+
+# pgvector HNSW search breadth (hnsw.ef_search): higher = better recall, slower.
+# Setting HNSW_EF_SEARCH pins it; otherwise it scales with the table's size
+HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', '100'))
+HNSW_EF_SEARCH_PINNED = 'HNSW_EF_SEARCH' in os.environ
+
+# (max rows, ef_search) tiers used when ef_search is not pinned
+HNSW_EF_SEARCH_TIERS = ((100_000, 40), (1_000_000, 100))
+HNSW_EF_SEARCH_LARGE = 200
+
+# %(name)s placeholders, rewritten to $n for server-side PREPARE
+_NAMED_PARAM_RE = re.compile(r'%\((\w+)\)s')
+
+# Row estimates are re-read at most this often (seconds)
+TABLE_SIZE_CACHE_TTL = 300
+_table_size_cache: Dict[str, Tuple[float, int]] = {}
+
+
+def hnsw_ef_search_for(cursor, table: str) -> int:
+    """Pick hnsw.ef_search for a table from its planner row estimate"""
+    if HNSW_EF_SEARCH_PINNED:
+        return HNSW_EF_SEARCH
+    
+    now = time.time()
+    cached = _table_size_cache.get(table)
+    if cached and now - cached[0] < TABLE_SIZE_CACHE_TTL:
+        rows = cached[1]
+    else:
+        # pg_class.reltuples avoids a COUNT(*) scan on every search; a
+        # partitioned parent has no rows of its own, so sum over its leaves
+        # (a plain table is its own single leaf)
+        cursor.execute(
+            """
+            SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint AS row_estimate
+            FROM pg_partition_tree(to_regclass(%s)) AS tree
+            JOIN pg_class c ON c.oid = tree.relid
+            WHERE tree.isleaf
+            """,
+            (table,)
+        )
+        row = cursor.fetchone()
+        rows = 0
+        if row:
+            rows = max(int(row['row_estimate'] if isinstance(row, dict) else row[0]), 0)
+        _table_size_cache[table] = (now, rows)
+    
+    for max_rows, ef_search in HNSW_EF_SEARCH_TIERS:
+        if rows < max_rows:
+            return ef_search
+    return HNSW_EF_SEARCH_LARGE
+
+
+def set_hnsw_ef_search(cursor, table: str):
+    """SET LOCAL hnsw.ef_search for the current transaction"""
+    cursor.execute("SET LOCAL hnsw.ef_search = %s", (hnsw_ef_search_for(cursor, table),))
+
+
+def vector_param(embedding):
+    """Adapt an embedding for a vector column or ``%s::vector`` parameter"""
+    if embedding is None:
+        return None
+    if not PGVECTOR_AVAILABLE:
+        # psycopg2 can't adapt numpy arrays; a list goes out as ARRAY[...]
+        return np.asarray(embedding).tolist()
+    return Vector(embedding)
+
+
+def halfvec_param(embedding):
+    """Adapt an embedding for a halfvec column or ``%s::halfvec`` parameter"""
+    if embedding is None:
+        return None
+    if not PGVECTOR_AVAILABLE:
+        # psycopg2 can't adapt numpy arrays; a list goes out as ARRAY[...]
+        return np.asarray(embedding).tolist()
+    return HalfVector(embedding)
+
 
 class DatabaseConfig:
     """Database configuration and connection pool management"""
@@ -28,22 +132,28 @@ class DatabaseConfig:
         self.user = user or os.getenv('DB_USER', 'postgres')
         self.password = password or os.getenv('DB_PASSWORD', '')
         
-        self._pool: Optional[SimpleConnectionPool] = None
+        self._pool: Optional[ThreadedConnectionPool] = None
+        # Names of statements already PREPAREd on each pooled connection
+        self._prepared: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
         self._min_conn = min_conn
         self._max_conn = max_conn
+        self._pool_lock = threading.Lock()
     
     def initialize_pool(self):
         """Initialize the connection pool"""
         if self._pool is None:
-            self._pool = SimpleConnectionPool(
-                self._min_conn,
-                self._max_conn,
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self._min_conn,
+                        self._max_conn,
+                        host=self.host,
+                        port=self.port,
+                        database=self.database,
+                        user=self.user,
+                        password=self.password,
+                        **KEEPALIVE_KWARGS
+                    )
     
     @contextmanager
     def get_connection(self):
@@ -71,11 +181,37 @@ class DatabaseConfig:
             finally:
                 cursor.close()
     
+    def execute_prepared(self, cursor, name: str, sql: str, params: Dict[str, Any]):
+        """
+        Execute a %(name)s-style statement as a server-side prepared statement
+        
+        The statement is PREPAREd the first time a pooled connection sees
+        `name`; later calls only EXECUTE it, skipping parse and plan.
+        `name` must identify the exact SQL text.
+        """
+        arg_names = list(dict.fromkeys(_NAMED_PARAM_RE.findall(sql)))
+        prepared = self._prepared.setdefault(cursor.connection, set())
+        
+        if name not in prepared:
+            positional = _NAMED_PARAM_RE.sub(
+                lambda m: f"${arg_names.index(m.group(1)) + 1}", sql
+            )
+            cursor.execute(f"PREPARE {name} AS {positional}")
+            prepared.add(name)
+        
+        placeholders = ", ".join(["%s"] * len(arg_names))
+        cursor.execute(
+            f"EXECUTE {name} ({placeholders})" if arg_names else f"EXECUTE {name}",
+            [params[arg] for arg in arg_names]
+        )
+    
     def close_pool(self):
         """Close all connections in the pool"""
-        if self._pool:
-            self._pool.closeall()
-            self._pool = None
+        with self._pool_lock:
+            if self._pool:
+                self._pool.closeall()
+                self._pool = None
+                self._prepared = weakref.WeakKeyDictionary()
 
 
 # Global database instance
@@ -1,27 +1,50 @@
+from psycopg2.extras import execute_values
 from .db import get_conn
+
+# user_id -> super_chat id; a user's super chat never changes once created
+_SUPER_CHAT_IDS = {}
+
+
 def get_or_create_super_chat(user_id):
+    chat_id = _SUPER_CHAT_IDS.get(user_id)
+    if chat_id is not None:
+        return chat_id
+
+    # Lookup and create-if-missing in a single round trip
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("SELECT id FROM super_chat WHERE user_id=%s", (user_id,))
-        row = cur.fetchone()
-        if row:
-            return row["id"]
-
-        cur.execute(
-            "INSERT INTO super_chat (user_id) VALUES (%s) RETURNING id",
-            (user_id,)
-        )
-        conn.commit()
-        return cur.fetchone()["id"]
+        cur.execute("""
+            WITH existing AS (
+                SELECT id FROM super_chat WHERE user_id = %(user_id)s LIMIT 1
+            ), created AS (
+                INSERT INTO super_chat (user_id)
+                SELECT %(user_id)s
+                WHERE NOT EXISTS (SELECT 1 FROM existing)
+                RETURNING id
+            )
+            SELECT id FROM existing
+            UNION ALL
+            SELECT id FROM created
+        """, {"user_id": user_id})
+        chat_id = cur.fetchone()["id"]
+
+    _SUPER_CHAT_IDS[user_id] = chat_id
+    return chat_id
 
 
 
 def add_super_chat_message(user_id, role, content):
+    add_super_chat_messages(user_id, [(role, content)])
+
+def add_super_chat_messages(user_id, messages):
+    """Store several (role, content) messages in one multi-row INSERT"""
+    if not messages:
+        return
     chat_id = get_or_create_super_chat(user_id)
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("""
+        execute_values(cur, """
             INSERT INTO super_chat_messages (super_chat_id, role, content)
-            VALUES (%s, %s, %s)
-        """, (chat_id, role, content))
+            VALUES %s
+        """, [(chat_id, role, content) for role, content in messages], page_size=500)
         conn.commit()
 
 def create_deepdive(user_id, title, tenant_id=None):
@@ -34,10 +57,16 @@ def create_deepdive(user_id, title, tenant_id=None):
         return cur.fetchone()["id"]
 
 def add_deepdive_message(conversation_id, role, content):
+    add_deepdive_messages(conversation_id, [(role, content)])
+
+def add_deepdive_messages(conversation_id, messages):
+    """Store several (role, content) messages in one multi-row INSERT"""
+    if not messages:
+        return
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("""
+        execute_values(cur, """
             INSERT INTO deepdive_messages
             (deepdive_conversation_id, role, content)
-            VALUES (%s,%s,%s)
-        """, (conversation_id, role, content))
+            VALUES %s
+        """, [(conversation_id, role, content) for role, content in messages], page_size=500)
         conn.commit()
\ No newline at end of file
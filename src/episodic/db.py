@@ -1,16 +1,55 @@
 import os
-import psycopg2
+import threading
+from contextlib import contextmanager
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# One process-wide pool: callers borrow a connection instead of paying a
+# TCP + auth handshake (and a backend fork) on every get_conn()
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool():
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadedConnectionPool(
+                    int(os.getenv("PG_POOL_MIN", "2")),
+                    int(os.getenv("PG_POOL_MAX", "16")),
+                    dbname=os.getenv("PG_DB"),
+                    user=os.getenv("PG_USER"),
+                    password=os.getenv("PG_PASSWORD"),
+                    host=os.getenv("PG_HOST"),
+                    port=os.getenv("PG_PORT"),
+                    cursor_factory=RealDictCursor,
+                    keepalives=1,
+                    keepalives_idle=30
+                )
+    return _POOL
+
+
+@contextmanager
 def get_conn():
-    return psycopg2.connect(
-        dbname=os.getenv("PG_DB"),
-        user=os.getenv("PG_USER"),
-        password=os.getenv("PG_PASSWORD"),
-        host=os.getenv("PG_HOST"),
-        port=os.getenv("PG_PORT"),
-        cursor_factory=RealDictCursor
-    )
\ No newline at end of file
+    pool = _get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def close_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.closeall()
+            _POOL = None
\ No newline at end of file
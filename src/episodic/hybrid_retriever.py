@@ -7,6 +7,9 @@ embedder = EmbeddingModel()
 
 
 class HybridRetriever:
+    # Rows pulled per round trip while streaming episodes in load()
+    LOAD_ITERSIZE = 256
+
     def __init__(self):
         self.bm25 = BM25Index()
         self.episodes = []
@@ -15,8 +18,15 @@ class HybridRetriever:
     def load(self, user_id, deepdive_id=None):
         """
         Load episodes from DB and build BM25 index.
+        Streams through a server-side cursor so the BM25 index is built
+        while rows arrive instead of after one big fetchall().
         """
-        with get_conn() as conn, conn.cursor() as cur:
+        self.episodes = []
+        self.episode_map = {}
+        self.bm25 = BM25Index()
+
+        with get_conn() as conn, conn.cursor(name="hybrid_retriever_load") as cur:
+            cur.itersize = self.LOAD_ITERSIZE
             if deepdive_id:
                 cur.execute("""
                     SELECT *
@@ -33,16 +43,11 @@ class HybridRetriever:
                       AND vector IS NOT NULL
                 """, (user_id,))
 
-            self.episodes = cur.fetchall()
-
-        # Reset structures
-        self.episode_map = {}
-        self.bm25 = BM25Index()
-
-        for ep in self.episodes:
-            self.episode_map[ep["id"]] = ep
-            text = " ".join(m["content"] for m in ep["messages"])
-            self.bm25.add(ep["id"], text)
+            for ep in cur:
+                self.episodes.append(ep)
+                self.episode_map[ep["id"]] = ep
+                text = " ".join(m["content"] for m in ep["messages"])
+                self.bm25.add(ep["id"], text)
 
         print(f"📚 Loaded {len(self.episodes)} episodes for retrieval.")
 
@@ -68,10 +73,10 @@ class HybridRetriever:
         with get_conn() as conn, conn.cursor() as cur:
             cur.execute("""
                 SELECT id,
-                       1 - (vector <=> %s::vector) AS similarity
+                       1 - (vector <=> %s::halfvec) AS similarity
                 FROM episodes
                 WHERE id = ANY(%s)
-                ORDER BY vector <=> %s::vector
+                ORDER BY vector <=> %s::halfvec
                 LIMIT %s
             """, (
                 qvec.tolist(),
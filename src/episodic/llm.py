@@ -1,9 +1,16 @@
 import os
-from groq import Groq
+import httpx
+from groq import Groq, DefaultHttpxClient
 
-# Initialize Groq client with API key (if available)
+# Initialize Groq client with API key (if available); the module-level client
+# is shared by all callers, with a long keep-alive so connections get reused
 _api_key = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=_api_key) if _api_key else None
+client = Groq(
+    api_key=_api_key,
+    http_client=DefaultHttpxClient(
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=300)
+    )
+) if _api_key else None
 
 def call_llm(messages, model="openai/gpt-oss-120b"):
     if not client:
@@ -3,20 +3,72 @@ Knowledge Base Repository - Database operations for knowledge items
 NOW WITH METADATA FILTERING SUPPORT
 """
 from typing import List, Optional, Dict, Any, Union
+import io
 import json
 from datetime import datetime
-from src.config.database import db_config
+import numpy as np
+from psycopg2.extras import execute_values
+from src.config.database import db_config, halfvec_param, set_hnsw_ef_search, hnsw_ef_search_for
 from src.models.semantic_memory import KnowledgeItem, SearchResult
 from src.services.metadata_filter import (
     MetadataFilterEngine,
     MetadataFilter,
     FilterGroup
 )
+from src.services.statistical_filter import (
+    percentile_threshold,
+    top_percentile_mask,
+    above_mean_mask
+)
+
+# Binary-quantized (1-bit Hamming) candidates scanned per requested result
+# before the exact halfvec cosine rerank in search_by_vector
+BQ_CANDIDATE_FACTOR = 20
+# pgvector's upper bound for hnsw.ef_search (and thus HNSW candidates)
+HNSW_EF_SEARCH_MAX = 1000
+
+# Columns written by create/create_many, in COPY order
+_KNOWLEDGE_COLUMNS = (
+    "user_id, title, content, content_type, category, tags, embedding, "
+    "source, confidence_score, importance_score, metadata"
+)
+
+
+def _text_array_literal(values: List[str]) -> str:
+    """text[] literal for a COPY field"""
+    return '{' + ','.join(
+        '"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values
+    ) + '}'
+
+
+def _vector_literal(embedding: Any) -> Optional[str]:
+    """pgvector literal for a COPY field (list or np.ndarray embedding)"""
+    if embedding is None:
+        return None
+    return '[' + ','.join(repr(v) for v in np.asarray(embedding, dtype=np.float64).tolist()) + ']'
+
+
+def _copy_field(value: Any) -> str:
+    """Render one value in PostgreSQL COPY text format"""
+    if value is None:
+        return r'\N'
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
 
 
 class KnowledgeRepository:
     """Repository for knowledge base CRUD operations"""
     
+    # Batches larger than this are streamed with COPY instead of INSERT
+    COPY_THRESHOLD = 1000
+    
     def __init__(self):
         """Initialize repository with metadata filter engine"""
         self.filter_engine = MetadataFilterEngine()
@@ -39,7 +91,7 @@ class KnowledgeRepository:
                 knowledge.content_type,
                 knowledge.category,
                 knowledge.tags,
-                knowledge.embedding,
+                halfvec_param(knowledge.embedding),
                 knowledge.source,
                 knowledge.confidence_score,
                 knowledge.importance_score,
@@ -53,6 +105,94 @@ class KnowledgeRepository:
             
             return knowledge
     
+    def create_many(self, items: List[KnowledgeItem]) -> List[KnowledgeItem]:
+        """
+        Create many knowledge items in one transaction
+        
+        Batches up to COPY_THRESHOLD go in as a single multi-row INSERT;
+        larger ones are streamed through COPY into a staging table and
+        moved into knowledge_base with one INSERT.
+        """
+        if not items:
+            return []
+        if len(items) <= self.COPY_THRESHOLD:
+            return self._insert_many(items)
+        
+        buffer = io.StringIO()
+        for ord_, item in enumerate(items):
+            buffer.write('\t'.join(_copy_field(v) for v in (
+                ord_,
+                item.user_id,
+                item.title,
+                item.content,
+                item.content_type,
+                item.category,
+                _text_array_literal(item.tags or []),
+                _vector_literal(item.embedding),
+                item.source,
+                item.confidence_score,
+                item.importance_score,
+                item.metadata or {}
+            )))
+            buffer.write('\n')
+        buffer.seek(0)
+        
+        with db_config.get_cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TEMP TABLE knowledge_staging ON COMMIT DROP AS
+                SELECT 0 AS ord, {_KNOWLEDGE_COLUMNS}
+                FROM knowledge_base WITH NO DATA
+            """)
+            cursor.copy_expert(
+                f"COPY knowledge_staging (ord, {_KNOWLEDGE_COLUMNS}) FROM STDIN",
+                buffer
+            )
+            cursor.execute(f"""
+                INSERT INTO knowledge_base ({_KNOWLEDGE_COLUMNS})
+                SELECT {_KNOWLEDGE_COLUMNS}
+                FROM knowledge_staging
+                ORDER BY ord
+                RETURNING id, created_at, updated_at
+            """)
+            
+            for item, result in zip(items, cursor.fetchall()):
+                item.id = str(result['id'])
+                item.created_at = result['created_at']
+                item.updated_at = result['updated_at']
+        
+        return items
+    
+    def _insert_many(self, items: List[KnowledgeItem]) -> List[KnowledgeItem]:
+        """Insert items with one multi-row INSERT ... RETURNING"""
+        rows = [(
+            item.user_id,
+            item.title,
+            item.content,
+            item.content_type,
+            item.category,
+            item.tags,
+            halfvec_param(item.embedding),
+            item.source,
+            item.confidence_score,
+            item.importance_score,
+            json.dumps(item.metadata)
+        ) for item in items]
+        
+        with db_config.get_cursor() as cursor:
+            # One page so RETURNING rows come back in input order
+            results = execute_values(cursor, f"""
+                INSERT INTO knowledge_base ({_KNOWLEDGE_COLUMNS})
+                VALUES %s
+                RETURNING id, created_at, updated_at
+            """, rows, page_size=len(rows), fetch=True)
+            
+            for item, result in zip(items, results):
+                item.id = str(result['id'])
+                item.created_at = result['created_at']
+                item.updated_at = result['updated_at']
+        
+        return items
+    
     def get_by_id(self, knowledge_id: str) -> Optional[KnowledgeItem]:
         """Get knowledge item by ID"""
         with db_config.get_cursor() as cursor:
@@ -89,7 +229,7 @@ class KnowledgeRepository:
                 knowledge.content_type,
                 knowledge.category,
                 knowledge.tags,
-                knowledge.embedding,
+                halfvec_param(knowledge.embedding),
                 knowledge.source,
                 knowledge.confidence_score,
                 knowledge.importance_score,
@@ -121,9 +261,15 @@ class KnowledgeRepository:
         category: Optional[str] = None,
         tags: Optional[List[str]] = None
     ) -> List[SearchResult]:
-        """Search knowledge items by vector similarity using HNSW index"""
-        conditions = ["1 - (embedding <=> %s::vector) >= %s"]
-        params = [embedding, min_similarity]
+        """Search knowledge items by vector similarity using HNSW index
+        
+        Two stages: a Hamming-distance scan over the binary-quantized HNSW
+        index picks limit * BQ_CANDIDATE_FACTOR candidates, which are then
+        reranked by exact cosine similarity.
+        """
+        embedding = halfvec_param(embedding)
+        conditions = ["embedding IS NOT NULL"]
+        params = []
         
         if user_id is not None:
             conditions.append("(user_id = %s OR user_id IS NULL)")
@@ -138,19 +284,29 @@ class KnowledgeRepository:
             params.append(tags)
         
         where_clause = " AND ".join(conditions)
+        candidates = min(limit * BQ_CANDIDATE_FACTOR, HNSW_EF_SEARCH_MAX)
         
         with db_config.get_cursor() as cursor:
-            # Set ef_search for HNSW index quality/speed tradeoff
-            cursor.execute("SET LOCAL hnsw.ef_search = 100")
+            # ef_search also caps how many rows an HNSW scan can return
+            cursor.execute(
+                "SET LOCAL hnsw.ef_search = %s",
+                (max(hnsw_ef_search_for(cursor, 'knowledge_base'), candidates),)
+            )
             
             cursor.execute(f"""
-                SELECT *,
-                    1 - (embedding <=> %s::vector) as similarity
-                FROM knowledge_base
-                WHERE {where_clause}
-                ORDER BY embedding <=> %s::vector
+                SELECT *
+                FROM (
+                    SELECT *,
+                        1 - (embedding <=> %s::halfvec) as similarity
+                    FROM knowledge_base
+                    WHERE {where_clause}
+                    ORDER BY binary_quantize(embedding)::bit(1536) <~> binary_quantize(%s::halfvec)
+                    LIMIT %s
+                ) candidates
+                WHERE similarity >= %s
+                ORDER BY similarity DESC
                 LIMIT %s
-            """, [embedding] + params + [embedding, limit])
+            """, [embedding] + params + [embedding, candidates, min_similarity, limit])
             
             results = []
             for row in cursor.fetchall():
@@ -219,69 +375,56 @@ class KnowledgeRepository:
         Hybrid search combining BM25 and vector similarity
         Returns results with combined scores
         """
+        query_embedding = halfvec_param(query_embedding)
         conditions = []
-        vector_params = [query_embedding]
-        bm25_params = [query]
+        params = []
         
         if user_id is not None:
             conditions.append("(user_id = %s OR user_id IS NULL)")
-            vector_params.append(user_id)
-            bm25_params.append(user_id)
+            params.append(user_id)
         
         if category:
             conditions.append("category = %s")
-            vector_params.append(category)
-            bm25_params.append(category)
+            params.append(category)
         
         if tags:
             conditions.append("tags && %s")
-            vector_params.append(tags)
-            bm25_params.append(tags)
+            params.append(tags)
         
         where_clause = " AND ".join(conditions) if conditions else "TRUE"
         
         with db_config.get_cursor() as cursor:
             # Set HNSW search parameters
-            cursor.execute("SET LOCAL hnsw.ef_search = 100")
+            set_hnsw_ef_search(cursor, 'knowledge_base')
             
-            # Combined query with both BM25 and vector scores
+            # One pass: the HNSW index drives the candidate scan and the
+            # BM25 score is computed on the same row fetch
             cursor.execute(f"""
-                WITH vector_scores AS (
-                    SELECT 
-                        id,
-                        1 - (embedding <=> %s::vector) AS vector_score
-                    FROM knowledge_base
+                SELECT
+                    c.*,
+                    (%s * c.bm25_score + %s * c.vector_score) AS hybrid_score
+                FROM (
+                    SELECT
+                        k.*,
+                        1 - (k.embedding <=> %s::halfvec) AS vector_score,
+                        CASE WHEN k.content_tsv @@ q.tsq
+                             THEN ts_rank_cd(k.content_tsv, q.tsq, 32)
+                             ELSE 0 END AS bm25_score
+                    FROM knowledge_base k,
+                         plainto_tsquery('english', %s) AS q(tsq)
                     WHERE {where_clause}
-                    ORDER BY embedding <=> %s::vector
-                    LIMIT %s
-                ),
-                bm25_scores AS (
-                    SELECT 
-                        id,
-                        ts_rank_cd(content_tsv, plainto_tsquery('english', %s), 32) AS bm25_score
-                    FROM knowledge_base
-                    WHERE content_tsv @@ plainto_tsquery('english', %s)
-                        AND {where_clause}
-                    ORDER BY bm25_score DESC
+                    ORDER BY k.embedding <=> %s::halfvec
                     LIMIT %s
-                )
-                SELECT 
-                    k.*,
-                    COALESCE(v.vector_score, 0) AS vector_score,
-                    COALESCE(b.bm25_score, 0) AS bm25_score,
-                    (%s * COALESCE(b.bm25_score, 0) + %s * COALESCE(v.vector_score, 0)) AS hybrid_score
-                FROM knowledge_base k
-                LEFT JOIN vector_scores v ON k.id = v.id
-                LEFT JOIN bm25_scores b ON k.id = b.id
-                WHERE (v.id IS NOT NULL OR b.id IS NOT NULL)
+                ) c
                 ORDER BY hybrid_score DESC
                 LIMIT %s
-            """, (
-                query_embedding, query_embedding, limit * 2,
-                query, query, limit * 2,
+            """, [
                 bm25_weight, vector_weight,
+                query_embedding, query
+            ] + params + [
+                query_embedding, limit * 2,
                 limit
-            ))
+            ])
             
             return [dict(row) for row in cursor.fetchall()]
     def search_by_text(
@@ -435,14 +578,15 @@ class KnowledgeRepository:
         # Build base query
         base_sql = """
             SELECT *,
-                1 - (embedding <=> %s::vector) as vector_similarity,
+                1 - (embedding <=> %s::halfvec) as vector_similarity,
                 ts_rank_cd(content_tsv, plainto_tsquery('english', %s), 32) AS bm25_score,
-                (%s * (1 - (embedding <=> %s::vector)) + 
+                (%s * (1 - (embedding <=> %s::halfvec)) + 
                  %s * ts_rank_cd(content_tsv, plainto_tsquery('english', %s), 32)) AS hybrid_score
             FROM knowledge_base
             WHERE 1=1
         """
         
+        query_embedding = halfvec_param(query_embedding)
         params = [
             query_embedding, query,
             vector_weight, query_embedding,
@@ -510,24 +654,76 @@ class KnowledgeRepository:
             cursor.execute(base_sql, params)
             return [self._row_to_knowledge(row) for row in cursor.fetchall()]
     
+    def find_by_metadata_many(
+        self,
+        filters_list: List[Union[MetadataFilter, FilterGroup]],
+        user_id: Optional[str] = None,
+        limit: int = 50
+    ) -> List[List[KnowledgeItem]]:
+        """
+        Run several find_by_metadata lookups in one round-trip
+        
+        Each filter becomes one UNION ALL branch tagged with its position, so
+        N filters cost one network round-trip instead of N.
+        
+        Returns:
+            One result list per filter, in input order
+        """
+        if not filters_list:
+            return []
+        
+        params: Dict[str, Any] = {'user_id': user_id, 'limit': limit}
+        user_clause = "(user_id = %(user_id)s OR user_id IS NULL)" if user_id is not None else "TRUE"
+        
+        branches = []
+        for i, filters in enumerate(filters_list):
+            # Distinct prefixes keep each branch's named parameters apart
+            where_clause, filter_params = self.filter_engine.to_sql_where(
+                filters, param_prefix=f"filter{i}"
+            )
+            params.update(filter_params)
+            branches.append(f"""
+                (SELECT {i} AS filter_index, * FROM knowledge_base
+                 WHERE {user_clause} AND ({where_clause})
+                 ORDER BY importance_score DESC, created_at DESC
+                 LIMIT %(limit)s)
+            """)
+        
+        sql = f"""
+            SELECT * FROM ({' UNION ALL '.join(branches)}) AS batched
+            ORDER BY filter_index, importance_score DESC, created_at DESC
+        """
+        
+        results: List[List[KnowledgeItem]] = [[] for _ in filters_list]
+        with db_config.get_cursor() as cursor:
+            cursor.execute(sql, params)
+            for row in cursor.fetchall():
+                results[row.pop('filter_index')].append(self._row_to_knowledge(row))
+        return results
+    
     def get_filtered_stats(
         self,
         user_id: str,
-        filters: Optional[Union[MetadataFilter, FilterGroup]] = None
+        filters: Optional[Union[MetadataFilter, FilterGroup]] = None,
+        percentile: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Get statistics for filtered knowledge items
         
         Returns count, avg importance, categories breakdown, etc.
+        With percentile (e.g. 0.9) also the importance threshold of that
+        percentile and the counts at/above it and above average, computed
+        in one in-memory pass over the fetched scores.
         """
-        base_sql = """
+        score_column = ",\n                array_agg(importance_score) as importance_scores" if percentile is not None else ""
+        base_sql = f"""
             SELECT 
                 COUNT(*) as total_count,
                 AVG(importance_score) as avg_importance,
                 COUNT(DISTINCT category) as category_count,
                 array_agg(DISTINCT category) as categories,
                 MIN(created_at) as oldest_date,
-                MAX(created_at) as newest_date
+                MAX(created_at) as newest_date{score_column}
             FROM knowledge_base
             WHERE (user_id = %s OR user_id IS NULL)
         """
@@ -543,5 +739,15 @@ class KnowledgeRepository:
         with db_config.get_cursor() as cursor:
             cursor.execute(base_sql, params)
             row = cursor.fetchone()
-            return dict(row) if row else {}
+        
+        stats = dict(row) if row else {}
+        if percentile is not None and stats:
+            scores = np.array(
+                [score for score in stats.pop('importance_scores') or [] if score is not None],
+                dtype=np.float64
+            )
+            stats['importance_threshold'] = percentile_threshold(scores, percentile) if len(scores) else None
+            stats['top_percentile_count'] = int(top_percentile_mask(scores, percentile).sum())
+            stats['above_average_count'] = int(above_mean_mask(scores).sum())
+        return stats
 
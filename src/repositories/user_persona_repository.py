@@ -3,7 +3,7 @@ User Persona Repository - Database operations for user personas
 """
 from typing import List, Optional, Dict, Any
 import json
-from src.config.database import db_config
+from src.config.database import db_config, vector_param
 from src.models.semantic_memory import UserPersona, SearchResult
 
 
@@ -28,7 +28,7 @@ class UserPersonaRepository:
                 persona.communication_style,
                 persona.interests,
                 persona.expertise_areas,
-                persona.embedding,
+                vector_param(persona.embedding),
                 json.dumps(persona.metadata)
             ))
             
@@ -82,7 +82,7 @@ class UserPersonaRepository:
                 persona.communication_style,
                 persona.interests,
                 persona.expertise_areas,
-                persona.embedding,
+                vector_param(persona.embedding),
                 json.dumps(persona.metadata),
                 persona.user_id
             ))
@@ -109,6 +109,7 @@ class UserPersonaRepository:
         min_similarity: float = 0.7
     ) -> List[SearchResult]:
         """Search for similar user personas using vector similarity"""
+        embedding = vector_param(embedding)
         with db_config.get_cursor() as cursor:
             cursor.execute("""
                 SELECT *,
@@ -2,7 +2,12 @@
 Bi-Encoder Re-Ranking Service
 Uses sentence transformers for fast semantic re-ranking with FAISS indexing
 """
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, TextIO, Tuple
+import asyncio
+import hashlib
+import os
+import sqlite3
+import sys
 import numpy as np
 
 # Optional dependencies
@@ -20,6 +25,151 @@ except ImportError:
     FAISS_AVAILABLE = False
     faiss = None
 
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    sparse = None
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_rows(query, matrix):
+        """Inner product of every matrix row with query, rows in parallel"""
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for i in prange(matrix.shape[0]):
+            total = np.float32(0.0)
+            for j in range(matrix.shape[1]):
+                total += query[j] * matrix[i, j]
+            scores[i] = total
+        return scores
+else:
+    def _score_rows(query, matrix):
+        """Inner product of every matrix row with query (numpy fallback)"""
+        return matrix @ query
+
+
+def normalize_rows(matrix: np.ndarray) -> None:
+    """L2-normalize the rows of a contiguous float32 matrix in place"""
+    if FAISS_AVAILABLE:
+        faiss.normalize_L2(matrix)
+    else:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+
+def cosine_topk(query: np.ndarray, matrix: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of matrix by inner product with query (cosine for unit rows)
+    
+    Args:
+        query: float32 query vector of shape (d,)
+        matrix: C-contiguous float32 document matrix of shape (n, d)
+        k: Number of results to return
+        
+    Returns:
+        (scores, indices) sorted by descending score
+    """
+    scores = _score_rows(query, matrix)
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return scores[:0], np.empty(0, dtype=np.int64)
+    # Partial selection is O(n); only the k winners get sorted
+    top = np.argpartition(scores, scores.shape[0] - k)[-k:]
+    top = top[np.argsort(scores[top])[::-1]]
+    return scores[top], top
+
+
+def cosine_topk_batch(queries: np.ndarray, matrix: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of matrix for every query row, scored with one matrix product
+    
+    Args:
+        queries: float32 query matrix of shape (q, d)
+        matrix: C-contiguous float32 document matrix of shape (n, d)
+        k: Number of results per query
+        
+    Returns:
+        (scores, indices), each of shape (q, k), sorted by descending score
+    """
+    scores = queries @ matrix.T
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(scores.dtype), empty.astype(np.int64)
+    top = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+class DiskEmbeddingCache:
+    """
+    Content-addressed embedding cache in SQLite
+    
+    Keys are `namespace:blake2b(text)`, where the namespace identifies the
+    model and its inference settings; values are raw float32 bytes.
+    """
+    
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "memory_system", "embeddings.sqlite3")
+    # Stay under SQLite's bound-parameter limit on older builds
+    LOOKUP_CHUNK = 500
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", self.DEFAULT_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self.conn.commit()
+    
+    @staticmethod
+    def _key(namespace: str, text: str) -> str:
+        return f"{namespace}:{hashlib.blake2b(text.encode('utf-8'), digest_size=20).hexdigest()}"
+    
+    def get_many(self, namespace: str, texts: List[str]) -> Dict[int, np.ndarray]:
+        """Cached embeddings by position in texts (misses are absent)"""
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            positions.setdefault(self._key(namespace, text), []).append(i)
+        
+        keys = list(positions)
+        found: Dict[int, np.ndarray] = {}
+        for start in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[start:start + self.LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                for i in positions[key]:
+                    found[i] = vector
+        return found
+    
+    def put_many(self, namespace: str, texts: List[str], embeddings: np.ndarray) -> None:
+        """Store one float32 embedding per text"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [
+                (self._key(namespace, text), np.asarray(vector, dtype=np.float32).tobytes())
+                for text, vector in zip(texts, embeddings)
+            ]
+        )
+        self.conn.commit()
+    
+    def close(self) -> None:
+        self.conn.close()
+
 
 class BiEncoderReranker:
     """
@@ -33,11 +183,32 @@ class BiEncoderReranker:
     - Detailed ranking visualization
     """
     
+    # Graph-optimized ONNX export shipped with the sentence-transformers models
+    ONNX_FILE_NAME = "onnx/model_O3.onnx"
+    # INT8 (VNNI) dynamically quantized ONNX export, used when quantize=True
+    ONNX_QUANTIZED_FILE_NAME = "onnx/model_qint8_avx512_vnni.onnx"
+    # transformers loading options for the torch backend
+    TORCH_MODEL_KWARGS = {"low_cpu_mem_usage": True}
+    # Above this corpus size build an approximate IVF+PQ index instead of exact IndexFlatIP
+    IVF_PQ_THRESHOLD = 10_000
+    IVF_NLIST = 256
+    PQ_SUBQUANTIZERS = 32
+    # IVF/PQ training needs a representative sample, not the whole corpus
+    IVF_TRAIN_SAMPLE = 100_000
+    # Dynamic batching for arerank(): flush at this many queries or after this wait
+    ASYNC_MAX_BATCH_SIZE = 32
+    ASYNC_MAX_WAIT_S = 0.005
+    
     def __init__(
         self,
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         batch_size: int = 32,
-        normalize_embeddings: bool = True
+        normalize_embeddings: bool = True,
+        dtype: Optional[str] = None,
+        backend: str = "torch",
+        quantize: bool = False,
+        embedding_cache: Optional[DiskEmbeddingCache] = None,
+        nprobe: int = 32
     ):
         """
         Initialize bi-encoder reranker
@@ -46,6 +217,16 @@ class BiEncoderReranker:
             model_name: Sentence transformer model name
             batch_size: Batch size for encoding
             normalize_embeddings: Whether to normalize embeddings for cosine similarity
+            dtype: Inference precision ("float16" or "bfloat16"); None keeps FP32.
+                On CPU, float16 runs as bfloat16 only where the CPU has native
+                BF16 support and stays FP32 otherwise; an explicit
+                "bfloat16" is always honored
+            backend: Inference runtime: "torch", "onnx" or "openvino"
+                (non-torch backends need sentence-transformers>=3.2 + optimum)
+            quantize: INT8 dynamic quantization for CPU inference (Linear
+                layers on torch, the qint8 export on onnx); overrides dtype
+            embedding_cache: Reuse document embeddings across build_index calls
+            nprobe: IVF lists scanned per query on large corpora (recall vs latency)
         """
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError(
@@ -56,14 +237,133 @@ class BiEncoderReranker:
         self.model_name = model_name
         self.batch_size = batch_size
         self.normalize_embeddings = normalize_embeddings
+        self.nprobe = nprobe
         
         print(f"🤖 Loading model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.backend = backend
+        self.quantize = quantize
+        self.model = self._load_model(model_name, backend)
+        self.precision = "int8" if quantize else "float32"
+        if quantize and self.backend == "torch":
+            self._quantize_dynamic()
+        elif dtype and self.backend == "torch":
+            self.precision = self._set_precision(dtype)
+        
+        # Cache entries are only valid for identical model + inference settings
+        self.embedding_cache = embedding_cache
+        self.cache_namespace = "|".join((
+            model_name,
+            self.backend,
+            self.precision,
+            "normalized" if normalize_embeddings else "raw"
+        ))
         
         self.documents: List[str] = []
         self.document_embeddings: Optional[np.ndarray] = None
         self.faiss_index = None
+        # Word -> column of the document/term incidence matrix (keyword baseline)
+        self.vocabulary: Dict[str, int] = {}
+        self.term_matrix = None
+        # arerank() dispatcher state, bound to the event loop that created it
+        self._encode_loop = None
+        self._encode_queue = None
+        self._encode_dispatcher = None
+        
+    def _load_model(self, model_name: str, backend: str):
+        """Load the model on the requested runtime, falling back to torch"""
+        if backend == "torch":
+            return self._load_torch_model(model_name)
+        
+        attempts = [{}]
+        if backend == "onnx":
+            # Prefer the pre-exported optimized graph; otherwise export once
+            file_name = self.ONNX_QUANTIZED_FILE_NAME if self.quantize else self.ONNX_FILE_NAME
+            attempts.insert(0, {"model_kwargs": {"file_name": file_name}})
+        
+        for kwargs in attempts:
+            try:
+                model = SentenceTransformer(model_name, backend=backend, **kwargs)
+                print(f"   Backend: {backend}")
+                return model
+            except Exception as e:
+                error = e
+        
+        print(f"⚠️  {backend} backend unavailable ({error}), using torch")
+        self.backend = "torch"
+        return self._load_torch_model(model_name)
+    
+    def _load_torch_model(self, model_name: str):
+        """Load torch weights straight into place, without a throwaway random init"""
+        try:
+            return SentenceTransformer(model_name, model_kwargs=self.TORCH_MODEL_KWARGS)
+        except TypeError:
+            # sentence-transformers < 3.0 has no model_kwargs
+            return SentenceTransformer(model_name)
+    
+    def _quantize_dynamic(self) -> None:
+        """Swap the transformer's Linear layers for INT8 dynamic-quantized ones"""
+        import torch
+        
+        if self.model.device.type != "cpu":
+            print("⚠️  INT8 dynamic quantization is CPU-only, keeping FP32")
+            return
+        transformer = self.model._first_module()
+        transformer.auto_model = torch.quantization.quantize_dynamic(
+            transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        print("   Precision: int8 (dynamic quantization)")
+    
+    def _set_precision(self, dtype: str) -> str:
+        """Cast the model weights to a half-precision dtype; returns the dtype used"""
+        import torch
+        
+        if dtype == "float16" and self.model.device.type != "cuda":
+            # CPUs lack fast FP16 kernels; BF16 only pays off with native support
+            # (AVX512-BF16/AMX), elsewhere it is emulated and slower than FP32
+            if not self._cpu_supports_bf16():
+                print("⚠️  No native BF16 on this CPU, keeping FP32")
+                return "float32"
+            dtype = "bfloat16"
+        self.model.to(getattr(torch, dtype))
+        print(f"   Precision: {dtype} on {self.model.device.type}")
+        return dtype
+    
+    @staticmethod
+    def _cpu_supports_bf16() -> bool:
+        """Whether oneDNN reports native BF16 support on this CPU"""
+        import torch
+        
+        try:
+            return (torch.backends.mkldnn.is_available()
+                    and torch.ops.mkldnn._is_mkldnn_bf16_supported())
+        except (AttributeError, RuntimeError):
+            return False
+    
+    def _encode_smart(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode texts as one contiguous FP32 matrix, normalized once
+        
+        SentenceTransformer.encode already length-sorts its input (smart
+        batching) and returns rows in input order.
+        """
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
         
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_tensor=True,
+            normalize_embeddings=False
+        )
+        # Similarity search always runs in FP32, whatever the model precision
+        embeddings = np.ascontiguousarray(embeddings.float().cpu().numpy())
+        if self.normalize_embeddings:
+            # Normalize once, in FP32: unit vectors make inner product == cosine,
+            # so IndexFlatIP/IVF scores need no per-search normalization
+            normalize_rows(embeddings)
+        return embeddings
+    
     def build_index(self, documents: List[str]) -> None:
         """
         Build FAISS index from documents
@@ -72,27 +372,105 @@ class BiEncoderReranker:
             documents: List of document strings to index
         """
         self.documents = documents
+        self._build_term_matrix(documents)
         
-        # Encode documents
-        print(f"📝 Encoding {len(documents)} documents...")
-        self.document_embeddings = self.model.encode(
-            documents,
-            batch_size=self.batch_size,
-            show_progress_bar=True,
-            normalize_embeddings=self.normalize_embeddings
-        )
+        # Encode documents (only cache misses when a cache is attached)
+        self.document_embeddings = self._encode_documents(documents)
         
         # Build FAISS index if available
         if FAISS_AVAILABLE:
             print(f"🔍 Building FAISS index...")
             dimension = self.document_embeddings.shape[1]
             
-            # Use IndexFlatIP for cosine similarity (with normalized embeddings)
-            self.faiss_index = faiss.IndexFlatIP(dimension)
-            self.faiss_index.add(self.document_embeddings.astype(np.float32))
+            if len(documents) > self.IVF_PQ_THRESHOLD:
+                self.faiss_index = self._build_ivf_pq_index(dimension)
+            else:
+                # Use IndexFlatIP for cosine similarity (with normalized embeddings)
+                self.faiss_index = faiss.IndexFlatIP(dimension)
+            self.faiss_index.add(self.document_embeddings)
             print(f"✅ FAISS index built with {self.faiss_index.ntotal} vectors")
         else:
-            print("⚠️  FAISS not available, using numpy for similarity search")
+            backend = "Numba" if NUMBA_AVAILABLE else "numpy"
+            print(f"⚠️  FAISS not available, using {backend} for similarity search")
+    
+    def _build_ivf_pq_index(self, dimension: int):
+        """Trained IVF+PQ inner-product index (approximate, ~1/8-1/32 the memory)"""
+        # PQ needs the dimension to split evenly into subquantizers
+        encoding = f"PQ{self.PQ_SUBQUANTIZERS}" if dimension % self.PQ_SUBQUANTIZERS == 0 else "Flat"
+        index = faiss.index_factory(
+            dimension, f"IVF{self.IVF_NLIST},{encoding}", faiss.METRIC_INNER_PRODUCT
+        )
+        
+        embeddings = self.document_embeddings
+        if len(embeddings) > self.IVF_TRAIN_SAMPLE:
+            sample = np.random.default_rng(0).choice(len(embeddings), self.IVF_TRAIN_SAMPLE, replace=False)
+            embeddings = embeddings[sample]
+        print(f"🏋️ Training IVF{self.IVF_NLIST},{encoding} on {len(embeddings)} vectors...")
+        index.train(embeddings)
+        index.nprobe = self.nprobe
+        return index
+    
+    def _encode_documents(self, documents: List[str]) -> np.ndarray:
+        """Document embeddings as one contiguous float32 matrix"""
+        if self.embedding_cache is None:
+            print(f"📝 Encoding {len(documents)} documents...")
+            # Contiguous float32 keeps the numpy/Numba scoring loop cache-friendly
+            return np.ascontiguousarray(
+                self._encode_smart(documents, show_progress_bar=True), dtype=np.float32
+            )
+        
+        cached = self.embedding_cache.get_many(self.cache_namespace, documents)
+        misses = [i for i in range(len(documents)) if i not in cached]
+        print(f"📝 Encoding {len(misses)} documents ({len(cached)} cached)...")
+        
+        embeddings = np.empty(
+            (len(documents), self.model.get_sentence_embedding_dimension()), dtype=np.float32
+        )
+        for i, vector in cached.items():
+            embeddings[i] = vector
+        if misses:
+            miss_texts = [documents[i] for i in misses]
+            encoded = self._encode_smart(miss_texts, show_progress_bar=True)
+            embeddings[misses] = encoded
+            self.embedding_cache.put_many(self.cache_namespace, miss_texts, encoded)
+        return embeddings
+    
+    def _build_term_matrix(self, documents: List[str]) -> None:
+        """Binary document x word matrix for the keyword-overlap baseline"""
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, doc in enumerate(documents):
+            for word in set(doc.lower().split()):
+                rows.append(i)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+        
+        shape = (len(documents), len(vocabulary))
+        if SCIPY_AVAILABLE:
+            self.term_matrix = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape
+            )
+        else:
+            self.term_matrix = np.zeros(shape, dtype=np.float32)
+            self.term_matrix[rows, cols] = 1.0
+        self.vocabulary = vocabulary
+    
+    def keyword_scores(self, query: str) -> np.ndarray:
+        """
+        Fraction of the query's words found in each document
+        
+        One (sparse) matrix-vector product over the matrix built in
+        build_index, instead of a set intersection per document.
+        """
+        if self.term_matrix is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        query_words = set(query.lower().split())
+        if not query_words:
+            return np.zeros(len(self.documents), dtype=np.float32)
+        
+        query_vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        query_vector[[self.vocabulary[w] for w in query_words if w in self.vocabulary]] = 1.0
+        return np.asarray(self.term_matrix @ query_vector).ravel() / len(query_words)
     
     def rerank(
         self,
@@ -115,43 +493,88 @@ class BiEncoderReranker:
             raise ValueError("Index not built. Call build_index() first.")
         
         # Encode query
-        query_embedding = self.model.encode(
-            [query],
-            normalize_embeddings=self.normalize_embeddings
-        )[0]
+        query_embedding = self.encode_query(query)
+        return self.rerank_embedding(query_embedding, top_k, score_threshold)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embed a single query (reusable with rerank_embedding)"""
+        return self._encode_smart([query])[0]
+    
+    def rerank_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 10,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Re-rank documents for an already encoded query (e.g. one query, several thresholds)"""
+        if self.document_embeddings is None:
+            raise ValueError("Index not built. Call build_index() first.")
         
-        # Search
-        if FAISS_AVAILABLE and self.faiss_index is not None:
-            # Use FAISS for fast search
-            scores, indices = self.faiss_index.search(
-                query_embedding.reshape(1, -1).astype(np.float32),
-                min(top_k * 2, len(self.documents))  # Get more for filtering
-            )
-            scores = scores[0]
-            indices = indices[0]
-        else:
-            # Fallback to numpy
-            scores = np.dot(self.document_embeddings, query_embedding)
-            indices = np.argsort(scores)[::-1][:top_k * 2]
-            scores = scores[indices]
+        query_embeddings = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        scores, indices = self._search(query_embeddings, top_k)
+        return self._build_results(scores[0], indices[0], top_k, score_threshold)
+    
+    async def arerank(
+        self,
+        query: str,
+        top_k: int = 10,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Re-rank documents for a query, batching the encode with concurrent callers
         
-        # Build results
-        results = []
-        for rank, (idx, score) in enumerate(zip(indices, scores), 1):
-            if score_threshold is not None and score < score_threshold:
+        Queries submitted within ASYNC_MAX_WAIT_S of each other (up to
+        ASYNC_MAX_BATCH_SIZE) share one forward pass.
+        """
+        if self.document_embeddings is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        
+        query_embedding = await self.aencode(query)
+        return self.rerank_embedding(query_embedding, top_k, score_threshold)
+    
+    async def aencode(self, text: str) -> np.ndarray:
+        """Queue text for the next dynamic encode batch and await its embedding"""
+        loop = asyncio.get_running_loop()
+        # One dispatcher per event loop (each asyncio.run() gets a fresh loop)
+        if self._encode_loop is not loop:
+            self._encode_loop = loop
+            self._encode_queue = asyncio.Queue()
+            self._encode_dispatcher = loop.create_task(self._dispatch_encodes(self._encode_queue))
+        
+        future = loop.create_future()
+        self._encode_queue.put_nowait((text, future))
+        return await future
+    
+    async def _dispatch_encodes(self, queue: "asyncio.Queue") -> None:
+        """Drain the queue into batches and encode each batch with one model call"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.ASYNC_MAX_WAIT_S
+            while len(batch) < self.ASYNC_MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Identical texts (e.g. one query at several thresholds) encode once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                # Keep the event loop responsive while the model runs
+                embeddings = await loop.run_in_executor(None, self._encode_smart, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
                 continue
             
-            if len(results) >= top_k:
-                break
-                
-            results.append({
-                'rank': rank,
-                'index': int(idx),
-                'document': self.documents[idx],
-                'score': float(score)
-            })
-        
-        return results
+            by_text = dict(zip(texts, embeddings))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
     
     def batch_rerank(
         self,
@@ -175,92 +598,101 @@ class BiEncoderReranker:
         
         # Encode all queries
         print(f"🔍 Encoding {len(queries)} queries...")
-        query_embeddings = self.model.encode(
-            queries,
-            batch_size=self.batch_size,
-            show_progress_bar=True,
-            normalize_embeddings=self.normalize_embeddings
+        query_embeddings = np.ascontiguousarray(
+            self._encode_smart(queries, show_progress_bar=True), dtype=np.float32
         )
         
-        # Search for each query
-        all_results = []
-        for query_embedding in query_embeddings:
-            if FAISS_AVAILABLE and self.faiss_index is not None:
-                scores, indices = self.faiss_index.search(
-                    query_embedding.reshape(1, -1).astype(np.float32),
-                    min(top_k * 2, len(self.documents))
-                )
-                scores = scores[0]
-                indices = indices[0]
-            else:
-                scores = np.dot(self.document_embeddings, query_embedding)
-                indices = np.argsort(scores)[::-1][:top_k * 2]
-                scores = scores[indices]
+        # Search all queries at once with a (num_queries, dim) matrix
+        all_scores, all_indices = self._search(query_embeddings, top_k)
+        
+        return [
+            self._build_results(scores, indices, top_k, score_threshold)
+            for scores, indices in zip(all_scores, all_indices)
+        ]
+    
+    def _search(self, query_embeddings: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top candidates (2x top_k, for threshold filtering) for a (num_queries, dim) matrix"""
+        if FAISS_AVAILABLE and self.faiss_index is not None:
+            # Use FAISS for fast search
+            return self.faiss_index.search(
+                query_embeddings,
+                min(top_k * 2, len(self.documents))  # Get more for filtering
+            )
+        # Fallback to Numba/numpy scoring with partial top-k selection
+        return cosine_topk_batch(query_embeddings, self.document_embeddings, top_k * 2)
+    
+    def _build_results(
+        self,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        top_k: int,
+        score_threshold: Optional[float]
+    ) -> List[Dict[str, Any]]:
+        """Turn one query's search hits into ranked result dicts"""
+        results = []
+        for rank, (idx, score) in enumerate(zip(indices, scores), 1):
+            # IVF searches pad with -1 when the probed lists hold fewer than k vectors
+            if idx < 0:
+                break
+            if score_threshold is not None and score < score_threshold:
+                continue
             
-            # Build results
-            results = []
-            for rank, (idx, score) in enumerate(zip(indices, scores), 1):
-                if score_threshold is not None and score < score_threshold:
-                    continue
+            if len(results) >= top_k:
+                break
                 
-                if len(results) >= top_k:
-                    break
-                    
-                results.append({
-                    'rank': rank,
-                    'index': int(idx),
-                    'document': self.documents[idx],
-                    'score': float(score)
-                })
-            
-            all_results.append(results)
+            results.append({
+                'rank': rank,
+                'index': int(idx),
+                'document': self.documents[idx],
+                'score': float(score)
+            })
         
-        return all_results
+        return results
     
     def print_ranking(
         self,
         query: str,
         results: List[Dict[str, Any]],
         show_documents: bool = True,
-        max_doc_length: Optional[int] = None
+        max_doc_length: Optional[int] = None,
+        file: Optional[TextIO] = None
     ) -> None:
-        """Print detailed ranking results"""
-        print(f"\n📊 Ranking Results for: \"{query}\"")
-        print(f"{'='*80}")
+        """Print detailed ranking results (one write to file, default stdout)"""
+        lines = [f"\n📊 Ranking Results for: \"{query}\"", f"{'='*80}"]
         
         if not results:
-            print("   No results found")
+            lines.append("   No results found")
+            (file or sys.stdout).write("\n".join(lines) + "\n")
             return
         
-        print(f"   Found {len(results)} results\n")
+        lines.append(f"   Found {len(results)} results\n")
         
         for r in results:
             doc = r['document']
             if max_doc_length and len(doc) > max_doc_length:
                 doc = doc[:max_doc_length] + "..."
             
-            print(f"   {r['rank']:2d}. [Score: {r['score']:.4f}] ", end="")
-            
-            if show_documents:
-                print(f"{doc}")
-            else:
-                print(f"Document #{r['index']}")
+            label = doc if show_documents else f"Document #{r['index']}"
+            lines.append(f"   {r['rank']:2d}. [Score: {r['score']:.4f}] {label}")
         
-        print(f"{'='*80}\n")
+        lines.append(f"{'='*80}\n")
+        (file or sys.stdout).write("\n".join(lines) + "\n")
     
     def print_ranking_comparison(
         self,
         query: str,
         original_ranking: List[Dict[str, Any]],
         reranked_results: List[Dict[str, Any]],
-        show_top_n: int = 10
+        show_top_n: int = 10,
+        file: Optional[TextIO] = None
     ) -> None:
-        """Compare original vs reranked results"""
-        print(f"\n🔄 Ranking Comparison for: \"{query}\"")
-        print(f"{'='*80}")
-        
-        print(f"\n{'Original Rank':^15} | {'Score':^10} | {'Reranked':^15} | {'Score':^10}")
-        print(f"{'-'*15}-+-{'-'*10}-+-{'-'*15}-+-{'-'*10}")
+        """Compare original vs reranked results (one write to file, default stdout)"""
+        lines = [
+            f"\n🔄 Ranking Comparison for: \"{query}\"",
+            f"{'='*80}",
+            f"\n{'Original Rank':^15} | {'Score':^10} | {'Reranked':^15} | {'Score':^10}",
+            f"{'-'*15}-+-{'-'*10}-+-{'-'*15}-+-{'-'*10}"
+        ]
         
         for i in range(min(show_top_n, max(len(original_ranking), len(reranked_results)))):
             # Original
@@ -281,9 +713,10 @@ class BiEncoderReranker:
                 rerank_text = "-"
                 rerank_score = "-"
             
-            print(f"{orig_text:^15} | {orig_score:^10} | {rerank_text:^15} | {rerank_score:^10}")
+            lines.append(f"{orig_text:^15} | {orig_score:^10} | {rerank_text:^15} | {rerank_score:^10}")
         
-        print(f"{'='*80}\n")
+        lines.append(f"{'='*80}\n")
+        (file or sys.stdout).write("\n".join(lines) + "\n")
 
 
 def get_recommended_config(profile: str = "balanced") -> Dict[str, Any]:
@@ -300,6 +733,9 @@ def get_recommended_config(profile: str = "balanced") -> Dict[str, Any]:
         "fast": {
             "model_name": "sentence-transformers/all-MiniLM-L6-v2",
             "batch_size": 64,
+            "backend": "onnx",
+            "dtype": "float16",
+            "nprobe": 8,
             "top_k": 10,
             "score_threshold": 0.60,
             "description": "Fast model for low-latency applications"
@@ -307,6 +743,7 @@ def get_recommended_config(profile: str = "balanced") -> Dict[str, Any]:
         "balanced": {
             "model_name": "sentence-transformers/all-MiniLM-L12-v2",
             "batch_size": 32,
+            "nprobe": 32,
             "top_k": 15,
             "score_threshold": 0.65,
             "description": "Balanced speed and quality"
@@ -314,6 +751,7 @@ def get_recommended_config(profile: str = "balanced") -> Dict[str, Any]:
         "quality": {
             "model_name": "BAAI/bge-base-en-v1.5",
             "batch_size": 16,
+            "nprobe": 64,
             "top_k": 20,
             "score_threshold": 0.70,
             "description": "High-quality embeddings for best results"
@@ -13,9 +13,15 @@ from typing import List, Dict, Any, Optional, Tuple, Set
 import numpy as np
 from collections import defaultdict
 import hashlib
+import heapq
 import re
 import warnings
 
+# Shared tokenizers for sentence scoring, compiled once
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+WORD_RE = re.compile(r'\w+')
+CONJUNCTION_SPLIT_RE = re.compile(r'\s+(?:and|or|but)\s+', re.IGNORECASE)
+
 
 class ContextOptimizer:
     """
@@ -214,8 +220,9 @@ class ContextOptimizer:
             # FIRST: Remove duplicate sentences within the content itself
             content = self._remove_duplicate_sentences(content, stats)
             
-            # THEN: Check for duplicate contexts
-            content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()
+            # THEN: Check for duplicate contexts (SHA-256 runs on SHA-NI via
+            # OpenSSL; raw digest bytes avoid building a hex string)
+            content_hash = hashlib.sha256(content.encode('utf-8')).digest()
             
             if content_hash not in seen_hashes:
                 seen_hashes.add(content_hash)
@@ -318,8 +325,6 @@ class ContextOptimizer:
     
     def _remove_duplicate_sentences(self, text: str, stats: Dict[str, Any]) -> str:
         """Remove duplicate sentences (exact text + semantic meaning)"""
-        import re
-        
         # Helper function to split text into clauses
         def split_into_clauses(text: str) -> List[str]:
             """Split text into analyzable clauses (lines, sentences, and compound clauses)"""
@@ -334,7 +339,7 @@ class ContextOptimizer:
                     continue
                 
                 # Split by sentence delimiters (. ! ?)
-                sentences = re.split(r'[.!?]+\s*', line)
+                sentences = SENTENCE_SPLIT_RE.split(line)
                 
                 for sentence in sentences:
                     sentence = sentence.strip()
@@ -343,7 +348,7 @@ class ContextOptimizer:
                     
                     # Split compound sentences by conjunctions (and, or, but)
                     # This catches: "My name is Sharan and Sharan is my name"
-                    parts = re.split(r'\s+(?:and|or|but)\s+', sentence, flags=re.IGNORECASE)
+                    parts = CONJUNCTION_SPLIT_RE.split(sentence)
                     
                     for part in parts:
                         part = part.strip()
@@ -362,14 +367,14 @@ class ContextOptimizer:
         
         # Track exact and semantic duplicates
         seen_exact = set()
-        seen_embeddings = []
+        seen_embeddings = []  # (unit embedding, clause) pairs
         unique_clauses = []
         duplicates_in_text = 0
         semantic_threshold = 0.88  # 88% similarity = semantic duplicate (slightly lower for clauses)
         
         for clause in clauses:
             # 1. Check exact duplicates (normalized)
-            clause_normalized = re.sub(r'[.!?,;:]+$', '', clause).lower().strip()
+            clause_normalized = clause.rstrip('.!?,;:').lower().strip()
             
             if clause_normalized in seen_exact:
                 duplicates_in_text += 1
@@ -379,16 +384,17 @@ class ContextOptimizer:
             is_semantic_duplicate = False
             if self.embedding_service and len(seen_embeddings) > 0:
                 try:
-                    current_embedding = self.embedding_service.get_embedding(clause)
+                    current_embedding = self._unit_vector(self.embedding_service.get_embedding(clause))
                     
-                    # Compare with existing clauses
-                    for existing_emb, existing_text in seen_embeddings:
-                        similarity = self._cosine_similarity(current_embedding, existing_emb)
-                        if similarity >= semantic_threshold:
-                            duplicates_in_text += 1
-                            is_semantic_duplicate = True
-                            print(f"   🔍 Semantic duplicate detected: '{clause}' ≈ '{existing_text}' (similarity: {similarity:.2%})")
-                            break
+                    # Compare with all existing clauses in one matrix-vector product
+                    similarities = np.array([emb for emb, _ in seen_embeddings]) @ current_embedding
+                    matches = np.flatnonzero(similarities >= semantic_threshold)
+                    if len(matches) > 0:
+                        similarity = similarities[matches[0]]
+                        existing_text = seen_embeddings[matches[0]][1]
+                        duplicates_in_text += 1
+                        is_semantic_duplicate = True
+                        print(f"   🔍 Semantic duplicate detected: '{clause}' ≈ '{existing_text}' (similarity: {similarity:.2%})")
                     
                     if not is_semantic_duplicate:
                         seen_embeddings.append((current_embedding, clause))
@@ -432,21 +438,17 @@ class ContextOptimizer:
                          for ctx in contexts]
         
         unique_contexts = []
-        unique_embeddings = []
+        unique_embeddings = []  # unit vectors, normalized once
         
         for i, (ctx, emb) in enumerate(zip(contexts, embeddings)):
-            is_duplicate = False
-            
-            for unique_emb in unique_embeddings:
-                similarity = self._cosine_similarity(emb, unique_emb)
-                if similarity >= self.similarity_threshold:
-                    is_duplicate = True
-                    stats['duplicates_removed'] += 1
-                    break
-            
-            if not is_duplicate:
-                unique_contexts.append(ctx)
-                unique_embeddings.append(emb)
+            emb = self._unit_vector(emb)
+            
+            if unique_embeddings and np.max(np.array(unique_embeddings) @ emb) >= self.similarity_threshold:
+                stats['duplicates_removed'] += 1
+                continue
+            
+            unique_contexts.append(ctx)
+            unique_embeddings.append(emb)
                 
         return unique_contexts
     
@@ -494,8 +496,12 @@ class ContextOptimizer:
         for ctx in contexts:
             content = self._get_content(ctx)
             
-            # Extract key sentences WITH surrounding context
-            compressed_content = self._extract_relevant_with_context(content, query)
+            # Extract key sentences WITH surrounding context, unless the
+            # search already returned a query-focused headline from SQL
+            if ctx.get('headline'):
+                compressed_content = ctx['headline']
+            else:
+                compressed_content = self._extract_relevant_with_context(content, query)
             
             # Remove redundant whitespace and formatting
             compressed_content = self._clean_text(compressed_content)
@@ -674,7 +680,7 @@ class ContextOptimizer:
     def _compute_simple_embedding(self, text: str) -> np.ndarray:
         """Compute a simple TF-based embedding (when proper embeddings unavailable)"""
         # Simple word frequency vector (first 100 most common words)
-        words = re.findall(r'\w+', text.lower())
+        words = WORD_RE.findall(text.lower())
         word_freq = defaultdict(float)
         for word in words:
             word_freq[word] += 1.0
@@ -698,6 +704,12 @@ class ContextOptimizer:
             
         return vector
     
+    def _unit_vector(self, vector) -> np.ndarray:
+        """Normalize once so later cosine checks are plain dot products"""
+        vector = np.asarray(vector, dtype=np.float64)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
     def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         """Calculate cosine similarity between two vectors"""
         if len(vec1) != len(vec2):
@@ -748,8 +760,8 @@ class ContextOptimizer:
         3. Preserve section headers
         4. Maintain semantic coherence
         """
-        sentences = [s.strip() for s in re.split(r'[.!?]+', content) if s.strip()]
-        query_words = set(re.findall(r'\w+', query.lower()))
+        sentences = [s.strip() for s in SENTENCE_SPLIT_RE.split(content) if s.strip()]
+        query_words = set(WORD_RE.findall(query.lower()))
         
         if not sentences:
             return content
@@ -760,8 +772,7 @@ class ContextOptimizer:
             if len(sentence) < 10:
                 continue
                 
-            sentence_words = set(re.findall(r'\w+', sentence.lower()))
-            overlap = len(query_words & sentence_words)
+            overlap = len(query_words.intersection(WORD_RE.findall(sentence.lower())))
             
             # Boost score for headers (short, capitalized)
             is_header = len(sentence.split()) <= 5 and sentence[0].isupper()
@@ -774,9 +785,9 @@ class ContextOptimizer:
             # Return first few sentences if no matches
             return '. '.join(sentences[:min(3, len(sentences))])
         
-        # Get top relevant sentence indices
-        scored_indices.sort(key=lambda x: x[1], reverse=True)
-        relevant_indices = set([idx for idx, _ in scored_indices[:5]])
+        # Get top relevant sentence indices (partial selection, no full sort)
+        top_scored = heapq.nlargest(5, scored_indices, key=lambda x: x[1])
+        relevant_indices = set(idx for idx, _ in top_scored)
         
         # Expand to include context window
         expanded_indices = set()
@@ -806,8 +817,8 @@ class ContextOptimizer:
     
     def _calculate_relevance(self, content: str, query: str) -> float:
         """Calculate relevance score between content and query"""
-        content_words = set(re.findall(r'\w+', content.lower()))
-        query_words = set(re.findall(r'\w+', query.lower()))
+        content_words = set(WORD_RE.findall(content.lower()))
+        query_words = set(WORD_RE.findall(query.lower()))
         
         if not query_words or not content_words:
             return 0.0
@@ -884,23 +895,26 @@ class SummarizationOptimizer:
     
     def _extractive_summary(self, text: str, query: str) -> str:
         """Extract most important sentences"""
-        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+        sentences = [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s.strip()]
         
         if not sentences:
             return text
         
         # Score sentences
-        query_words = set(re.findall(r'\w+', query.lower()))
+        query_words = set(WORD_RE.findall(query.lower()))
+        query_norm = max(len(query_words), 1)
+        first_position: Dict[str, int] = {}
         scored_sentences = []
         
-        for sentence in sentences:
-            sentence_words = set(re.findall(r'\w+', sentence.lower()))
+        for position, sentence in enumerate(sentences):
+            sentence_words = set(WORD_RE.findall(sentence.lower()))
             
             # Relevance to query
-            query_overlap = len(query_words & sentence_words) / max(len(query_words), 1)
+            query_overlap = len(query_words & sentence_words) / query_norm
             
-            # Position score (earlier sentences often more important)
-            position_score = 1.0 / (sentences.index(sentence) + 1)
+            # Position score (earlier sentences often more important); a
+            # repeated sentence keeps its first position without an O(S) index()
+            position_score = 1.0 / (first_position.setdefault(sentence, position) + 1)
             
             # Length score (prefer medium-length sentences)
             length_score = min(len(sentence) / 100, 1.0)
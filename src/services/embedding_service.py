@@ -2,9 +2,10 @@
 Embedding Service for generating vector embeddings
 Supports multiple embedding providers
 """
-from typing import List, Union
+from typing import Any, Dict, List, Union
 import os
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 
 class EmbeddingProvider(ABC):
@@ -72,38 +73,30 @@ class GroqEmbeddingProvider(EmbeddingProvider):
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding using deterministic hash-based approach"""
-        import hashlib
-        import struct
-        
-        # Create a deterministic hash-based embedding
-        hash_obj = hashlib.sha256(text.encode('utf-8'))
-        hash_bytes = hash_obj.digest()
-        
-        # Convert to 1536-dimensional vector
-        embedding = []
-        for i in range(1536):
-            # Use different parts of the hash with different seeds
-            seed = hash_bytes + i.to_bytes(4, 'big')
-            hash_val = hashlib.sha256(seed).digest()
-            # Convert bytes to integer then to float
-            int_val = int.from_bytes(hash_val[:8], byteorder='big')
-            # Normalize to [-1, 1] using modulo
-            normalized = (int_val % 2000000) / 1000000.0 - 1.0
-            embedding.append(normalized)
-        
-        # Normalize the vector to unit length
-        magnitude = sum(x**2 for x in embedding) ** 0.5
-        if magnitude > 0:
-            embedding = [x / magnitude for x in embedding]
-        else:
-            # Fallback to uniform distribution if all zeros
-            embedding = [1.0 / (1536 ** 0.5)] * 1536
-        
-        return embedding
+        return self.generate_embeddings([text])[0]
     
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
-        return [self.generate_embedding(text) for text in texts]
+        """Generate embeddings for multiple texts as one (n, 1536) matrix"""
+        import hashlib
+        import numpy as np
+        
+        if not texts:
+            return []
+        
+        # One SHAKE-128 expansion per text yields 8 bytes per dimension
+        raw = b''.join(hashlib.shake_128(text.encode('utf-8')).digest(1536 * 8) for text in texts)
+        int_vals = np.frombuffer(raw, dtype='>u8').reshape(len(texts), 1536)
+        
+        # Normalize to [-1, 1] using modulo
+        embeddings = (int_vals % 2000000) / 1000000.0 - 1.0
+        
+        # Unit-normalize all rows at once; all-zero rows fall back to uniform
+        magnitudes = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        zero_rows = magnitudes[:, 0] == 0
+        embeddings[zero_rows] = 1.0 / (1536 ** 0.5)
+        magnitudes[zero_rows] = 1.0
+        
+        return (embeddings / magnitudes).tolist()
 
 
 class MockEmbeddingProvider(EmbeddingProvider):
@@ -128,7 +121,14 @@ class MockEmbeddingProvider(EmbeddingProvider):
 class EmbeddingService:
     """Service for managing embeddings with configurable providers"""
     
+    # Max texts kept in the in-process embedding LRU cache
+    CACHE_SIZE = 4096
+    
     def __init__(self, provider: EmbeddingProvider = None):
+        self._embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
         if provider is None:
             # Priority: Groq > OpenAI > Mock
             if os.getenv('GROQ_API_KEY'):
@@ -161,16 +161,66 @@ class EmbeddingService:
         return MockEmbeddingProvider()
     
     def embed_text(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
+        """Generate embedding for a single text (served from cache when seen before)"""
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
-        return self.provider.generate_embedding(text)
+        
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        
+        embedding = self.provider.generate_embedding(text)
+        self._cache_put(text, embedding)
+        return list(embedding)
     
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+        """Generate embeddings for multiple texts; only cache misses hit the provider"""
         if not texts:
             return []
-        return self.provider.generate_embeddings(texts)
+        
+        results = [self._cache_get(text) for text in texts]
+        missing = [i for i, emb in enumerate(results) if emb is None]
+        
+        if missing:
+            embeddings = self.provider.generate_embeddings([texts[i] for i in missing])
+            for i, embedding in zip(missing, embeddings):
+                self._cache_put(texts[i], embedding)
+                results[i] = list(embedding)
+        
+        return results
+    
+    def _cache_get(self, text: str):
+        """Return a copy of the cached embedding for text, or None"""
+        embedding = self._embedding_cache.get(text)
+        if embedding is None:
+            self._cache_misses += 1
+            return None
+        self._embedding_cache.move_to_end(text)
+        self._cache_hits += 1
+        return list(embedding)
+    
+    def _cache_put(self, text: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entry when full"""
+        self._embedding_cache[text] = list(embedding)
+        if len(self._embedding_cache) > self.CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Embedding cache hit/miss counters"""
+        total = self._cache_hits + self._cache_misses
+        return {
+            'size': len(self._embedding_cache),
+            'max_size': self.CACHE_SIZE,
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+            'hit_rate': self._cache_hits / total if total else 0.0
+        }
+    
+    def clear_cache(self):
+        """Drop all cached embeddings (e.g. after switching providers)"""
+        self._embedding_cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
     
     def embed_user_persona(self, persona_data: dict) -> List[float]:
         """Generate embedding for user persona"""
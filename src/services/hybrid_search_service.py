@@ -4,7 +4,7 @@ Optimized for 10GB+ memory datasets with PostgreSQL full-text search
 """
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-from src.config.database import db_config
+from src.config.database import db_config, halfvec_param, set_hnsw_ef_search
 from src.services.embedding_service import EmbeddingService
 
 
@@ -62,16 +62,119 @@ class HybridSearchService:
         Returns:
             List of search results with combined scores
         """
-        # Get both BM25 and vector results
-        bm25_results = self._bm25_search(query, user_id, limit * 2, category, tags)
-        vector_results = self._vector_search(query, user_id, limit * 2, category, tags)
+        query_embedding = halfvec_param(self.embedding_service.embed_text(query))
         
-        # Combine and rank results
-        combined = self._combine_results(bm25_results, vector_results)
-        
-        # Filter by minimum score and limit
-        filtered = [r for r in combined if r['hybrid_score'] >= min_score]
-        return sorted(filtered, key=lambda x: x['hybrid_score'], reverse=True)[:limit]
+        with db_config.get_cursor() as cursor:
+            conditions = []
+            params: Dict[str, Any] = {
+                'query': query,
+                'embedding': query_embedding,
+                'candidates': limit * 2,
+                'bm25_weight': self.bm25_weight,
+                'vector_weight': self.vector_weight,
+                'min_score': min_score,
+                'limit': limit
+            }
+            
+            if user_id:
+                conditions.append("user_id = %(user_id)s")
+                params['user_id'] = user_id
+            
+            if category:
+                conditions.append("category = %(category)s")
+                params['category'] = category
+            
+            if tags:
+                conditions.append("tags && %(tags)s")
+                params['tags'] = tags
+            
+            where_clause = " AND ".join(conditions) if conditions else "TRUE"
+            
+            set_hnsw_ef_search(cursor, 'knowledge_base')
+            
+            # Both candidate lists, the merge, normalization, RRF and the
+            # final ranking all run in one statement
+            sql = f"""
+                WITH bm25 AS (
+                    SELECT id, bm25_score,
+                           ROW_NUMBER() OVER (ORDER BY bm25_score DESC) AS bm25_rank
+                    FROM (
+                        SELECT id,
+                               ts_rank_cd(content_tsv, plainto_tsquery('english', %(query)s), 32)::float8 AS bm25_score
+                        FROM knowledge_base
+                        WHERE content_tsv @@ plainto_tsquery('english', %(query)s)
+                            AND {where_clause}
+                        ORDER BY bm25_score DESC
+                        LIMIT %(candidates)s
+                    ) b
+                ),
+                vec AS (
+                    SELECT id, vector_score,
+                           ROW_NUMBER() OVER (ORDER BY vector_score DESC) AS vector_rank
+                    FROM (
+                        SELECT id,
+                               1 - (embedding <=> %(embedding)s::halfvec) AS vector_score
+                        FROM knowledge_base
+                        WHERE {where_clause}
+                        ORDER BY embedding <=> %(embedding)s::halfvec
+                        LIMIT %(candidates)s
+                    ) v
+                ),
+                merged AS (
+                    SELECT
+                        COALESCE(b.id, v.id) AS id,
+                        COALESCE(b.bm25_score, 0.0) AS bm25_score,
+                        COALESCE(b.bm25_score / NULLIF(MAX(b.bm25_score) OVER (), 0), 0.0) AS normalized_bm25,
+                        b.bm25_rank,
+                        COALESCE(1.0::float8 / (b.bm25_rank + 60), 0.0) AS bm25_rrf,  -- RRF with k=60
+                        COALESCE(v.vector_score, 0.0) AS vector_score,
+                        v.vector_rank,
+                        COALESCE(1.0::float8 / (v.vector_rank + 60), 0.0) AS vector_rrf
+                    FROM bm25 b
+                    FULL OUTER JOIN vec v ON b.id = v.id
+                ),
+                scored AS (
+                    SELECT m.*,
+                           0.7 * (%(bm25_weight)s * m.normalized_bm25 + %(vector_weight)s * m.vector_score)
+                           + 0.3 * (m.bm25_rrf + m.vector_rrf) AS hybrid_score
+                    FROM merged m
+                )
+                SELECT
+                    k.id,
+                    k.user_id,
+                    k.title,
+                    k.content,
+                    k.category,
+                    k.tags,
+                    k.content_type,
+                    k.confidence_score,
+                    k.importance_score,
+                    k.metadata,
+                    k.created_at,
+                    s.bm25_score,
+                    s.normalized_bm25,
+                    s.bm25_rank,
+                    s.bm25_rrf,
+                    s.vector_score,
+                    s.vector_rank,
+                    s.vector_rrf,
+                    s.hybrid_score,
+                    -- Query-focused snippet, built in C for the final rows only
+                    ts_headline('english', k.content, plainto_tsquery('english', %(query)s),
+                                'MaxFragments=1, MinWords=8, MaxWords=25, StartSel="", StopSel=""') AS headline
+                FROM scored s
+                JOIN knowledge_base k ON k.id = s.id
+                WHERE s.hybrid_score >= %(min_score)s
+                ORDER BY s.hybrid_score DESC
+                LIMIT %(limit)s
+            """
+            
+            # One prepared statement per filter combination (the SQL differs)
+            statement = "kb_hybrid_search_{}{}{}".format(
+                int(bool(user_id)), int(bool(category)), int(bool(tags))
+            )
+            db_config.execute_prepared(cursor, statement, sql, params)
+            return [dict(row) for row in cursor.fetchall()]
     
     def _bm25_search(
         self,
@@ -154,7 +257,7 @@ class HybridSearchService:
         Uses pgvector's HNSW index for efficient nearest neighbor search
         """
         # Generate query embedding
-        query_embedding = self.embedding_service.embed_text(query)
+        query_embedding = halfvec_param(self.embedding_service.embed_text(query))
         
         with db_config.get_cursor() as cursor:
             # Build query conditions
@@ -177,7 +280,7 @@ class HybridSearchService:
             
             # Use cosine similarity with HNSW index
             # Set ef_search parameter for search-time quality/speed tradeoff
-            cursor.execute("SET LOCAL hnsw.ef_search = 100")
+            set_hnsw_ef_search(cursor, 'knowledge_base')
             
             sql = f"""
                 SELECT 
@@ -192,10 +295,10 @@ class HybridSearchService:
                     importance_score,
                     metadata,
                     created_at,
-                    1 - (embedding <=> %s::vector) AS vector_score
+                    1 - (embedding <=> %s::halfvec) AS vector_score
                 FROM knowledge_base
                 WHERE {where_clause}
-                ORDER BY embedding <=> %s::vector
+                ORDER BY embedding <=> %s::halfvec
                 LIMIT %s
             """
             
@@ -205,77 +308,6 @@ class HybridSearchService:
             
             return [dict(row) for row in results]
     
-    def _combine_results(
-        self,
-        bm25_results: List[Dict[str, Any]],
-        vector_results: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """
-        Combine BM25 and vector search results using weighted scoring
-        
-        Uses Reciprocal Rank Fusion (RRF) combined with weighted scores
-        """
-        # Normalize scores for BM25 results
-        if bm25_results:
-            max_bm25 = max(r['bm25_score'] for r in bm25_results)
-            if max_bm25 > 0:
-                for r in bm25_results:
-                    r['normalized_bm25'] = float(r['bm25_score']) / max_bm25
-            else:
-                for r in bm25_results:
-                    r['normalized_bm25'] = 0.0
-        
-        # Create a dictionary to merge results by ID
-        merged: Dict[str, Dict[str, Any]] = {}
-        
-        # Add BM25 results
-        for rank, result in enumerate(bm25_results, 1):
-            doc_id = str(result['id'])
-            merged[doc_id] = {
-                **result,
-                'bm25_rank': rank,
-                'bm25_rrf': 1.0 / (rank + 60), # RRF with k=60
-                'vector_score': 0.0,
-                'vector_rank': None,
-                'vector_rrf': 0.0
-            }
-        
-        # Add/merge vector results
-        for rank, result in enumerate(vector_results, 1):
-            doc_id = str(result['id'])
-            vector_rrf = 1.0 / (rank + 60)
-            
-            if doc_id in merged:
-                merged[doc_id]['vector_score'] = float(result['vector_score'])
-                merged[doc_id]['vector_rank'] = rank
-                merged[doc_id]['vector_rrf'] = vector_rrf
-            else:
-                merged[doc_id] = {
-                    **result,
-                    'bm25_score': 0.0,
-                    'normalized_bm25': 0.0,
-                    'bm25_rank': None,
-                    'bm25_rrf': 0.0,
-                    'vector_rank': rank,
-                    'vector_rrf': vector_rrf
-                }
-        
-        # Calculate hybrid scores
-        for doc in merged.values():
-            # Weighted combination of normalized scores
-            weighted_score = (
-                self.bm25_weight * doc['normalized_bm25'] +
-                self.vector_weight * doc['vector_score']
-            )
-            
-            # RRF combination
-            rrf_score = doc['bm25_rrf'] + doc['vector_rrf']
-            
-            # Final hybrid score combines both
-            doc['hybrid_score'] = 0.7 * weighted_score + 0.3 * rrf_score
-        
-        return list(merged.values())
-    
     def search_knowledge(
         self,
         query: str,
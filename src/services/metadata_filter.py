@@ -29,6 +29,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 import re
 import json
+import hashlib
+from functools import lru_cache
 from dataclasses import dataclass, field
 
 
@@ -125,13 +127,142 @@ class FilterGroup:
         }
 
 
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Python-only regex escapes and their PostgreSQL (ARE) spelling; in a
+# PostgreSQL regex \b is a backspace, not a word boundary
+_PG_REGEX_ESCAPES = {r'\b': r'\y', r'\B': r'\Y'}
+_PY_REGEX_ESCAPE_RE = re.compile(r'\\\\|\\b|\\B')
+
+
+def _to_postgres_regex(pattern: str) -> str:
+    """Rewrite a Python regex for PostgreSQL's ~ / ~* operators"""
+    return _PY_REGEX_ESCAPE_RE.sub(
+        lambda m: _PG_REGEX_ESCAPES.get(m.group(0), m.group(0)), pattern
+    )
+
+
+@lru_cache(maxsize=256)
+def _compiled_pattern(pattern: str, flags: int) -> 're.Pattern':
+    """Compile each filter pattern once, not once per evaluated item"""
+    return re.compile(pattern, flags)
+
+
+# Lower/upper bound operators: of several on one field, only the tightest matters
+_LOWER_BOUNDS = (FilterOperator.GREATER_THAN, FilterOperator.GREATER_THAN_OR_EQUAL)
+_UPPER_BOUNDS = (FilterOperator.LESS_THAN, FilterOperator.LESS_THAN_OR_EQUAL)
+
+
+def _always_false() -> 'FilterGroup':
+    """A group no item satisfies: NOT (TRUE)"""
+    return FilterGroup(LogicalOperator.NOT, [FilterGroup(LogicalOperator.AND, [])])
+
+
+def _is_always_false(filter_spec: Any) -> bool:
+    return (
+        isinstance(filter_spec, FilterGroup)
+        and filter_spec.operator == LogicalOperator.NOT
+        and len(filter_spec.filters) == 1
+        and isinstance(filter_spec.filters[0], FilterGroup)
+        and filter_spec.filters[0].operator == LogicalOperator.AND
+        and not filter_spec.filters[0].filters
+    )
+
+
+def _drop_redundant_bounds(children: List[Any]) -> List[Any]:
+    """Within an AND, keep only the tightest same-operator bound per field"""
+    tightest: Dict[tuple, int] = {}
+    dropped = set()
+    for i, child in enumerate(children):
+        if not isinstance(child, MetadataFilter) or child.operator not in _LOWER_BOUNDS + _UPPER_BOUNDS:
+            continue
+        key = (child.field, child.operator)
+        if key not in tightest:
+            tightest[key] = i
+            continue
+        kept = children[tightest[key]]
+        try:
+            tighter = (child.value > kept.value) if child.operator in _LOWER_BOUNDS else (child.value < kept.value)
+        except TypeError:
+            continue  # incomparable values: keep both
+        if tighter:
+            dropped.add(tightest[key])
+            tightest[key] = i
+        else:
+            dropped.add(i)
+    return [child for i, child in enumerate(children) if i not in dropped]
+
+
+def _has_contradiction(children: List[Any]) -> bool:
+    """Within an AND, does one field have to equal two different values?"""
+    required: Dict[str, Any] = {}
+    for child in children:
+        if not (isinstance(child, MetadataFilter) and child.operator == FilterOperator.EQUALS
+                and child.case_sensitive):
+            continue
+        if child.field in required and required[child.field] != child.value:
+            return True
+        required.setdefault(child.field, child.value)
+    return False
+
+
+def _canonical_value(value: Any) -> Any:
+    """JSON form of non-JSON filter values for cache keys"""
+    if isinstance(value, datetime):
+        # Relative time filters (recent/time_window) get a new cutoff on every
+        # build; minute granularity lets them share cache entries
+        return value.replace(second=0, microsecond=0).isoformat()
+    if isinstance(value, (set, tuple)):
+        return sorted(value, key=str)
+    return str(value)
+
+
 class MetadataFilterEngine:
     """
     Main metadata filtering engine supporting multiple filtering techniques
     """
     
+    # Compiled WHERE templates keyed by filter shape, shared by all engines
+    _sql_template_cache: Dict[tuple, tuple] = {}
+    SQL_TEMPLATE_CACHE_SIZE = 512
+    # Matching-id lists cached in Redis under mf:{table}:{user_id}:{hash}
+    FILTER_CACHE_PREFIX = "mf"
+    FILTER_CACHE_TTL = 60  # seconds
+    # Longer ANY_OF lists are split into OR'ed && overlaps of this size: one
+    # long overlap can look unselective enough for the planner to skip GIN
+    ANY_OF_CHUNK_SIZE = 20
+    
+    # Rough fraction of rows an operator keeps, used when no pg_stats estimate
+    # is loaded for the field (see load_selectivity_stats)
+    DEFAULT_SELECTIVITY = {
+        FilterOperator.EQUALS: 0.05,
+        FilterOperator.IN: 0.1,
+        FilterOperator.IS_NULL: 0.1,
+        FilterOperator.ALL_OF: 0.1,
+        FilterOperator.ANY_OF: 0.2,
+        FilterOperator.STARTS_WITH: 0.2,
+        FilterOperator.BETWEEN: 0.25,
+        FilterOperator.CONTAINS: 0.3,
+        FilterOperator.ENDS_WITH: 0.3,
+        FilterOperator.REGEX: 0.3,
+        FilterOperator.GREATER_THAN: 0.33,
+        FilterOperator.GREATER_THAN_OR_EQUAL: 0.33,
+        FilterOperator.LESS_THAN: 0.33,
+        FilterOperator.LESS_THAN_OR_EQUAL: 0.33,
+        FilterOperator.NOT_CONTAINS: 0.7,
+        FilterOperator.NOT_BETWEEN: 0.75,
+        FilterOperator.NONE_OF: 0.8,
+        FilterOperator.NOT_IN: 0.9,
+        FilterOperator.IS_NOT_NULL: 0.9,
+        FilterOperator.NOT_EQUALS: 0.95,
+    }
+    
     def __init__(self):
         self.custom_operators: Dict[str, Callable] = {}
+        # field -> operator -> estimated selectivity, from pg_stats
+        self.selectivity_stats: Dict[str, Dict[FilterOperator, float]] = {}
     
     # ==================== Core Filtering Methods ====================
     
@@ -156,6 +287,8 @@ class MetadataFilterEngine:
         if isinstance(filter_spec, MetadataFilter):
             return [item for item in data if self._evaluate_filter(item, filter_spec)]
         elif isinstance(filter_spec, FilterGroup):
+            # Optimize once per call; most restrictive conditions short-circuit first
+            filter_spec = self.optimize(filter_spec)
             return [item for item in data if self._evaluate_group(item, filter_spec)]
         else:
             return data
@@ -222,7 +355,7 @@ class MetadataFilterEngine:
             elif operator == FilterOperator.ENDS_WITH:
                 return str(field_value).endswith(filter_value)
             elif operator == FilterOperator.REGEX:
-                pattern = re.compile(filter_value, re.IGNORECASE if not filter_obj.case_sensitive else 0)
+                pattern = _compiled_pattern(filter_value, re.IGNORECASE if not filter_obj.case_sensitive else 0)
                 return bool(pattern.search(str(field_value)))
             
             # Membership operators
@@ -260,11 +393,12 @@ class MetadataFilterEngine:
         if not group.filters:
             return True
         
-        results = [
+        # Lazy, so all()/any() stop at the first deciding condition
+        results = (
             self._evaluate_filter(item, f) if isinstance(f, MetadataFilter)
             else self._evaluate_group(item, f)
             for f in group.filters
-        ]
+        )
         
         if group.operator == LogicalOperator.AND:
             return all(results)
@@ -275,6 +409,108 @@ class MetadataFilterEngine:
         
         return False
     
+    # ==================== Filter Optimization ====================
+    
+    def optimize(
+        self,
+        filter_spec: Union[MetadataFilter, FilterGroup]
+    ) -> Union[MetadataFilter, FilterGroup]:
+        """
+        Canonicalize a filter tree (returns a new tree; the input is unchanged)
+        
+        - Nested AND/AND and OR/OR groups are flattened
+        - NOT(NOT(x, y)) becomes OR(x, y)
+        - Redundant bounds on a field keep only the tightest, e.g.
+          recent(1 hour) AND recent(1 day) -> recent(1 hour)
+        - Contradictory equalities (x == 'a' AND x == 'b') make the group
+          always false
+        - AND children are ordered most restrictive first
+        """
+        if not isinstance(filter_spec, FilterGroup):
+            return filter_spec
+        
+        children = [
+            self.optimize(f) if isinstance(f, FilterGroup) else f
+            for f in filter_spec.filters
+        ]
+        operator = filter_spec.operator
+        
+        # NOT(NOT(...)) == OR(...)
+        if (operator == LogicalOperator.NOT and len(children) == 1
+                and isinstance(children[0], FilterGroup)
+                and children[0].operator == LogicalOperator.NOT
+                and not _is_always_false(children[0])):
+            return self.optimize(FilterGroup(LogicalOperator.OR, list(children[0].filters)))
+        
+        if operator in (LogicalOperator.AND, LogicalOperator.OR):
+            flat = []
+            for child in children:
+                if (isinstance(child, FilterGroup) and child.operator == operator
+                        and child.filters and not _is_always_false(child)):
+                    flat.extend(child.filters)
+                else:
+                    flat.append(child)
+            children = flat
+        
+        if operator == LogicalOperator.AND:
+            if any(_is_always_false(child) for child in children):
+                return _always_false()
+            children = _drop_redundant_bounds(children)
+            if _has_contradiction(children):
+                return _always_false()
+            children.sort(key=self.estimated_selectivity)
+        elif operator == LogicalOperator.OR:
+            children = [child for child in children if not _is_always_false(child)]
+            if not children and filter_spec.filters:
+                return _always_false()
+        
+        return FilterGroup(operator, children)
+    
+    def estimated_selectivity(self, filter_spec: Union[MetadataFilter, FilterGroup]) -> float:
+        """Estimated fraction of rows a filter keeps (lower = more restrictive)"""
+        if isinstance(filter_spec, MetadataFilter):
+            field_stats = self.selectivity_stats.get(filter_spec.field, {})
+            return field_stats.get(
+                filter_spec.operator,
+                self.DEFAULT_SELECTIVITY.get(filter_spec.operator, 0.5)
+            )
+        if not isinstance(filter_spec, FilterGroup):
+            return 1.0
+        if _is_always_false(filter_spec):
+            return 0.0
+        
+        selectivities = [self.estimated_selectivity(f) for f in filter_spec.filters]
+        if not selectivities:
+            return 1.0
+        if filter_spec.operator == LogicalOperator.AND:
+            product = 1.0
+            for selectivity in selectivities:
+                product *= selectivity
+            return product
+        any_match = min(1.0, sum(selectivities))
+        return 1.0 - any_match if filter_spec.operator == LogicalOperator.NOT else any_match
+    
+    def load_selectivity_stats(self, cursor, table: str) -> None:
+        """Refresh equality/null selectivity estimates from the planner's pg_stats"""
+        cursor.execute("""
+            SELECT s.attname, s.null_frac, s.n_distinct, c.reltuples
+            FROM pg_stats s
+            JOIN pg_class c ON c.oid = to_regclass(quote_ident(s.schemaname) || '.' || quote_ident(s.tablename))
+            WHERE s.schemaname = current_schema() AND s.tablename = %s
+        """, (table,))
+        for row in cursor.fetchall():
+            null_frac = float(row['null_frac'] or 0.0)
+            n_distinct = float(row['n_distinct'] or 0.0)
+            # Negative n_distinct is a fraction of the row count
+            distinct = n_distinct if n_distinct > 0 else -n_distinct * max(float(row['reltuples']), 1.0)
+            equals = (1.0 - null_frac) / max(distinct, 1.0)
+            self.selectivity_stats[row['attname']] = {
+                FilterOperator.EQUALS: equals,
+                FilterOperator.NOT_EQUALS: 1.0 - null_frac - equals,
+                FilterOperator.IS_NULL: null_frac,
+                FilterOperator.IS_NOT_NULL: 1.0 - null_frac,
+            }
+    
     # ==================== SQL Generation ====================
     
     def to_sql_where(
@@ -285,11 +521,71 @@ class MetadataFilterEngine:
         """
         Convert filter specification to SQL WHERE clause
         
+        The WHERE text depends only on the filter's shape (fields, operators,
+        nesting), so it is compiled once per shape and cached; repeated calls
+        only bind the new values. The stable SQL text also lets the server
+        reuse its cached plan.
+        
         Returns:
             Tuple of (where_clause, parameters_dict)
         """
-        params = {}
+        filter_spec = self.optimize(filter_spec)
+        leaves: List[MetadataFilter] = []
+        key = (param_prefix, self._filter_shape(filter_spec, leaves))
+        
+        template = self._sql_template_cache.get(key)
+        if template is None:
+            template = self._compile_sql_where(filter_spec, param_prefix)
+            if len(self._sql_template_cache) >= self.SQL_TEMPLATE_CACHE_SIZE:
+                self._sql_template_cache.clear()
+            self._sql_template_cache[key] = template
+        
+        where_clause, binders = template
+        params = {
+            param_name: bind(leaves[leaf].value)
+            for param_name, leaf, bind in binders
+        }
+        return where_clause, params
+    
+    def _filter_shape(
+        self,
+        filter_spec: Union[MetadataFilter, FilterGroup],
+        leaves: List[MetadataFilter]
+    ) -> tuple:
+        """Hashable shape of a filter tree (no values); collects leaves in SQL order"""
+        if isinstance(filter_spec, MetadataFilter):
+            leaves.append(filter_spec)
+            shape = (filter_spec.field, filter_spec.operator, filter_spec.case_sensitive)
+            if filter_spec.operator == FilterOperator.ANY_OF:
+                shape += (self._any_of_chunks(filter_spec.value),)
+            return shape
+        return (filter_spec.operator, tuple(
+            self._filter_shape(f, leaves)
+            for f in filter_spec.filters
+            if isinstance(f, (MetadataFilter, FilterGroup))
+        ))
+    
+    def _any_of_chunks(self, value: Any) -> int:
+        """Number of && overlaps an ANY_OF value is split into"""
+        if isinstance(value, (list, tuple)) and len(value) > self.ANY_OF_CHUNK_SIZE:
+            return -(-len(value) // self.ANY_OF_CHUNK_SIZE)
+        return 1
+    
+    def _compile_sql_where(
+        self,
+        filter_spec: Union[MetadataFilter, FilterGroup],
+        param_prefix: str
+    ) -> tuple:
+        """
+        Build the WHERE template for a filter shape
+        
+        Returns:
+            Tuple of (where_clause, binders); each binder is
+            (param_name, leaf_index, value -> parameter)
+        """
+        binders = []
         param_counter = [0]  # Mutable counter
+        leaf_counter = [0]
         
         def get_param_name():
             param_counter[0] += 1
@@ -298,7 +594,12 @@ class MetadataFilterEngine:
         def build_condition(filter_obj: MetadataFilter) -> str:
             field = filter_obj.field
             op = filter_obj.operator
-            value = filter_obj.value
+            leaf = leaf_counter[0]
+            leaf_counter[0] += 1
+            
+            def bind(param_name, transform=_identity):
+                binders.append((param_name, leaf, transform))
+                return f"%({param_name})s"
             
             # Handle JSONB fields (metadata.key)
             if '.' in field and field.startswith('metadata.'):
@@ -307,6 +608,9 @@ class MetadataFilterEngine:
             else:
                 field_sql = field
             
+            like = "LIKE" if filter_obj.case_sensitive else "ILIKE"
+            regex_match = "~" if filter_obj.case_sensitive else "~*"
+            
             # Null checks
             if op == FilterOperator.IS_NULL:
                 return f"{field_sql} IS NULL"
@@ -316,57 +620,57 @@ class MetadataFilterEngine:
             # Equality
             param_name = get_param_name()
             if op == FilterOperator.EQUALS:
-                params[param_name] = value
-                return f"{field_sql} = %({param_name})s"
+                return f"{field_sql} = {bind(param_name)}"
             elif op == FilterOperator.NOT_EQUALS:
-                params[param_name] = value
-                return f"{field_sql} != %({param_name})s"
+                return f"{field_sql} != {bind(param_name)}"
             
             # Comparison
             elif op == FilterOperator.GREATER_THAN:
-                params[param_name] = value
-                return f"{field_sql} > %({param_name})s"
+                return f"{field_sql} > {bind(param_name)}"
             elif op == FilterOperator.GREATER_THAN_OR_EQUAL:
-                params[param_name] = value
-                return f"{field_sql} >= %({param_name})s"
+                return f"{field_sql} >= {bind(param_name)}"
             elif op == FilterOperator.LESS_THAN:
-                params[param_name] = value
-                return f"{field_sql} < %({param_name})s"
+                return f"{field_sql} < {bind(param_name)}"
             elif op == FilterOperator.LESS_THAN_OR_EQUAL:
-                params[param_name] = value
-                return f"{field_sql} <= %({param_name})s"
+                return f"{field_sql} <= {bind(param_name)}"
             
             # Range
             elif op == FilterOperator.BETWEEN:
                 param1, param2 = get_param_name(), get_param_name()
-                params[param1] = value[0]
-                params[param2] = value[1]
-                return f"{field_sql} BETWEEN %({param1})s AND %({param2})s"
+                low = bind(param1, lambda value: value[0])
+                high = bind(param2, lambda value: value[1])
+                return f"{field_sql} BETWEEN {low} AND {high}"
             
-            # String matching
+            # String matching (pg_trgm GIN indexes serve LIKE/ILIKE and ~/~*)
             elif op == FilterOperator.CONTAINS:
-                params[param_name] = f"%{value}%"
-                return f"{field_sql} LIKE %({param_name})s"
+                return f"{field_sql} {like} {bind(param_name, lambda value: f'%{value}%')}"
             elif op == FilterOperator.STARTS_WITH:
-                params[param_name] = f"{value}%"
-                return f"{field_sql} LIKE %({param_name})s"
+                return f"{field_sql} {like} {bind(param_name, lambda value: f'{value}%')}"
             elif op == FilterOperator.ENDS_WITH:
-                params[param_name] = f"%{value}"
-                return f"{field_sql} LIKE %({param_name})s"
+                return f"{field_sql} {like} {bind(param_name, lambda value: f'%{value}')}"
             elif op == FilterOperator.REGEX:
-                params[param_name] = value
-                return f"{field_sql} ~ %({param_name})s"
+                return f"{field_sql} {regex_match} {bind(param_name, _to_postgres_regex)}"
             
             # Array operations
             elif op == FilterOperator.IN:
-                params[param_name] = tuple(value) if isinstance(value, list) else value
-                return f"{field_sql} IN %({param_name})s"
+                in_param = bind(param_name, lambda value: tuple(value) if isinstance(value, list) else value)
+                return f"{field_sql} IN {in_param}"
             elif op == FilterOperator.ANY_OF:
-                params[param_name] = value
-                return f"{field_sql} && %({param_name})s"  # PostgreSQL array overlap
+                chunks = self._any_of_chunks(filter_obj.value)
+                if chunks == 1:
+                    return f"{field_sql} && {bind(param_name)}"  # PostgreSQL array overlap
+                # Long list: OR of short overlaps, each its own GIN bitmap probe
+                size = self.ANY_OF_CHUNK_SIZE
+                overlaps = [
+                    f"{field_sql} && " + bind(
+                        param_name if i == 0 else get_param_name(),
+                        lambda value, start=i * size: list(value[start:start + size])
+                    )
+                    for i in range(chunks)
+                ]
+                return f"({' OR '.join(overlaps)})"
             elif op == FilterOperator.ALL_OF:
-                params[param_name] = value
-                return f"{field_sql} @> %({param_name})s"  # PostgreSQL array contains
+                return f"{field_sql} @> {bind(param_name)}"  # PostgreSQL array contains
             
             return "TRUE"
         
@@ -395,7 +699,59 @@ class MetadataFilterEngine:
         else:
             where_clause = build_group(filter_spec)
         
-        return where_clause, params
+        return where_clause, binders
+    
+    # ==================== Filter Result Cache ====================
+    
+    def filter_cache_key(
+        self,
+        table: str,
+        filter_spec: Union[MetadataFilter, FilterGroup],
+        user_id: str
+    ) -> str:
+        """Redis key for a (table, user, filter) result set"""
+        canonical = json.dumps(filter_spec.to_dict(), sort_keys=True, default=_canonical_value)
+        digest = hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{self.FILTER_CACHE_PREFIX}:{table}:{user_id}:{digest}"
+    
+    def cached_matching_ids(
+        self,
+        redis_client,
+        cursor,
+        table: str,
+        filter_spec: Union[MetadataFilter, FilterGroup],
+        user_id: str,
+        ttl: int = FILTER_CACHE_TTL
+    ) -> List[int]:
+        """
+        Ids of the user's rows in table matching filter_spec, cached in Redis
+        
+        Repeated filters (same user, same conditions) skip the filter scan for
+        ttl seconds; results may be up to ttl seconds stale.
+        """
+        key = self.filter_cache_key(table, filter_spec, user_id)
+        if redis_client:
+            try:
+                cached = redis_client.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            except Exception as e:
+                print(f"⚠️  Filter cache read error: {e}")
+        
+        where_clause, params = self.to_sql_where(filter_spec)
+        params['user_id'] = user_id
+        cursor.execute(
+            f"SELECT id FROM {table} WHERE user_id = %(user_id)s AND ({where_clause})",
+            params
+        )
+        ids = [row['id'] for row in cursor.fetchall()]
+        
+        if redis_client:
+            try:
+                redis_client.set(key, json.dumps(ids), ex=ttl)
+            except Exception as e:
+                print(f"⚠️  Filter cache write error: {e}")
+        return ids
     
     # ==================== Redis Filtering ====================
     
@@ -65,6 +65,22 @@ class ModelSelector:
             cur.close()
         except Exception as e:
             print(f"⚠️  Could not setup performance tracking: {e}")
+            return
+        
+        # Trigram index so the query_context ILIKE '%...%' lookup in
+        # _retrieve_performance_insights is an index probe instead of a sequential scan
+        try:
+            cur = self.db_connection.cursor()
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_model_perf_context_trgm
+                ON model_performance_log USING GIN (query_context gin_trgm_ops)
+            """)
+            self.db_connection.commit()
+            cur.close()
+        except Exception as e:
+            self.db_connection.rollback()
+            print(f"⚠️  Could not create trigram index: {e}")
     
     # Model registry with task-specific optimizations
     MODEL_REGISTRY = {
@@ -103,6 +119,11 @@ class ModelSelector:
             "reason": "Quick classification - Fast and accurate for categorization tasks",
             "use_case": "Content categorization, intent detection, routing"
         },
+        "acknowledgment": {
+            "model": "llama-3.1-8b-instant",
+            "reason": "Low latency - Short one- or two-sentence replies don't need a large model",
+            "use_case": "Storage acknowledgments, brief confirmations"
+        },
         "long_context": {
             "model": "mixtral-8x7b-32768",
             "reason": "Large context window (32K) - Handles extensive historical data",
@@ -2,7 +2,10 @@
 NLI-Based Contradiction Detection
 Uses Natural Language Inference models for advanced contradiction detection
 """
+from collections import OrderedDict
 from typing import List, Dict, Any, Tuple, Optional
+import hashlib
+import json
 import numpy as np
 
 # Optional dependencies
@@ -14,6 +17,13 @@ except ImportError:
     SentenceTransformer = None
     CrossEncoder = None
 
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+    faiss = None
+
 
 class NLIContradictionDetector:
     """
@@ -27,11 +37,24 @@ class NLIContradictionDetector:
     This is more accurate than simple negation pattern matching.
     """
     
+    # INT8 (VNNI) dynamically quantized ONNX export, used when quantize=True
+    ONNX_QUANTIZED_FILE_NAME = "onnx/model_qint8_avx512_vnni.onnx"
+    # Pairs per forward pass in detect_contradictions_batch
+    PREDICT_BATCH_SIZE = 32
+    # Redis score cache: key prefix and expiry
+    SCORE_CACHE_PREFIX = "nli"
+    SCORE_CACHE_TTL = 7 * 24 * 3600
+    
     def __init__(
         self,
         nli_model: str = "cross-encoder/nli-deberta-v3-small",
         contradiction_threshold: float = 0.5,
-        use_bidirectional: bool = True
+        use_bidirectional: bool = True,
+        backend: str = "torch",
+        quantize: bool = False,
+        dtype: Optional[str] = None,
+        redis_client=None,
+        cache_size: int = 1024
     ):
         """
         Initialize NLI-based contradiction detector
@@ -40,6 +63,16 @@ class NLIContradictionDetector:
             nli_model: Cross-encoder NLI model name
             contradiction_threshold: Threshold for contradiction score (0-1)
             use_bidirectional: Check both A→B and B→A for contradictions
+            backend: Inference runtime: "torch" or "onnx"
+                (onnx needs sentence-transformers>=4.1 + optimum)
+            quantize: INT8 weights for CPU inference (dynamic quantization of
+                every Linear layer, classifier head included, on torch; the
+                qint8 export on onnx)
+            dtype: GPU inference precision: "bfloat16", "float16" or "auto"
+                (bfloat16 where supported, else float16); FP32 on CPU, where
+                quantize is the faster option
+            redis_client: Share NLI scores across processes and runs (optional)
+            cache_size: Text pairs whose scores are kept in memory (LRU)
         """
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError(
@@ -52,7 +85,16 @@ class NLIContradictionDetector:
         self.use_bidirectional = use_bidirectional
         
         print(f"🔬 Loading NLI model: {nli_model}")
-        self.model = CrossEncoder(nli_model)
+        self.backend = backend
+        self.quantize = quantize
+        # Precision actually in effect; set by the loaders below
+        self.precision = "float32"
+        self.model = self._load_model(nli_model, backend)
+        on_cuda = self.backend == "torch" and self._device_type() == "cuda"
+        if quantize and self.backend == "torch" and not on_cuda:
+            self._quantize_dynamic()
+        elif dtype and on_cuda:
+            self._set_precision(dtype)
         print(f"✅ NLI model loaded successfully")
         
         # Label mapping (model-dependent, but common structure)
@@ -62,6 +104,67 @@ class NLIContradictionDetector:
             1: "entailment", 
             2: "neutral"
         }
+        
+        # Raw NLI scores per ordered (text1, text2) pair; the decision is
+        # re-derived on every call, so threshold changes never go stale
+        self.redis_client = redis_client
+        self.cache_size = cache_size
+        # Shared Redis entries are only valid for identical model + inference settings
+        self.cache_namespace = "|".join((nli_model, self.backend, self.precision))
+        self._score_cache: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+    
+    def _load_model(self, nli_model: str, backend: str):
+        """Load the cross-encoder on the requested runtime, falling back to torch"""
+        if backend == "torch":
+            return CrossEncoder(nli_model)
+        
+        attempts = [{}]
+        if backend == "onnx" and self.quantize:
+            attempts.insert(0, {"model_kwargs": {"file_name": self.ONNX_QUANTIZED_FILE_NAME}})
+        
+        for kwargs in attempts:
+            try:
+                model = CrossEncoder(nli_model, backend=backend, **kwargs)
+                print(f"   Backend: {backend}")
+                if kwargs:
+                    self.precision = "int8"
+                return model
+            except Exception as e:
+                error = e
+        
+        print(f"⚠️  {backend} backend unavailable ({error}), using torch")
+        self.backend = "torch"
+        return CrossEncoder(nli_model)
+    
+    def _quantize_dynamic(self) -> None:
+        """Swap the classifier's Linear layers for INT8 dynamic-quantized ones"""
+        import torch
+        
+        if self._device_type() != "cpu":
+            print("⚠️  INT8 dynamic quantization is CPU-only, keeping FP32")
+            return
+        self.model.model = torch.quantization.quantize_dynamic(
+            self.model.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        self.precision = "int8"
+        print("   Precision: int8 (dynamic quantization)")
+    
+    def _device_type(self) -> str:
+        """Device type ("cpu", "cuda", ...) the cross-encoder weights live on"""
+        return next(self.model.model.parameters()).device.type
+    
+    def _set_precision(self, dtype: str) -> None:
+        """Cast the cross-encoder weights to a half-precision dtype on CUDA"""
+        import torch
+        
+        if dtype in ("auto", "bfloat16") and not torch.cuda.is_bf16_supported():
+            # Pre-Ampere GPUs: FP16 tensor cores instead of emulated BF16
+            dtype = "float16"
+        elif dtype == "auto":
+            dtype = "bfloat16"
+        self.model.model.to(getattr(torch, dtype))
+        self.precision = dtype
+        print(f"   Precision: {dtype} on cuda")
     
     def detect_contradiction(
         self,
@@ -81,11 +184,7 @@ class NLIContradictionDetector:
             (is_contradiction, details_dict) tuple
         """
         # Get NLI scores
-        scores = self.model.predict([[text1, text2]])
-        
-        if isinstance(scores, np.ndarray):
-            if len(scores.shape) > 1:
-                scores = scores[0]
+        scores = self._pair_scores([(text1, text2)])[0]
         
         # Get contradiction score (usually index 0)
         contradiction_score = float(scores[0] if len(scores) > 0 else 0.0)
@@ -94,10 +193,7 @@ class NLIContradictionDetector:
         
         # Bidirectional check if enabled
         if self.use_bidirectional and not is_contradiction:
-            scores_reverse = self.model.predict([[text2, text1]])
-            if isinstance(scores_reverse, np.ndarray):
-                if len(scores_reverse.shape) > 1:
-                    scores_reverse = scores_reverse[0]
+            scores_reverse = self._pair_scores([(text2, text1)])[0]
             
             contradiction_score_reverse = float(scores_reverse[0] if len(scores_reverse) > 0 else 0.0)
             is_contradiction = contradiction_score_reverse > self.contradiction_threshold
@@ -120,10 +216,105 @@ class NLIContradictionDetector:
         
         return is_contradiction, details
     
+    def _score_cache_key(self, pair: Tuple[str, str]) -> str:
+        """Redis key for one ordered text pair under this model and precision"""
+        digest = hashlib.blake2b(
+            "\x1f".join((self.cache_namespace,) + tuple(pair)).encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+        return f"{self.SCORE_CACHE_PREFIX}:{digest}"
+    
+    def _pair_scores(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """
+        NLI scores for text pairs: memory LRU, then Redis, then the model
+        
+        Only pairs missing from both caches reach the cross-encoder, in one
+        length-sorted call.
+        """
+        rows: Dict[int, np.ndarray] = {}
+        misses = []
+        for i, pair in enumerate(pairs):
+            cached = self._score_cache.get(pair)
+            if cached is None:
+                misses.append(i)
+            else:
+                self._score_cache.move_to_end(pair)
+                rows[i] = cached
+        
+        if misses and self.redis_client is not None:
+            try:
+                values = self.redis_client.mget([self._score_cache_key(pairs[i]) for i in misses])
+                for i, value in zip(misses, values):
+                    if value is not None:
+                        rows[i] = np.asarray(json.loads(value), dtype=np.float32)
+                        self._remember(pairs[i], rows[i])
+                misses = [i for i in misses if i not in rows]
+            except Exception as e:
+                print(f"⚠️  NLI score cache unavailable ({e}), continuing without Redis")
+                self.redis_client = None
+        
+        if misses:
+            predicted = self._predict_length_sorted([pairs[i] for i in misses])
+            for i, row in zip(misses, predicted):
+                rows[i] = row
+                self._remember(pairs[i], row)
+            
+            if self.redis_client is not None:
+                try:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for i, row in zip(misses, predicted):
+                        pipe.set(self._score_cache_key(pairs[i]), json.dumps(row.tolist()), ex=self.SCORE_CACHE_TTL)
+                    pipe.execute()
+                except Exception as e:
+                    print(f"⚠️  NLI score cache write error: {e}")
+        
+        return np.vstack([rows[i] for i in range(len(pairs))])
+    
+    def _remember(self, pair: Tuple[str, str], scores: np.ndarray) -> None:
+        """Store scores in the in-memory LRU, evicting the oldest pair"""
+        self._score_cache[pair] = scores
+        self._score_cache.move_to_end(pair)
+        if len(self._score_cache) > self.cache_size:
+            self._score_cache.popitem(last=False)
+    
+    def _predict_length_sorted(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """
+        NLI scores for text pairs, predicted in token-length order
+        
+        Each batch then holds pairs of similar length, so it is padded only
+        to its own longest pair; rows are returned in input order.
+        """
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is not None:
+            token_ids = tokenizer(
+                [a for a, _ in pairs],
+                [b for _, b in pairs],
+                truncation=True
+            )['input_ids']
+            lengths = [len(ids) for ids in token_ids]
+        else:
+            lengths = [len(a) + len(b) for a, b in pairs]
+        
+        order = np.argsort(lengths, kind='stable')
+        sorted_scores = self.model.predict(
+            [list(pairs[i]) for i in order],
+            batch_size=self.PREDICT_BATCH_SIZE,
+            show_progress_bar=False,
+            convert_to_tensor=True
+        )
+        # Scores are compared and cached in FP32, whatever the model precision
+        sorted_scores = sorted_scores.float().cpu().numpy().reshape(len(pairs), -1)
+        
+        scores = np.empty_like(sorted_scores)
+        scores[order] = sorted_scores
+        return scores
+    
     def detect_contradictions_batch(
         self,
         contexts: List[Dict[str, Any]],
-        content_key: str = 'content'
+        content_key: str = 'content',
+        candidate_embeddings: Optional[np.ndarray] = None,
+        gate_threshold: float = 0.35
     ) -> List[Dict[str, Any]]:
         """
         Detect contradictions across multiple contexts
@@ -131,6 +322,11 @@ class NLIContradictionDetector:
         Args:
             contexts: List of context dictionaries
             content_key: Key to access text content in each context
+            candidate_embeddings: Normalized bi-encoder embeddings, one row per
+                context (e.g. UnifiedSemanticProcessor.compute_embeddings); pairs
+                at or below gate_threshold cosine skip the NLI model
+            gate_threshold: Minimum cosine similarity for a pair to be checked
+                (contradictions share a topic, unrelated pairs are neutral)
             
         Returns:
             Contexts with contradiction flags added
@@ -144,60 +340,90 @@ class NLIContradictionDetector:
         print(f"{'='*70}\n")
         
         contradictions_found = 0
-        pairs_checked = 0
         
-        # Compare each pair
+        # Cheap bi-encoder gate: one matrix product instead of a cross-encoder call per pair
+        similarity = None
+        if candidate_embeddings is not None:
+            candidate_embeddings = np.asarray(candidate_embeddings, dtype=np.float32)
+            similarity = candidate_embeddings @ candidate_embeddings.T
+        pairs_pruned = 0
+        
+        # Collect every pair first, so they can be scored in length-sorted batches
+        pairs = []
         for i, ctx1 in enumerate(contexts):
             content1 = ctx1.get(content_key, '')
             if not content1 or len(content1.strip()) < 10:
                 continue
             
             for j in range(i + 1, len(contexts)):
-                ctx2 = contexts[j]
-                content2 = ctx2.get(content_key, '')
+                content2 = contexts[j].get(content_key, '')
                 if not content2 or len(content2.strip()) < 10:
                     continue
-                
-                pairs_checked += 1
-                
-                # Check for contradiction
-                is_contradiction, details = self.detect_contradiction(
-                    content1, 
-                    content2,
-                    return_details=True
+                if similarity is not None and similarity[i, j] <= gate_threshold:
+                    pairs_pruned += 1
+                    continue
+                pairs.append((i, j))
+        pairs_checked = len(pairs)
+        
+        texts = [(contexts[i][content_key], contexts[j][content_key]) for i, j in pairs]
+        scores = self._pair_scores(texts) if texts else np.empty((0, 3))
+        contradiction_scores = scores[:, 0].copy() if len(scores) else np.empty(0)
+        flags = contradiction_scores > self.contradiction_threshold
+        
+        # Bidirectional check, only for pairs the forward pass did not flag
+        if self.use_bidirectional:
+            pending = np.flatnonzero(~flags)
+            if len(pending):
+                reverse = self._pair_scores(
+                    [(texts[k][1], texts[k][0]) for k in pending]
+                )[:, 0]
+                hits = reverse > self.contradiction_threshold
+                flags[pending[hits]] = True
+                contradiction_scores[pending[hits]] = np.maximum(
+                    contradiction_scores[pending[hits]], reverse[hits]
                 )
-                
-                if is_contradiction:
-                    # Flag both contexts
-                    if 'contradicts_with' not in ctx1:
-                        ctx1['contradicts_with'] = []
-                    if 'contradicts_with' not in ctx2:
-                        ctx2['contradicts_with'] = []
+        
+        for k in np.flatnonzero(flags):
+            i, j = pairs[k]
+            ctx1, ctx2 = contexts[i], contexts[j]
+            content1, content2 = texts[k]
+            details = {
+                'contradiction_score': float(contradiction_scores[k]),
+                'predicted_label': self.label_mapping.get(int(np.argmax(scores[k])), "unknown")
+            }
+            
+            # Flag both contexts
+            if 'contradicts_with' not in ctx1:
+                ctx1['contradicts_with'] = []
+            if 'contradicts_with' not in ctx2:
+                ctx2['contradicts_with'] = []
                     
-                    ctx1['contradicts_with'].append({
-                        'index': j,
-                        'score': details['contradiction_score']
-                    })
-                    ctx2['contradicts_with'].append({
-                        'index': i,
-                        'score': details['contradiction_score']
-                    })
+            ctx1['contradicts_with'].append({
+                'index': j,
+                'score': details['contradiction_score']
+            })
+            ctx2['contradicts_with'].append({
+                'index': i,
+                'score': details['contradiction_score']
+            })
                     
-                    ctx1['has_contradiction'] = True
-                    ctx2['has_contradiction'] = True
+            ctx1['has_contradiction'] = True
+            ctx2['has_contradiction'] = True
                     
-                    contradictions_found += 1
+            contradictions_found += 1
                     
-                    print(f"⚠️  CONTRADICTION DETECTED:")
-                    print(f"   Context {i} ↔ Context {j}")
-                    print(f"   Score: {details['contradiction_score']:.3f}")
-                    print(f"   Label: {details['predicted_label']}")
-                    print(f"   Text 1: {content1[:100]}...")
-                    print(f"   Text 2: {content2[:100]}...")
-                    print()
+            print(f"⚠️  CONTRADICTION DETECTED:")
+            print(f"   Context {i} ↔ Context {j}")
+            print(f"   Score: {details['contradiction_score']:.3f}")
+            print(f"   Label: {details['predicted_label']}")
+            print(f"   Text 1: {content1[:100]}...")
+            print(f"   Text 2: {content2[:100]}...")
+            print()
         
         print(f"{'='*70}")
         print(f"✅ NLI CONTRADICTION DETECTION COMPLETE")
+        if similarity is not None:
+            print(f"   ├─ Pairs pruned by bi-encoder gate: {pairs_pruned}")
         print(f"   ├─ Pairs checked: {pairs_checked}")
         print(f"   ├─ Contradictions found: {contradictions_found}")
         print(f"   └─ Contradiction rate: {(contradictions_found/pairs_checked*100) if pairs_checked > 0 else 0:.1f}%")
@@ -212,10 +438,19 @@ class UnifiedSemanticProcessor:
     Uses a single bi-encoder model for multiple tasks
     """
     
+    # INT8 exports, as written by sentence-transformers' export_dynamic_quantized_onnx_model
+    # and export_static_quantized_openvino_model (NNCF post-training quantization)
+    QUANTIZED_FILE_NAMES = {
+        "onnx": "onnx/model_qint8_avx512_vnni.onnx",
+        "openvino": "openvino/openvino_model_qint8_quantized.xml"
+    }
+    
     def __init__(
         self,
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
-        batch_size: int = 32
+        batch_size: int = 32,
+        backend: str = "torch",
+        quantize: bool = False
     ):
         """
         Initialize unified semantic processor
@@ -223,6 +458,9 @@ class UnifiedSemanticProcessor:
         Args:
             model_name: Sentence transformer model name
             batch_size: Batch size for encoding
+            backend: Inference runtime: "torch", "onnx" or "openvino"
+                (non-torch backends need sentence-transformers>=3.2 + optimum)
+            quantize: Load the INT8 export of the non-torch backend
         """
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError(
@@ -236,10 +474,33 @@ class UnifiedSemanticProcessor:
         print(f"🤖 UNIFIED SEMANTIC PROCESSOR")
         print(f"{'='*70}")
         print(f"Loading model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.backend = backend
+        self.quantize = quantize
+        self.model = self._load_model(model_name, backend)
         print(f"✅ Model loaded - unified for dedup + ranking")
         print(f"{'='*70}\n")
     
+    def _load_model(self, model_name: str, backend: str):
+        """Load the model on the requested runtime, falling back to torch"""
+        if backend == "torch":
+            return SentenceTransformer(model_name)
+        
+        attempts = [{}]
+        if self.quantize and backend in self.QUANTIZED_FILE_NAMES:
+            attempts.insert(0, {"model_kwargs": {"file_name": self.QUANTIZED_FILE_NAMES[backend]}})
+        
+        for kwargs in attempts:
+            try:
+                model = SentenceTransformer(model_name, backend=backend, **kwargs)
+                print(f"Backend: {backend}{' (int8)' if kwargs else ''}")
+                return model
+            except Exception as e:
+                error = e
+        
+        print(f"⚠️  {backend} backend unavailable ({error}), using torch")
+        self.backend = "torch"
+        return SentenceTransformer(model_name)
+    
     def compute_embeddings(
         self,
         texts: List[str],
@@ -284,19 +545,18 @@ class UnifiedSemanticProcessor:
         # Compute embeddings
         embeddings = self.compute_embeddings(texts)
         
-        # Find duplicates using cosine similarity
+        # Greedy in input order: each kept context removes its later near-duplicates
+        neighbors = self._similar_pairs(embeddings, threshold)
         to_remove = set()
         for i in range(len(embeddings)):
             if i in to_remove:
                 continue
-            for j in range(i + 1, len(embeddings)):
+            for j, similarity in neighbors.get(i, []):
                 if j in to_remove:
                     continue
                 
-                similarity = np.dot(embeddings[i], embeddings[j])
-                if similarity >= threshold:
-                    to_remove.add(j)
-                    print(f"   ├─ Duplicate: Context {j} similar to {i} ({similarity:.3f})")
+                to_remove.add(j)
+                print(f"   ├─ Duplicate: Context {j} similar to {i} ({similarity:.3f})")
         
         # Remove duplicates
         deduplicated = [ctx for i, ctx in enumerate(contexts) if i not in to_remove]
@@ -307,6 +567,37 @@ class UnifiedSemanticProcessor:
         
         return deduplicated, removed_count
     
+    @staticmethod
+    def _similar_pairs(embeddings: np.ndarray, threshold: float) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        Pairs i < j with cosine similarity >= threshold, as {i: [(j, sim), ...]}
+        
+        Embeddings are unit vectors, so one inner-product range search (or one
+        matrix product without FAISS) scores every pair at once.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        n = len(embeddings)
+        if FAISS_AVAILABLE:
+            index = faiss.IndexFlatIP(embeddings.shape[1])
+            index.add(embeddings)
+            # range_search keeps scores strictly above the radius
+            radius = float(np.nextafter(np.float32(threshold), np.float32(-np.inf)))
+            lims, scores, cols = index.range_search(embeddings, radius)
+            rows = np.repeat(np.arange(n), np.diff(lims).astype(np.int64))
+        else:
+            similarity = embeddings @ embeddings.T
+            rows, cols = np.nonzero(similarity >= threshold)
+            scores = similarity[rows, cols]
+        
+        upper = cols > rows
+        rows, cols, scores = rows[upper], cols[upper], scores[upper]
+        order = np.lexsort((cols, rows))
+        
+        pairs: Dict[int, List[Tuple[int, float]]] = {}
+        for i, j, score in zip(rows[order].tolist(), cols[order].tolist(), scores[order].tolist()):
+            pairs.setdefault(i, []).append((j, score))
+        return pairs
+    
     def rank_by_relevance(
         self,
         query: str,
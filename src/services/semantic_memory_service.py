@@ -319,11 +319,19 @@ class SemanticMemoryService:
         knowledge_items: List[Dict[str, Any]]
     ) -> List[KnowledgeItem]:
         """Add multiple knowledge items in batch"""
-        results = []
+        items = []
         for item_data in knowledge_items:
-            knowledge = self.add_knowledge(**item_data)
-            results.append(knowledge)
-        return results
+            data = dict(item_data)
+            data['tags'] = data.get('tags') or []
+            data['metadata'] = data.get('metadata') or {}
+            items.append(KnowledgeItem(**data))
+        
+        # One embedding call and one bulk write for the whole batch
+        embeddings = self.embedding_service.embed_texts([item.content for item in items])
+        for item, embedding in zip(items, embeddings):
+            item.embedding = embedding
+        
+        return self.knowledge_repo.create_many(items)
     
     def close(self):
         """Close database connections"""
@@ -0,0 +1,71 @@
+"""
+Statistical Filtering
+Percentile and above-average masks over in-memory score arrays (e.g. cached
+result sets), computed in single vectorized passes instead of SQL round-trips
+"""
+import numpy as np
+
+# Optional dependencies
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _at_least(scores, threshold):
+        """scores >= threshold, rows in parallel"""
+        mask = np.empty(scores.shape[0], dtype=np.bool_)
+        for i in prange(scores.shape[0]):
+            mask[i] = scores[i] >= threshold
+        return mask
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mean(scores):
+        """Parallel sum reduction (fastmath lets it vectorize)"""
+        total = 0.0
+        for i in prange(scores.shape[0]):
+            total += scores[i]
+        return total / scores.shape[0]
+else:
+    def _at_least(scores, threshold):
+        """scores >= threshold (numpy fallback)"""
+        return scores >= threshold
+    
+    def _mean(scores):
+        """Mean (numpy fallback)"""
+        return scores.mean()
+
+
+def percentile_threshold(scores: np.ndarray, p: float) -> float:
+    """
+    Lowest score in the top (1 - p) fraction, e.g. p=0.9 -> top 10%
+    
+    Uses np.partition (introselect, O(N)) rather than a full sort.
+    """
+    n = len(scores)
+    if n == 0:
+        return float('inf')
+    # Round up (tolerating float error in 1 - p) so a non-empty top slice always survives
+    k = min(max(int(np.ceil(n * (1 - p) - 1e-9)), 1), n)
+    return float(np.partition(scores, n - k)[n - k])
+
+
+def top_percentile_mask(scores: np.ndarray, p: float) -> np.ndarray:
+    """Boolean mask of scores in the top (1 - p) fraction (ties included)"""
+    scores = np.ascontiguousarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        return np.zeros(0, dtype=bool)
+    return _at_least(scores, percentile_threshold(scores, p))
+
+
+def above_mean_mask(scores: np.ndarray) -> np.ndarray:
+    """Boolean mask of scores strictly above the mean"""
+    scores = np.ascontiguousarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        return np.zeros(0, dtype=bool)
+    mean = _mean(scores)
+    # Strict: scores equal to the mean are not "above average"
+    return _at_least(scores, np.nextafter(mean, np.inf))
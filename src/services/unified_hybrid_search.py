@@ -13,6 +13,7 @@ import json
 import time
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from src.services.metadata_filter import (
     MetadataFilterEngine, 
@@ -44,10 +45,23 @@ except Exception as e:
             return np.random.rand(384)
 
 try:
-    from src.config.database import db_config
+    from src.config.database import db_config, halfvec_param, set_hnsw_ef_search
 except Exception as e:
     print(f"⚠️  Database config unavailable: {e}")
     db_config = None
+    halfvec_param = lambda embedding: embedding
+    set_hnsw_ef_search = lambda cursor, table: None
+
+# Column types left out of returned records: embeddings and tsvectors are
+# only used server-side for scoring, and their text form dwarfs the row
+HEAVY_COLUMN_TYPES = ['vector', 'halfvec', 'tsvector']
+_result_columns_cache: Dict[str, List[str]] = {}
+
+
+def _parse_embeddings(texts: List[str]) -> np.ndarray:
+    """Parse pgvector '[x,y,...]' literals into one (N, d) float32 matrix"""
+    values = ",".join(text[1:-1] for text in texts).split(",")
+    return np.array(values, dtype=np.float32).reshape(len(texts), -1)
 
 
 class UnifiedHybridSearch:
@@ -72,6 +86,9 @@ class UnifiedHybridSearch:
         self.k_rrf = k_rrf  # RRF parameter
         self.redis_client = get_redis() if REDIS_AVAILABLE else None
         self.filter_engine = MetadataFilterEngine()  # Metadata filtering engine
+        # Semantic and episodic layers are queried in parallel, each on its
+        # own pooled connection (psycopg2 releases the GIL while waiting)
+        self.layer_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid-layer")
         
     # ========== Redis Unified User Context ==========
     
@@ -189,7 +206,9 @@ class UnifiedHybridSearch:
             return False
         
         try:
-            timestamp = int(time.time())
+            # One clock read for both the key and the stored timestamp
+            now = datetime.now()
+            timestamp = int(now.timestamp())
             input_key = f"user_input:{user_id}:{timestamp}"
             
             # Generate embedding for the input
@@ -204,7 +223,7 @@ class UnifiedHybridSearch:
             input_data = {
                 "query": query,
                 "type": input_type,
-                "created_at": datetime.now().isoformat(),
+                "created_at": now.isoformat(),
                 "embedding": json.dumps(embedding_list)
             }
             
@@ -223,6 +242,68 @@ class UnifiedHybridSearch:
             print(f"❌ Failed to cache user input: {e}")
             return False
     
+    def cache_user_inputs_bulk(
+        self,
+        user_id: str,
+        items: List[Tuple[str, str]]
+    ) -> int:
+        """
+        Cache many (query, input_type) inputs in one Redis round-trip
+        Format: user_input:{user_id}:{timestamp}:{seq}
+        
+        Embeddings are generated in one batch and every write goes through a
+        single non-transactional pipeline (plus one INCRBY reserving the
+        sequence numbers). Returns the number of inputs cached.
+        """
+        if not self.redis_client or not items:
+            return 0
+        
+        try:
+            # One clock read for all keys; the per-user sequence (reserved
+            # atomically, so concurrent or same-second calls never collide)
+            # keeps inputs cached within the same second apart
+            now = datetime.now()
+            timestamp = int(now.timestamp())
+            queries = [query for query, _ in items]
+            embeddings = self.embed_queries(queries)
+            
+            seq_key = f"user_input_seq:{user_id}"
+            first_seq = self.redis_client.incrby(seq_key, len(items)) - len(items)
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.expire(seq_key, 1800)
+            for n, ((query, input_type), embedding) in enumerate(zip(items, embeddings), first_seq):
+                input_key = f"user_input:{user_id}:{timestamp}:{n}"
+                pipe.hset(input_key, mapping={
+                    "query": query,
+                    "type": input_type,
+                    "created_at": now.isoformat(),
+                    "embedding": json.dumps(np.asarray(embedding).tolist())
+                })
+                pipe.expire(input_key, 1800)  # 30 min TTL
+            
+            # Add to user's recent queries list
+            queries_key = f"user_queries:{user_id}"
+            pipe.rpush(queries_key, *queries)
+            pipe.ltrim(queries_key, -20, -1)  # Keep last 20
+            pipe.expire(queries_key, 3600)
+            pipe.execute()
+            
+            return len(items)
+            
+        except Exception as e:
+            print(f"❌ Failed to cache user inputs: {e}")
+            return 0
+    
+    def embed_queries(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed many texts in one batched provider call (per-text fallback)"""
+        embed_texts = getattr(self.embedding_service, 'embed_texts', None)
+        if embed_texts is not None:
+            embeddings = embed_texts(texts)
+        else:
+            embeddings = [self.embedding_service.embed_text(text) for text in texts]
+        return [np.asarray(embedding) for embedding in embeddings]
+    
     # ========== Hybrid Search on Redis Cache ==========
     
     def hybrid_search_redis_cache(
@@ -230,7 +311,8 @@ class UnifiedHybridSearch:
         query: str,
         user_id: str,
         search_type: str = "all",  # all, context, inputs
-        limit: int = 10
+        limit: int = 10,
+        query_embedding: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Hybrid search directly on Redis cached data
@@ -241,6 +323,7 @@ class UnifiedHybridSearch:
             user_id: User ID
             search_type: 'all', 'context' (user_context), or 'inputs' (user_input)
             limit: Max results
+            query_embedding: Precomputed query embedding (e.g. from embed_queries)
         
         Returns:
             Results with RRF scores and percentages
@@ -251,7 +334,8 @@ class UnifiedHybridSearch:
         start_time = time.time()
         
         # Generate query embedding
-        query_embedding = self.embedding_service.embed_text(query)
+        if query_embedding is None:
+            query_embedding = self.embedding_service.embed_text(query)
         if isinstance(query_embedding, list):
             query_vec = np.array(query_embedding)
         elif isinstance(query_embedding, np.ndarray):
@@ -406,15 +490,16 @@ class UnifiedHybridSearch:
             query_lower = query.lower()
             text_lower = text.lower()
             
-            # Split into words
+            # Split into words; hashing the text tokens once makes matching
+            # linear in text length regardless of how many query words there are
             query_words = set(query_lower.split())
-            text_words = text_lower.split()
+            text_words = set(text_lower.split())
             
             if not query_words or not text_words:
                 return 0.0
             
             # Count matches
-            matches = sum(1 for word in query_words if word in text_words)
+            matches = len(query_words & text_words)
             
             # Normalize by query length
             score = matches / len(query_words)
@@ -492,27 +577,23 @@ class UnifiedHybridSearch:
             if cached_context:
                 cache_hit = True
         
-        # 2. Vector search
+        # 2-3. Vector + BM25 candidates in one round trip
         query_embedding = self.embedding_service.embed_text(query)
-        vector_results = self._vector_search_knowledge(
-            query_embedding, user_id, limit * 2, category, tags
-        )
-        
-        # 3. BM25 search
-        bm25_results = self._bm25_search_knowledge(
-            query, user_id, limit * 2, category, tags
+        vector_results, bm25_results = self._search_knowledge_candidates(
+            query_embedding, query, user_id, limit * 2, category, tags
         )
         
         # 4. Apply RRF
-        rrf_results = self.reciprocal_rank_fusion(vector_results, bm25_results)
+        rrf_results = [
+            (item_id, rrf_score) for item_id, rrf_score in self.reciprocal_rank_fusion(vector_results, bm25_results)[:limit]
+            if rrf_score >= min_score
+        ]
         
-        # 5. Fetch full records and add scores
+        # 5. Fetch full records (one query for all hits) and add scores
+        records = self._get_records("knowledge_base", [item_id for item_id, _ in rrf_results])
         final_results = []
-        for item_id, rrf_score in rrf_results[:limit]:
-            if rrf_score < min_score:
-                continue
-            
-            record = self._get_knowledge_record(item_id)
+        for item_id, rrf_score in rrf_results:
+            record = records.get(item_id)
             if record:
                 # Find original scores
                 vector_score = next((s for id, s in vector_results if id == item_id), 0.0)
@@ -560,25 +641,23 @@ class UnifiedHybridSearch:
         # 1. Check Redis STM cache
         cache_results = self._check_episodic_cache(user_id, query)
         
-        # 2. Vector search on episodes
+        # 2-3. Vector search on episodes + BM25 on messages in one round trip
         query_embedding = self.embedding_service.embed_text(query)
-        vector_results = self._vector_search_episodes(
-            query_embedding, user_id, limit * 2
+        vector_results, bm25_results = self._search_episode_candidates(
+            query_embedding, query, user_id, limit * 2
         )
         
-        # 3. BM25 search on messages
-        bm25_results = self._bm25_search_episodes(query, user_id, limit * 2)
-        
         # 4. Apply RRF
-        rrf_results = self.reciprocal_rank_fusion(vector_results, bm25_results)
+        rrf_results = [
+            (item_id, rrf_score) for item_id, rrf_score in self.reciprocal_rank_fusion(vector_results, bm25_results)[:limit]
+            if rrf_score >= min_score
+        ]
         
-        # 5. Fetch full records
+        # 5. Fetch full records (one query for all hits)
+        records = self._get_records("episodes", [item_id for item_id, _ in rrf_results])
         final_results = []
-        for item_id, rrf_score in rrf_results[:limit]:
-            if rrf_score < min_score:
-                continue
-            
-            record = self._get_episode_record(item_id)
+        for item_id, rrf_score in rrf_results:
+            record = records.get(item_id)
             if record:
                 vector_score = next((s for id, s in vector_results if id == item_id), 0.0)
                 bm25_score = next((s for id, s in bm25_results if id == item_id), 0.0)
@@ -610,158 +689,135 @@ class UnifiedHybridSearch:
     
     # ========== Internal Search Methods ==========
     
-    def _vector_search_knowledge(
+    def _search_knowledge_candidates(
         self,
         embedding: np.ndarray,
-        user_id: Optional[str],
-        limit: int,
-        category: Optional[str],
-        tags: Optional[List[str]]
-    ) -> List[Tuple[int, float]]:
-        """Vector search in knowledge base"""
-        try:
-            with db_config.get_cursor() as cursor:
-                conditions = []
-                params = [embedding.tolist()]
-                
-                if user_id:
-                    conditions.append("user_id = %s")
-                    params.append(user_id)
-                if category:
-                    conditions.append("category = %s")
-                    params.append(category)
-                if tags:
-                    conditions.append("tags && %s")
-                    params.append(tags)
-                
-                where_clause = " AND ".join(conditions) if conditions else "TRUE"
-                
-                sql = f"""
-                    SELECT id, 1 - (embedding <=> %s::vector) AS similarity
-                    FROM knowledge_base
-                    WHERE embedding IS NOT NULL AND {where_clause}
-                    ORDER BY embedding <=> %s::vector
-                    LIMIT %s
-                """
-                
-                params.append(embedding.tolist())
-                params.append(limit)
-                
-                cursor.execute(sql, params)
-                return [(row['id'], float(row['similarity'])) for row in cursor.fetchall()]
-        except Exception as e:
-            print(f"❌ Vector search error: {e}")
-            return []
-    
-    def _bm25_search_knowledge(
-        self,
         query: str,
         user_id: Optional[str],
         limit: int,
         category: Optional[str],
         tags: Optional[List[str]]
-    ) -> List[Tuple[int, float]]:
-        """BM25 full-text search in knowledge base"""
+    ) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """Vector + BM25 candidates from the knowledge base in one UNION ALL query"""
         try:
             with db_config.get_cursor() as cursor:
                 conditions = []
-                params = [query, query]
+                filter_params = []
                 
                 if user_id:
                     conditions.append("user_id = %s")
-                    params.append(user_id)
+                    filter_params.append(user_id)
                 if category:
                     conditions.append("category = %s")
-                    params.append(category)
+                    filter_params.append(category)
                 if tags:
                     conditions.append("tags && %s")
-                    params.append(tags)
+                    filter_params.append(tags)
                 
                 where_clause = " AND ".join(conditions) if conditions else "TRUE"
                 
                 sql = f"""
-                    SELECT id, ts_rank_cd(content_tsv, plainto_tsquery('english', %s), 32) AS rank
-                    FROM knowledge_base
-                    WHERE content_tsv @@ plainto_tsquery('english', %s) AND {where_clause}
-                    ORDER BY rank DESC
-                    LIMIT %s
+                    (SELECT 'vector' AS source, id, 1 - (embedding <=> %s::halfvec) AS score
+                     FROM knowledge_base
+                     WHERE embedding IS NOT NULL AND {where_clause}
+                     ORDER BY embedding <=> %s::halfvec
+                     LIMIT %s)
+                    UNION ALL
+                    (SELECT 'bm25' AS source, id, ts_rank_cd(content_tsv, plainto_tsquery('english', %s), 32) AS score
+                     FROM knowledge_base
+                     WHERE content_tsv @@ plainto_tsquery('english', %s) AND {where_clause}
+                     ORDER BY score DESC
+                     LIMIT %s)
                 """
                 
-                params.append(limit)
+                query_vec = halfvec_param(embedding)
+                params = (
+                    [query_vec] + filter_params + [query_vec, limit]
+                    + [query, query] + filter_params + [limit]
+                )
                 
+                set_hnsw_ef_search(cursor, 'knowledge_base')
                 cursor.execute(sql, params)
-                return [(row['id'], float(row['rank'])) for row in cursor.fetchall()]
+                return self._split_candidates(cursor.fetchall())
         except Exception as e:
-            print(f"❌ BM25 search error: {e}")
-            return []
+            print(f"❌ Knowledge search error: {e}")
+            return [], []
     
-    def _vector_search_episodes(
+    def _search_episode_candidates(
         self,
         embedding: np.ndarray,
-        user_id: str,
-        limit: int
-    ) -> List[Tuple[int, float]]:
-        """Vector search in episodic memory"""
-        try:
-            with db_config.get_cursor() as cursor:
-                sql = """
-                    SELECT id, 1 - (vector <=> %s::vector) AS similarity
-                    FROM episodes
-                    WHERE user_id = %s AND vector IS NOT NULL
-                    ORDER BY vector <=> %s::vector
-                    LIMIT %s
-                """
-                cursor.execute(sql, (embedding.tolist(), user_id, embedding.tolist(), limit))
-                return [(row['id'], float(row['similarity'])) for row in cursor.fetchall()]
-        except Exception as e:
-            print(f"❌ Episode vector search error: {e}")
-            return []
-    
-    def _bm25_search_episodes(
-        self,
         query: str,
         user_id: str,
         limit: int
-    ) -> List[Tuple[int, float]]:
-        """BM25 search in chat messages"""
+    ) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """Episode vector + message BM25 candidates in one UNION ALL query"""
         try:
             with db_config.get_cursor() as cursor:
                 sql = """
-                    SELECT DISTINCT scm.super_chat_id AS id,
-                           ts_rank_cd(to_tsvector('english', scm.content), 
-                                     plainto_tsquery('english', %s), 32) AS rank
-                    FROM super_chat_messages scm
-                    JOIN super_chat sc ON scm.super_chat_id = sc.id
-                    WHERE sc.user_id = %s
-                      AND to_tsvector('english', scm.content) @@ plainto_tsquery('english', %s)
-                    ORDER BY rank DESC
-                    LIMIT %s
+                    (SELECT 'vector' AS source, id, 1 - (vector <=> %s::halfvec) AS score
+                     FROM episodes
+                     WHERE user_id = %s AND vector IS NOT NULL
+                     ORDER BY vector <=> %s::halfvec
+                     LIMIT %s)
+                    UNION ALL
+                    (SELECT DISTINCT 'bm25' AS source, scm.super_chat_id AS id,
+                            ts_rank_cd(scm.content_tsv, 
+                                      plainto_tsquery('english', %s), 32) AS score
+                     FROM super_chat_messages scm
+                     JOIN super_chat sc ON scm.super_chat_id = sc.id
+                     WHERE sc.user_id = %s
+                       AND scm.content_tsv @@ plainto_tsquery('english', %s)
+                     ORDER BY score DESC
+                     LIMIT %s)
                 """
-                cursor.execute(sql, (query, user_id, query, limit))
-                return [(row['id'], float(row['rank'])) for row in cursor.fetchall()]
+                query_vec = halfvec_param(embedding)
+                set_hnsw_ef_search(cursor, 'episodes')
+                cursor.execute(sql, (query_vec, user_id, query_vec, limit,
+                                     query, user_id, query, limit))
+                return self._split_candidates(cursor.fetchall())
         except Exception as e:
-            print(f"❌ Episode BM25 search error: {e}")
-            return []
+            print(f"❌ Episode search error: {e}")
+            return [], []
     
-    def _get_knowledge_record(self, item_id: int) -> Optional[Dict[str, Any]]:
-        """Fetch full knowledge record by ID"""
-        try:
-            with db_config.get_cursor() as cursor:
-                cursor.execute("SELECT * FROM knowledge_base WHERE id = %s", (item_id,))
-                row = cursor.fetchone()
-                return dict(row) if row else None
-        except:
-            return None
+    @staticmethod
+    def _split_candidates(rows) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """Bucket UNION ALL rows by source, each ranked best-first"""
+        vector_results, bm25_results = [], []
+        for row in rows:
+            bucket = vector_results if row['source'] == 'vector' else bm25_results
+            bucket.append((row['id'], float(row['score'])))
+        # UNION ALL doesn't guarantee branch order survives (parallel append)
+        vector_results.sort(key=lambda item: item[1], reverse=True)
+        bm25_results.sort(key=lambda item: item[1], reverse=True)
+        return vector_results, bm25_results
     
-    def _get_episode_record(self, episode_id: int) -> Optional[Dict[str, Any]]:
-        """Fetch episode record by ID"""
+    @staticmethod
+    def _result_columns(cursor, table: str, alias: str = "") -> str:
+        """Select list for a table's result records, without heavy columns"""
+        columns = _result_columns_cache.get(table)
+        if columns is None:
+            cursor.execute("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = %s
+                  AND udt_name <> ALL(%s)
+                ORDER BY ordinal_position
+            """, (table, HEAVY_COLUMN_TYPES))
+            columns = [row['column_name'] for row in cursor.fetchall()]
+            _result_columns_cache[table] = columns
+        return ", ".join(f"{alias}{column}" for column in columns)
+    
+    def _get_records(self, table: str, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch records (minus embedding columns) for several IDs in one query"""
+        if not ids:
+            return {}
         try:
             with db_config.get_cursor() as cursor:
-                cursor.execute("SELECT * FROM episodes WHERE id = %s", (episode_id,))
-                row = cursor.fetchone()
-                return dict(row) if row else None
+                columns = self._result_columns(cursor, table)
+                cursor.execute(f"SELECT {columns} FROM {table} WHERE id = ANY(%s)", (ids,))
+                return {row['id']: dict(row) for row in cursor.fetchall()}
         except:
-            return None
+            return {}
     
     def _check_episodic_cache(self, user_id: str, query: str) -> Optional[List[Dict[str, Any]]]:
         """Check episodic STM cache in Redis"""
@@ -796,7 +852,8 @@ class UnifiedHybridSearch:
         filters: Optional[Union[MetadataFilter, FilterGroup]] = None,
         search_semantic: bool = True,
         search_episodic: bool = True,
-        limit: int = 10
+        limit: int = 10,
+        cache_filters: bool = False
     ) -> Dict[str, Any]:
         """
         Hybrid search with metadata filtering
@@ -808,6 +865,8 @@ class UnifiedHybridSearch:
             search_semantic: Include semantic layer
             search_episodic: Include episodic layer
             limit: Max results per layer
+            cache_filters: Reuse the filter's matching ids from Redis
+                (may be up to MetadataFilterEngine.FILTER_CACHE_TTL seconds stale)
             
         Returns:
             Filtered and ranked results with RRF scores
@@ -834,19 +893,20 @@ class UnifiedHybridSearch:
         else:
             query_vec = query_embedding
         
-        # Search semantic layer with filters
+        # Search both layers with filters concurrently
+        futures = {}
         if search_semantic:
-            semantic_results = self._search_semantic_with_filters(
-                query, query_vec, user_id, filters, limit
+            futures["semantic"] = self.layer_executor.submit(
+                self._search_semantic_with_filters,
+                query, query_vec, user_id, filters, limit, cache_filters
             )
-            results["semantic"] = semantic_results
-        
-        # Search episodic layer with filters
         if search_episodic:
-            episodic_results = self._search_episodic_with_filters(
-                query, query_vec, user_id, filters, limit
+            futures["episodic"] = self.layer_executor.submit(
+                self._search_episodic_with_filters,
+                query, query_vec, user_id, filters, limit, cache_filters
             )
-            results["episodic"] = episodic_results
+        for layer, future in futures.items():
+            results[layer] = future.result()
         
         # Combine with RRF
         combined = self._rrf_combine(results["semantic"], results["episodic"])
@@ -870,55 +930,77 @@ class UnifiedHybridSearch:
         query_embedding: np.ndarray,
         user_id: str,
         filters: Optional[Union[MetadataFilter, FilterGroup]],
-        limit: int
+        limit: int,
+        cache_filters: bool = False
     ) -> List[Dict[str, Any]]:
-        """Search semantic layer with metadata filters"""
+        """Search semantic layer with metadata filters
+        
+        Vector and full-text candidates come from separate index-friendly
+        branches (HNSW ORDER BY distance, GIN @@ match); the weighted fusion
+        is then scored over that short list in numpy.
+        """
         try:
-            # Build SQL with filters
-            base_query = """
+            where_clause = "user_id = %(user_id)s"
+            params: Dict[str, Any] = {
+                'embedding': halfvec_param(query_embedding),
+                'query': query,
+                'user_id': user_id,
+                'candidates': limit * 4
+            }
+            
+            sql = """
+                WITH candidates AS (
+                    (SELECT id FROM knowledge_base
+                     WHERE {where_clause}
+                     ORDER BY embedding <=> %(embedding)s::halfvec
+                     LIMIT %(candidates)s)
+                    UNION
+                    (SELECT id FROM knowledge_base
+                     WHERE {where_clause}
+                       AND content_tsv @@ plainto_tsquery('english', %(query)s)
+                     ORDER BY ts_rank_cd(content_tsv, plainto_tsquery('english', %(query)s), 32) DESC
+                     LIMIT %(candidates)s)
+                )
                 SELECT 
-                    k.*,
-                    1 - (k.embedding <=> %s::vector) as vector_score,
-                    ts_rank_cd(k.ts_vector, plainto_tsquery('english', %s), 32) as bm25_score
+                    {columns},
+                    1 - (k.embedding <=> %(embedding)s::halfvec) as vector_score,
+                    ts_rank_cd(k.content_tsv, plainto_tsquery('english', %(query)s), 32) as bm25_score
                 FROM knowledge_base k
-                WHERE k.user_id = %s
+                JOIN candidates c ON c.id = k.id
             """
             
-            params = [query_embedding.tolist(), query, user_id]
+            with db_config.get_cursor() as cursor:
+                # Add filter conditions (named %(filter_n)s parameters)
+                if filters:
+                    filter_clause, filter_params = self._filter_condition(
+                        cursor, 'knowledge_base', filters, user_id, cache_filters
+                    )
+                    where_clause += f" AND ({filter_clause})"
+                    params.update(filter_params)
+                
+                set_hnsw_ef_search(cursor, 'knowledge_base')
+                sql = sql.replace("{where_clause}", where_clause).replace(
+                    "{columns}", self._result_columns(cursor, 'knowledge_base', 'k.')
+                )
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
             
-            # Add filter conditions
-            if filters:
-                where_clause, filter_params = self.filter_engine.to_sql_where(filters)
-                base_query += f" AND ({where_clause})"
-                params.extend(filter_params.values())
+            if not rows:
+                return []
             
-            base_query += """
-                ORDER BY (
-                    %s * (1 - (k.embedding <=> %s::vector)) +
-                    %s * ts_rank_cd(k.ts_vector, plainto_tsquery('english', %s), 32)
-                ) DESC
-                LIMIT %s
-            """
+            scores = np.array(
+                [(row['vector_score'] or 0.0, row['bm25_score'] or 0.0) for row in rows],
+                dtype=np.float64
+            ) @ np.array([self.vector_weight, self.bm25_weight])
             
-            params.extend([
-                self.vector_weight, query_embedding.tolist(),
-                self.bm25_weight, query,
-                limit
-            ])
+            results = []
+            for i in np.argsort(-scores, kind='stable')[:limit]:
+                row_dict = dict(rows[i])
+                row_dict['layer'] = 'semantic'
+                row_dict['hybrid_score'] = float(scores[i])
+                results.append(row_dict)
             
-            with db_config.get_cursor() as cursor:
-                cursor.execute(base_query, params)
-                results = []
-                for row in cursor.fetchall():
-                    row_dict = dict(row)
-                    row_dict['layer'] = 'semantic'
-                    row_dict['hybrid_score'] = (
-                        self.vector_weight * float(row['vector_score']) +
-                        self.bm25_weight * float(row['bm25_score'])
-                    )
-                    results.append(row_dict)
-                
-                return results
+            return results
                 
         except Exception as e:
             print(f"❌ Semantic search with filters error: {e}")
@@ -930,34 +1012,43 @@ class UnifiedHybridSearch:
         query_embedding: np.ndarray,
         user_id: str,
         filters: Optional[Union[MetadataFilter, FilterGroup]],
-        limit: int
+        limit: int,
+        cache_filters: bool = False
     ) -> List[Dict[str, Any]]:
         """Search episodic layer with metadata filters"""
         try:
             base_query = """
                 SELECT 
-                    e.*,
-                    1 - (e.vector <=> %s::vector) as vector_score
+                    {columns},
+                    1 - (e.vector <=> %(embedding)s::halfvec) as vector_score
                 FROM episodes e
-                WHERE e.user_id = %s AND e.vector IS NOT NULL
+                WHERE e.user_id = %(user_id)s AND e.vector IS NOT NULL
             """
             
-            params = [query_embedding.tolist(), user_id]
-            
-            # Add filter conditions
-            if filters:
-                where_clause, filter_params = self.filter_engine.to_sql_where(filters)
-                base_query += f" AND ({where_clause})"
-                params.extend(filter_params.values())
-            
-            base_query += """
-                ORDER BY e.vector <=> %s::vector
-                LIMIT %s
-            """
-            
-            params.extend([query_embedding.tolist(), limit])
+            # Named parameters throughout: filter conditions use %(filter_n)s
+            params: Dict[str, Any] = {
+                'embedding': halfvec_param(query_embedding),
+                'user_id': user_id,
+                'limit': limit
+            }
             
             with db_config.get_cursor() as cursor:
+                # Add filter conditions
+                if filters:
+                    where_clause, filter_params = self._filter_condition(
+                        cursor, 'episodes', filters, user_id, cache_filters
+                    )
+                    base_query += f" AND ({where_clause})"
+                    params.update(filter_params)
+                
+                base_query += """
+                    ORDER BY e.vector <=> %(embedding)s::halfvec
+                    LIMIT %(limit)s
+                """
+                
+                base_query = base_query.replace(
+                    "{columns}", self._result_columns(cursor, 'episodes', 'e.')
+                )
                 cursor.execute(base_query, params)
                 results = []
                 for row in cursor.fetchall():
@@ -972,6 +1063,22 @@ class UnifiedHybridSearch:
             print(f"❌ Episodic search with filters error: {e}")
             return []
     
+    def _filter_condition(
+        self,
+        cursor,
+        table: str,
+        filters: Union[MetadataFilter, FilterGroup],
+        user_id: str,
+        cache_filters: bool
+    ) -> Tuple[str, Dict[str, Any]]:
+        """SQL condition for filters, optionally as a Redis-cached id list"""
+        if cache_filters and self.redis_client:
+            ids = self.filter_engine.cached_matching_ids(
+                self.redis_client, cursor, table, filters, user_id
+            )
+            return "id = ANY(%(filter_ids)s)", {'filter_ids': ids}
+        return self.filter_engine.to_sql_where(filters)
+    
     def search_by_time_window(
         self,
         query: str,
@@ -1112,10 +1219,88 @@ class UnifiedHybridSearch:
                 # Simple equality
                 filter_group.add_filter(FilterBuilder.equals(field, condition))
         
+        # Metadata conditions repeat across queries and sessions: cache their ids
         return self.hybrid_search_with_filters(
             query=query,
             user_id=user_id,
             filters=filter_group,
-            limit=limit
+            limit=limit,
+            cache_filters=True
         )
 
+    
+    def prefilter_then_rerank(
+        self,
+        query: str,
+        user_id: str,
+        filters: Union[MetadataFilter, FilterGroup],
+        top_k: int = 10,
+        cache_filters: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Metadata-first semantic search: filter, then score only the survivors
+        
+        The filter runs in SQL and returns just (id, embedding) pairs; cosine
+        scores for the whole survivor set are one matrix-vector product in
+        numpy, with argpartition for the top-k. Suited to selective filters,
+        where an HNSW scan would discard most of its candidates.
+        """
+        start_time = time.time()
+        query_vec = np.asarray(self.embedding_service.embed_text(query), dtype=np.float32)
+        
+        try:
+            with db_config.get_cursor() as cursor:
+                filter_clause, params = self._filter_condition(
+                    cursor, 'knowledge_base', filters, user_id, cache_filters
+                )
+                params['user_id'] = user_id
+                cursor.execute(f"""
+                    SELECT id, embedding::text AS embedding FROM knowledge_base
+                    WHERE user_id = %(user_id)s AND embedding IS NOT NULL
+                      AND ({filter_clause})
+                """, params)
+                rows = cursor.fetchall()
+                
+                if not rows:
+                    return {"results": [], "metrics": {"candidate_count": 0}}
+                
+                # Survivors as parallel arrays: ids and one (N, d) float32 matrix
+                ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=len(rows))
+                embeddings = _parse_embeddings([row['embedding'] for row in rows])
+                
+                scores = embeddings @ query_vec
+                norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_vec)
+                np.divide(scores, norms, out=scores, where=norms > 0)
+                
+                k = min(top_k, len(scores))
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top], kind='stable')]
+                
+                columns = self._result_columns(cursor, 'knowledge_base')
+                cursor.execute(
+                    f"SELECT {columns} FROM knowledge_base WHERE id = ANY(%s)",
+                    (ids[top].tolist(),)
+                )
+                records = {row['id']: dict(row) for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"❌ Prefilter search error: {e}")
+            return {"results": [], "metrics": {"error": str(e)}}
+        
+        results = []
+        for i in top:
+            record = records.get(int(ids[i]))
+            if record is None:
+                continue
+            record['layer'] = 'semantic'
+            record['vector_score'] = float(scores[i])
+            record['hybrid_score'] = float(scores[i])
+            results.append(record)
+        
+        return {
+            "results": results,
+            "metrics": {
+                "search_time_ms": round((time.time() - start_time) * 1000, 2),
+                "candidate_count": len(ids),
+                "result_count": len(results)
+            }
+        }
@@ -70,6 +70,134 @@ def test_basic_functionality():
     
     return True
 
+def test_cosine_topk():
+    """Test the FAISS-free top-k scoring path"""
+    print("\nTesting cosine_topk...")
+    
+    import numpy as np
+    from services.biencoder_reranker import cosine_topk
+    
+    from services.biencoder_reranker import normalize_rows
+    
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((500, 64)).astype(np.float32)
+    raw = matrix.copy()
+    normalize_rows(matrix)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+    assert np.allclose(matrix, raw / np.linalg.norm(raw, axis=1, keepdims=True), atol=1e-6)
+    query = matrix[42].copy()
+    
+    scores, indices = cosine_topk(query, matrix, 5)
+    expected = np.argsort(matrix @ query)[::-1][:5]
+    
+    assert list(indices) == list(expected)
+    assert indices[0] == 42 and abs(scores[0] - 1.0) < 1e-4
+    assert all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1))
+    assert len(cosine_topk(query, matrix, 1000)[1]) == 500
+    print("✅ cosine_topk matches brute-force ranking")
+    
+    from services.biencoder_reranker import cosine_topk_batch
+    
+    queries = matrix[[3, 42, 99]]
+    batch_scores, batch_indices = cosine_topk_batch(queries, matrix, 5)
+    
+    assert batch_indices.shape == (3, 5)
+    for row, query_row in enumerate(queries):
+        single_scores, single_indices = cosine_topk(query_row, matrix, 5)
+        assert list(batch_indices[row]) == list(single_indices)
+        assert np.allclose(batch_scores[row], single_scores, atol=1e-5)
+    print("✅ cosine_topk_batch matches per-query cosine_topk")
+    
+    return True
+
+def test_keyword_scores():
+    """Test the matrix keyword-overlap baseline against the set version"""
+    print("\nTesting keyword_scores...")
+    
+    import numpy as np
+    from services.biencoder_reranker import BiEncoderReranker
+    
+    docs = [
+        "Vector databases store embeddings",
+        "FAISS provides efficient similarity search for dense vectors",
+        "Semantic search finds results based on meaning",
+        ""
+    ]
+    # Keyword scoring needs no model, so skip __init__
+    reranker = BiEncoderReranker.__new__(BiEncoderReranker)
+    reranker.documents = docs
+    reranker._build_term_matrix(docs)
+    
+    query = "vector similarity search"
+    query_words = set(query.split())
+    expected = [len(query_words & set(d.lower().split())) / len(query_words) for d in docs]
+    
+    assert np.allclose(reranker.keyword_scores(query), expected)
+    assert not reranker.keyword_scores("").any()
+    print("✅ keyword_scores matches per-document set overlap")
+    
+    return True
+
+def test_embedding_cache():
+    """Test the content-addressed embedding cache round trip"""
+    print("\nTesting DiskEmbeddingCache...")
+    
+    import numpy as np
+    from services.biencoder_reranker import DiskEmbeddingCache
+    
+    cache = DiskEmbeddingCache(":memory:")
+    texts = ["alpha", "beta"]
+    vectors = np.random.rand(2, 8).astype(np.float32)
+    cache.put_many("model-a", texts, vectors)
+    
+    found = cache.get_many("model-a", ["beta", "gamma", "alpha", "beta"])
+    assert sorted(found) == [0, 2, 3]
+    assert np.array_equal(found[0], vectors[1])
+    assert np.array_equal(found[2], vectors[0])
+    # Another model/settings namespace never sees these entries
+    assert cache.get_many("model-b", texts) == {}
+    cache.close()
+    print("✅ DiskEmbeddingCache returns hits by position and misses nothing else")
+    
+    return True
+
+def test_async_batching():
+    """Test that concurrent arerank calls share one encode batch"""
+    print("\nTesting arerank dynamic batching...")
+    
+    import asyncio
+    import numpy as np
+    from services.biencoder_reranker import BiEncoderReranker
+    
+    docs = ["doc zero", "doc one", "doc two"]
+    batches = []
+    
+    def encode(texts, show_progress_bar=False):
+        batches.append(list(texts))
+        return np.eye(3, dtype=np.float32)[[int(t[-1]) for t in texts]]
+    
+    # Encoding is stubbed per instance, so skip model loading in __init__
+    reranker = BiEncoderReranker.__new__(BiEncoderReranker)
+    reranker.documents = docs
+    reranker.document_embeddings = np.eye(3, dtype=np.float32)
+    reranker.faiss_index = None
+    reranker._encode_loop = None
+    reranker._encode_smart = encode
+    
+    async def run():
+        return await asyncio.gather(
+            reranker.arerank("q1", top_k=1),
+            reranker.arerank("q2", top_k=1),
+            reranker.arerank("q1", top_k=1)
+        )
+    
+    results = asyncio.run(run())
+    assert batches == [["q1", "q2"]], batches
+    assert [r[0]['index'] for r in results] == [1, 2, 1]
+    print("✅ Three concurrent queries encoded in one batch of two unique texts")
+    
+    return True
+
 def main():
     """Run all tests"""
     print("="*80)
@@ -81,6 +209,22 @@ def main():
         print("\n❌ Import test failed!")
         return
     
+    if not test_cosine_topk():
+        print("\n❌ cosine_topk test failed!")
+        return
+    
+    if not test_keyword_scores():
+        print("\n❌ keyword_scores test failed!")
+        return
+    
+    if not test_embedding_cache():
+        print("\n❌ embedding cache test failed!")
+        return
+    
+    if not test_async_batching():
+        print("\n❌ async batching test failed!")
+        return
+    
     # Test functionality
     try:
         if test_basic_functionality():
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Test that the app's hash-embedding kernel matches the exact uint64 reference
+"""
+import numpy as np
+import pytest
+
+
+def test_kernel_matches_numpy():
+    """Test the Numba kernel against the numpy path on full-range uint64 words"""
+    print("Testing hash-embedding kernel...")
+
+    pytest.importorskip("numba")
+    from interactive_memory_app import _hash_embedding_kernel, _hash_embedding_numpy
+
+    rng = np.random.default_rng(0)
+    # Words above 2**53 are where a float64 modulo would lose low bits
+    words = rng.integers(0, np.iinfo(np.uint64).max, size=1536, dtype=np.uint64, endpoint=True)
+    words[:4] = [np.iinfo(np.uint64).max, 2**53 + 1, 2**63 + 12345, 0]
+    words.flags.writeable = False
+
+    assert np.allclose(_hash_embedding_kernel(words), _hash_embedding_numpy(words), rtol=0, atol=1e-12)
+    print("✅ Numba kernel matches the uint64 numpy reference")
+
+
+def main():
+    """Run all tests"""
+    test_kernel_matches_numpy()
+    print("\n✅ ALL TESTS PASSED")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ from src.services.metadata_filter import (
     FilterBuilder,
     FilterGroup,
     LogicalOperator,
+    MetadataFilter,
+    FilterOperator,
     MetadataFilterEngine
 )
 
@@ -97,9 +99,112 @@ def test_sql_generation():
     print(f"\n✓ Metadata SQL: WHERE {where3}")
     print(f"  Params: {params3}")
     
+    # Same shape, new values: cached template, freshly bound params
+    group2 = FilterGroup(operator=LogicalOperator.AND)
+    group2.add_filter(FilterBuilder.equals("category", "skill"))
+    group2.add_filter(FilterBuilder.greater_than("importance_score", 0.2))
+    where4, params4 = engine.to_sql_where(group2)
+    assert where4 == where2
+    assert list(params4.values()) == ["skill", 0.2]
+    assert list(params2.values()) == ["knowledge", 0.7]
+    print(f"\n✓ Template reused for same filter shape: {params4}")
+    
+    # Filter-result cache keys: rebuilt relative-time filters share an entry
+    key1 = engine.filter_cache_key("knowledge_base", FilterBuilder.recent("created_at", days=7), "user_001")
+    key2 = engine.filter_cache_key("knowledge_base", FilterBuilder.recent("created_at", days=7), "user_001")
+    key3 = engine.filter_cache_key("knowledge_base", FilterBuilder.recent("created_at", days=7), "user_002")
+    assert key1 == key2 and key1 != key3
+    assert engine.filter_cache_key("episodes", group, "u") != engine.filter_cache_key("episodes", group2, "u")
+    print(f"✓ Filter cache key: {key1}")
+    
+    # Regex/wildcard filters: PostgreSQL regex syntax, case flag honoured
+    where5, params5 = engine.to_sql_where(
+        MetadataFilter("content", FilterOperator.REGEX, r"\b(python|java|rust)\b", case_sensitive=False)
+    )
+    assert where5 == "content ~* %(filter_1)s"
+    assert params5 == {"filter_1": r"\y(python|java|rust)\y"}
+    where6, _ = engine.to_sql_where(FilterBuilder.contains("title", "API", case_sensitive=False))
+    assert where6 == "title ILIKE %(filter_1)s"
+    print(f"✓ Regex SQL: WHERE {where5}  {params5}")
+    
+    # Long ANY_OF lists: chunked overlaps, same template for same chunk count
+    tags = [f"t{i}" for i in range(45)]
+    where7, params7 = engine.to_sql_where(MetadataFilter("tags", FilterOperator.ANY_OF, tags))
+    assert where7.count("&&") == 3
+    assert [len(v) for v in params7.values()] == [20, 20, 5]
+    assert sum(params7.values(), []) == tags
+    print(f"✓ Long ANY_OF SQL: WHERE {where7}")
+    
     print("\n✅ SQL generation working!\n")
 
 
+def test_filter_optimization():
+    """Test filter tree canonicalization"""
+    print("="*60)
+    print("TEST 3b: Filter Optimization")
+    print("="*60)
+    
+    engine = MetadataFilterEngine()
+    
+    # Redundant time windows fold to the tightest; equality sorts first
+    group = FilterGroup(operator=LogicalOperator.AND)
+    day = FilterBuilder.recent("created_at", days=1)
+    hour = FilterBuilder.time_window("created_at", hours=1)
+    group.add_filter(day)
+    group.add_filter(FilterBuilder.contains("title", "API"))
+    group.add_filter(hour)
+    group.add_filter(FilterBuilder.equals("category", "knowledge"))
+    optimized = engine.optimize(group)
+    assert optimized.filters[0].field == "category"
+    assert hour in optimized.filters and day not in optimized.filters
+    assert len(group.filters) == 4  # input left untouched
+    print(f"✓ Optimized AND: {[f.field for f in optimized.filters]}")
+    
+    # Contradiction short-circuits to an always-false filter
+    contradiction = FilterGroup(operator=LogicalOperator.AND)
+    contradiction.add_filter(FilterBuilder.equals("category", "knowledge"))
+    contradiction.add_filter(FilterBuilder.equals("category", "skill"))
+    items = [{"category": "knowledge"}, {"category": "skill"}]
+    assert engine.apply_filter(items, contradiction) == []
+    print(f"✓ Contradiction SQL: WHERE {engine.to_sql_where(contradiction)[0]}")
+    
+    # NOT NOT x -> x
+    inner = FilterGroup(operator=LogicalOperator.NOT)
+    inner.add_filter(FilterBuilder.equals("category", "skill"))
+    double_not = FilterGroup(operator=LogicalOperator.NOT)
+    double_not.add_filter(inner)
+    assert engine.to_sql_where(double_not)[0] == "category = %(filter_1)s"
+    assert engine.apply_filter(items, double_not) == [{"category": "skill"}]
+    print("✓ NOT NOT folded")
+    
+    print("\n✅ Filter optimization working!\n")
+
+
+def test_statistical_filtering():
+    """Test percentile / above-average score masks"""
+    print("="*60)
+    print("TEST 3c: Statistical Filtering")
+    print("="*60)
+    
+    import numpy as np
+    from src.services.statistical_filter import (
+        percentile_threshold,
+        top_percentile_mask,
+        above_mean_mask
+    )
+    
+    scores = np.arange(1, 11, dtype=np.float64)
+    assert top_percentile_mask(scores, 0.9).tolist() == [False] * 9 + [True]
+    assert top_percentile_mask(scores, 0.8).sum() == 2
+    assert percentile_threshold(scores, 0.8) == 9.0
+    assert above_mean_mask(scores).tolist() == [False] * 5 + [True] * 5
+    assert not above_mean_mask(np.ones(4)).any()
+    assert len(top_percentile_mask(np.array([]), 0.9)) == 0
+    print("✓ Top-percentile and above-average masks match expected counts")
+    
+    print("\n✅ Statistical filtering working!\n")
+
+
 def test_in_memory_filtering():
     """Test filtering on sample data"""
     print("="*60)
@@ -216,6 +321,8 @@ def main():
         test_filter_creation()
         test_filter_groups()
         test_sql_generation()
+        test_filter_optimization()
+        test_statistical_filtering()
         test_in_memory_filtering()
         test_integration_patterns()
         
@@ -23,7 +23,7 @@ cur.execute("""
         'EPISODIC-EPISODES' as source_layer,
         'episodes' as table_name,
         id,
-        messages,
+        left(messages->0->>'content', 60) AS first_message,
         message_count,
         source_type,
         created_at
@@ -41,10 +41,8 @@ print(f"✓ Found {len(results)} episodes matching 'hobby'")
 for item in results:
     print(f"\n  Episode ID: {item['id']}")
     print(f"  Messages: {item['message_count']}")
-    import json
-    messages = json.loads(item['messages']) if isinstance(item['messages'], str) else item['messages']
-    if messages:
-        print(f"  First message: {messages[0]['content'][:60]}...")
+    if item['first_message']:
+        print(f"  First message: {item['first_message']}...")
 
 cur.close()
 conn.close()